@@ -0,0 +1,245 @@
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from configuracao import PRESETS_IMAGEM, configuracao_preset
+from inferencia_pose import BACKENDS_POSE
+from serializacao import preparar_para_json
+from saidas import FORMATOS, criar_saida
+from instrumentacao import METRICAS, somar_totais, configurar_logging
+
+EXTENSOES_IMAGEM = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
+# Função do pipeline, configuração e cache, carregados uma vez por processo em _inicializar_worker
+_analisar_imagem = None
+_config = None
+_cache = None
+
+class ImagemIlegivel(ValueError):
+    """A imagem não pôde ser lida. Falha definitiva: não é reenviada."""
+
+def listar_imagens(diretorio):
+    """Percorre o diretório recursivamente e retorna os caminhos das imagens, em ordem."""
+    caminhos = []
+    for raiz, _, arquivos in os.walk(diretorio):
+        for nome in arquivos:
+            if nome.lower().endswith(EXTENSOES_IMAGEM):
+                caminhos.append(os.path.join(raiz, nome))
+    caminhos.sort()
+    return caminhos
+
+def ler_manifesto(manifesto_path):
+    """Lê um manifesto de texto com um caminho de imagem por linha (linhas vazias e '#' são ignoradas)."""
+    with open(manifesto_path, 'r', encoding='utf-8') as f:
+        linhas = (linha.strip() for linha in f)
+        return [linha for linha in linhas if linha and not linha.startswith('#')]
+
+def _inicializar_worker(threads_por_worker, config, diretorio_cache=None):
+    """
+    Executado uma vez em cada processo do pool: limita as threads internas
+    (evita que N processos disputem todos os núcleos) e carrega e aquece os
+    modelos (YOLO, Face Mesh e dlib) uma única vez. Com `diretorio_cache`, os
+    workers compartilham um cache de resultados em disco.
+    """
+    global _analisar_imagem, _config, _cache
+    try:
+        import torch
+        torch.set_num_threads(threads_por_worker)
+    except ImportError:
+        pass
+    import cv2
+    cv2.setNumThreads(threads_por_worker)
+
+    from pipeline import analisar_imagem
+    from modelos import aquecer
+    from detector_pessoas_pose import parametros_modelo_pose
+    aquecer(parametros={'yolo_pose': parametros_modelo_pose(config)})
+    _analisar_imagem = analisar_imagem
+    _config = config
+    if diretorio_cache:
+        from cache_resultados import CacheResultados
+        _cache = CacheResultados(capacidade=16, diretorio=diretorio_cache)
+
+def _analisar_arquivo(caminho):
+    """
+    Tarefa executada no worker: analisa uma imagem e retorna as pessoas (serializáveis),
+    junto com o PID, os contadores do cache do worker (ou None, sem cache) e os tempos
+    acumulados de cada etapa no worker.
+    """
+    resultado, quadro = _analisar_imagem(caminho, _config, _cache)
+    if quadro is None:
+        raise ImagemIlegivel(f"Não foi possível ler a imagem em {caminho}")
+    estatisticas_cache = _cache.estatisticas() if _cache is not None else None
+    return preparar_para_json(resultado or []), os.getpid(), estatisticas_cache, METRICAS.totais()
+
+def analisar_em_lote(caminhos, saida_path, num_workers=None, threads_por_worker=1,
+                     tentativas=2, intervalo_progresso=10.0, config=None, diretorio_cache=None,
+                     formato="jsonl"):
+    """
+    Analisa muitas imagens distribuindo-as em um pool de processos, sem interface gráfica.
+
+    Cada resultado é gravado assim que fica pronto (por padrão, um objeto por imagem
+    em um arquivo JSON Lines; ver saidas.py). Falhas são reenviadas até `tentativas`
+    vezes (imagens ilegíveis, nenhuma); as que persistirem são registradas na saída com
+    a chave "erro". Se um worker morrer (falta de memória, falha no dlib ou no MediaPipe),
+    o pool é recriado e a tentativa é cobrada de todas as imagens que estavam em voo, que
+    são então reenviadas uma de cada vez, para que só a culpada se esgote. Se o pool
+    quebrar mais de `tentativas` + 2 vezes seguidas sem nenhum sucesso (ex.: os workers
+    não conseguem carregar os modelos), o lote é abortado com RuntimeError.
+
+    Args:
+        caminhos (list): Caminhos das imagens a analisar.
+        saida_path (str): Arquivo (ou diretório, no formato colunar) de saída.
+        num_workers (int, opcional): Número de processos (padrão: os.cpu_count()).
+        threads_por_worker (int): Threads de inferência por processo.
+        tentativas (int): Quantas vezes uma imagem com falha é reenviada.
+        intervalo_progresso (float): Intervalo, em segundos, entre relatórios de progresso.
+        config (ConfiguracaoPipeline, opcional): Opções das etapas, enviadas a cada worker.
+        diretorio_cache (str, opcional): Cache de resultados em disco. Imagens (ou etapas)
+            já analisadas em execuções anteriores com os mesmos modelos e opções são reaproveitadas.
+        formato (str): Formato da saída, um de saidas.FORMATOS.
+
+    Returns:
+        dict: Resumo com o total de imagens, sucessos, falhas, os tempos médios de cada etapa
+              e os contadores ("metricas") e, com cache, os acertos e falhas do cache.
+    """
+    num_workers = num_workers or os.cpu_count() or 1
+    # Limita as tarefas em voo para não criar centenas de milhares de futures de uma vez
+    max_em_voo = num_workers * 4
+    pendentes = list(reversed(caminhos))
+    tentativas_por_caminho = {}
+    total = len(caminhos)
+    sucessos = falhas = 0
+    # Últimos contadores do cache e tempos de cada worker (PID -> estatísticas)
+    caches_workers = {}
+    metricas_workers = {}
+    inicio = ultimo_relatorio = time.perf_counter()
+
+    def criar_pool():
+        return ProcessPoolExecutor(max_workers=num_workers, initializer=_inicializar_worker,
+                                   initargs=(threads_por_worker, config, diretorio_cache))
+
+    incluir_encoding = config is not None and config.calcular_encoding_facial
+    with criar_saida(saida_path, formato, incluir_encoding) as saida:
+        executor = criar_pool()
+        em_voo = {}
+        # Um worker morreu: as tarefas em voo terminam com BrokenProcessPool (e são
+        # cobradas como falhas); quando todas tiverem terminado, o pool é recriado
+        quebrado = False
+        # Imagens que estavam em voo quando o pool quebrou, reenviadas sozinhas
+        suspeitas = []
+        # Pools quebrados seguidos, sem nenhum sucesso entre eles. Uma imagem culpada quebra
+        # o pool até `tentativas` + 1 vezes seguidas; além disso, o problema está no worker
+        # (ex.: um modelo ausente em _inicializar_worker) e o lote é abortado
+        quebras_seguidas = 0
+        try:
+            while pendentes or suspeitas or em_voo:
+                if quebrado and not em_voo:
+                    quebras_seguidas += 1
+                    if quebras_seguidas > tentativas + 2:
+                        raise RuntimeError(f"O pool de processos quebrou {quebras_seguidas} vezes seguidas sem "
+                                           "nenhuma imagem analisada; verifique a inicialização dos workers.")
+                    print("Um worker terminou inesperadamente; recriando o pool de processos.")
+                    executor.shutdown(wait=True)
+                    executor = criar_pool()
+                    quebrado = False
+                if not quebrado:
+                    try:
+                        if suspeitas:
+                            if not em_voo:
+                                em_voo[executor.submit(_analisar_arquivo, suspeitas[-1])] = suspeitas[-1]
+                                suspeitas.pop()
+                        else:
+                            while pendentes and len(em_voo) < max_em_voo:
+                                em_voo[executor.submit(_analisar_arquivo, pendentes[-1])] = pendentes[-1]
+                                pendentes.pop()
+                    except BrokenProcessPool:
+                        quebrado = True
+                if not em_voo:
+                    continue
+
+                concluidos, _ = wait(em_voo, return_when=FIRST_COMPLETED)
+                for future in concluidos:
+                    caminho = em_voo.pop(future)
+                    try:
+                        pessoas, pid, estatisticas_cache, metricas = future.result()
+                        metricas_workers[pid] = metricas
+                        if estatisticas_cache is not None:
+                            caches_workers[pid] = estatisticas_cache
+                        saida.escrever(pessoas, arquivo=caminho)
+                        sucessos += 1
+                        quebras_seguidas = 0
+                    except Exception as e:
+                        quebrado = quebrado or isinstance(e, BrokenProcessPool)
+                        tentativas_por_caminho[caminho] = tentativas_por_caminho.get(caminho, 0) + 1
+                        if not isinstance(e, ImagemIlegivel) and tentativas_por_caminho[caminho] <= tentativas:
+                            (suspeitas if isinstance(e, BrokenProcessPool) else pendentes).append(caminho)
+                            continue
+                        saida.escrever(None, arquivo=caminho, erro=f"{type(e).__name__}: {e}")
+                        falhas += 1
+
+                agora = time.perf_counter()
+                if agora - ultimo_relatorio >= intervalo_progresso:
+                    ultimo_relatorio = agora
+                    feitas = sucessos + falhas
+                    taxa = feitas / (agora - inicio)
+                    restante = (total - feitas) / taxa if taxa > 0 else float('inf')
+                    print(f"[{feitas}/{total}] {taxa:.1f} img/s, {falhas} falha(s), ~{restante / 60:.1f} min restantes")
+                    saida.flush()
+        finally:
+            executor.shutdown(wait=True)
+
+    print(f"Concluído: {sucessos} imagem(ns) analisada(s), {falhas} falha(s) em {time.perf_counter() - inicio:.1f}s.")
+    resumo = {"total": total, "sucessos": sucessos, "falhas": falhas}
+    if caches_workers:
+        resumo["cache"] = {chave: sum(e[chave] for e in caches_workers.values())
+                           for chave in ("acertos_memoria", "acertos_disco", "falhas")}
+        print(f"Cache: {resumo['cache']['acertos_memoria'] + resumo['cache']['acertos_disco']} acerto(s), "
+              f"{resumo['cache']['falhas']} falha(s).")
+    resumo["metricas"] = somar_totais(metricas_workers.values())
+    for etapa, tempo in resumo["metricas"]["tempos"].items():
+        print(f"Etapa '{etapa}': {tempo['execucoes']} execução(ões), média {tempo['media_ms']:.1f} ms")
+    if resumo["metricas"]["contadores"]:
+        print("Contadores: " + ", ".join(f"{nome}={valor}" for nome, valor in sorted(resumo["metricas"]["contadores"].items())))
+    return resumo
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Análise de papéis sociais em lote (sem interface gráfica).")
+    entrada = parser.add_mutually_exclusive_group(required=True)
+    entrada.add_argument("--diretorio", help="Diretório com as imagens (percorrido recursivamente).")
+    entrada.add_argument("--manifesto", help="Arquivo de texto com um caminho de imagem por linha.")
+    parser.add_argument("--saida", default="resultados.jsonl",
+                        help="Arquivo de saída (diretório, no formato colunar).")
+    parser.add_argument("--formato", choices=FORMATOS, default="jsonl",
+                        help="jsonl (padrão), jsonl-compacto (keypoints em arrays), colunar (binário, "
+                             "lido com saidas.abrir_colunar), parquet (requer pyarrow) ou json.")
+    parser.add_argument("--workers", type=int, default=None, help="Número de processos (padrão: núcleos da CPU).")
+    parser.add_argument("--threads-por-worker", type=int, default=1)
+    parser.add_argument("--tentativas", type=int, default=2)
+    parser.add_argument("--preset", choices=PRESETS_IMAGEM, default=None,
+                        help="Ponto de operação (configuracao.PRESETS_IMAGEM); as demais opções o alteram.")
+    parser.add_argument("--encodings", action="store_true",
+                        help="Calcula o embedding facial de 128 dimensões de cada pessoa.")
+    parser.add_argument("--threads-por-pessoa", type=int, default=None,
+                        help="Threads para processar as pessoas de uma imagem em paralelo (faces e Face Mesh).")
+    parser.add_argument("--cache", default=None,
+                        help="Diretório do cache de resultados (reaproveita imagens já analisadas).")
+    parser.add_argument("--backend-pose", choices=BACKENDS_POSE, default=None,
+                        help="Runtime do YOLO: pytorch, onnx (ONNX Runtime) ou openvino.")
+    parser.add_argument("--modelo-pose", default=None, help="Modelo do YOLO (padrão: o do backend).")
+    parser.add_argument("--threads-pose", type=int, default=None, help="Threads de inferência do YOLO (0 = padrão do runtime).")
+    args = parser.parse_args()
+
+    configurar_logging()
+    caminhos = listar_imagens(args.diretorio) if args.diretorio else ler_manifesto(args.manifesto)
+    print(f"{len(caminhos)} imagem(ns) encontrada(s).")
+    analisar_em_lote(caminhos, args.saida, num_workers=args.workers,
+                     threads_por_worker=args.threads_por_worker, tentativas=args.tentativas,
+                     config=configuracao_preset(args.preset, calcular_encoding_facial=args.encodings or None,
+                                                threads_por_pessoa=args.threads_por_pessoa,
+                                                backend_pose=args.backend_pose, modelo_pose=args.modelo_pose,
+                                                threads_pose=args.threads_pose),
+                     diretorio_cache=args.cache, formato=args.formato)
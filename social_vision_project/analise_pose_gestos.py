@@ -1,80 +1,100 @@
 
-import cv2
-import mediapipe as mp
 import json
+import logging
 import numpy as np
 
-# Inicializa o MediaPipe Pose
-mp_pose = mp.solutions.pose
-pose = mp_pose.Pose(static_image_mode=True, min_detection_confidence=0.5)
+from deteccao import DeteccoesPose
+from configuracao import CONFIGURACAO_PADRAO
+from serializacao import converter_para_json, preparar_para_json
 
-def analisar_gesticulacao(deteccoes_pessoas):
+logger = logging.getLogger(__name__)
+
+# Índices dos keypoints do MediaPipe Pose (via YOLOv8-Pose)
+# Ombros
+OMBRO_ESQ, OMBRO_DIR = 5, 6
+# Pulsos
+PULSO_ESQ, PULSO_DIR = 9, 10
+# Quadris
+QUADRIL_ESQ, QUADRIL_DIR = 11, 12
+
+def analisar_gesticulacao(deteccoes_pessoas, config=None):
     """
     Analisa se há gesticulação ativa com base na posição das mãos em relação ao corpo.
 
     Args:
         deteccoes_pessoas (list): Lista de detecções de pessoas com keypoints.
+        config (ConfiguracaoPipeline, opcional): Opções da etapa (limiar de confiança dos keypoints).
 
     Returns:
         list: A lista de detecções atualizada com a feature de gesticulação.
     """
-    for pessoa in deteccoes_pessoas:
-        if 'keypoints' not in pessoa or not pessoa['keypoints']:
-            pessoa['gesticulando'] = False
-            continue
-
-        keypoints = {kp['point_id']: kp for kp in pessoa['keypoints']}
-
-        # Índices dos keypoints do MediaPipe Pose (via YOLOv8-Pose)
-        # Ombros
-        ombro_esq_id, ombro_dir_id = 5, 6
-        # Pulsos
-        pulso_esq_id, pulso_dir_id = 9, 10
-        # Quadris
-        quadril_esq_id, quadril_dir_id = 11, 12
-
-        gesticulando = False
-        try:
-            # Pega as coordenadas Y dos ombros, pulsos e quadris
-            y_ombro_esq = keypoints[ombro_esq_id]['y']
-            y_ombro_dir = keypoints[ombro_dir_id]['y']
-            y_pulso_esq = keypoints[pulso_esq_id]['y']
-            y_pulso_dir = keypoints[pulso_dir_id]['y']
-            y_quadril_esq = keypoints[quadril_esq_id]['y']
-            y_quadril_dir = keypoints[quadril_dir_id]['y']
-
-            # Calcula a linha média do tronco (entre ombros e quadris)
-            linha_media_ombros = (y_ombro_esq + y_ombro_dir) / 2
-            linha_media_quadris = (y_quadril_esq + y_quadril_dir) / 2
-
-            # Heurística: se qualquer um dos pulsos estiver acima da linha dos ombros
-            # ou significativamente acima da linha do quadril, consideramos gesticulação.
-            # Isso indica que as mãos estão levantadas, e não em repouso.
-            if (y_pulso_esq < linha_media_ombros or y_pulso_dir < linha_media_ombros or 
-                y_pulso_esq < (linha_media_quadris - (linha_media_quadris - linha_media_ombros) * 0.2)):
-                gesticulando = True
-
-        except KeyError:
-            # Caso algum keypoint essencial não seja detectado
-            gesticulando = False
-
-        pessoa['gesticulando'] = gesticulando
+    config = config or CONFIGURACAO_PADRAO
+    if not deteccoes_pessoas:
+        return deteccoes_pessoas
+
+    # Todas as pessoas de uma vez: (n, 17, 2), sem cópia quando os keypoints vêm do detector
+    deteccoes = DeteccoesPose.de_pessoas(deteccoes_pessoas)
+    gesticulando = calcular_mascara_gesticulacao(deteccoes.keypoints, deteccoes.confiancas_keypoints,
+                                                 config.limiar_confianca_keypoints)
+
+    for pessoa, valor in zip(deteccoes_pessoas, gesticulando.tolist()):
+        pessoa['gesticulando'] = valor
 
     return deteccoes_pessoas
 
+def calcular_mascara_gesticulacao(keypoints, confiancas=None, limiar_confianca=0.5):
+    """
+    Calcula, de forma vetorizada, quem está gesticulando.
+
+    Args:
+        keypoints (np.ndarray): (..., 17, 2) keypoints, ex.: (pessoas, 17, 2) ou
+            (quadros, pessoas, 17, 2).
+        confiancas (np.ndarray, opcional): (..., 17) confiança de cada keypoint. Keypoints
+            com confiança abaixo do limiar (ou NaN, ausentes) não são considerados.
+        limiar_confianca (float): Confiança mínima de um keypoint.
+
+    Returns:
+        np.ndarray: Máscara booleana (...) indicando gesticulação.
+    """
+    keypoints = np.asarray(keypoints)
+    # Pega as coordenadas Y dos ombros, pulsos e quadris
+    y = keypoints[..., 1].astype(np.float64)
+    if confiancas is None:
+        visivel = np.ones(y.shape, dtype=bool)
+    else:
+        # Comparações com NaN resultam em False: keypoints ausentes ficam invisíveis
+        visivel = np.asarray(confiancas) >= limiar_confianca
+
+    # Calcula a linha média do tronco (entre ombros e quadris)
+    linha_media_ombros = (y[..., OMBRO_ESQ] + y[..., OMBRO_DIR]) / 2
+    linha_media_quadris = (y[..., QUADRIL_ESQ] + y[..., QUADRIL_DIR]) / 2
+    ombros_visiveis = visivel[..., OMBRO_ESQ] & visivel[..., OMBRO_DIR]
+    quadris_visiveis = visivel[..., QUADRIL_ESQ] & visivel[..., QUADRIL_DIR]
+
+    # Heurística: se qualquer um dos pulsos estiver acima da linha dos ombros
+    # ou significativamente acima da linha do quadril, consideramos gesticulação.
+    # Isso indica que as mãos estão levantadas, e não em repouso.
+    # Cada condição só vale se todos os keypoints que ela usa estiverem visíveis.
+    pulso_esq_acima_ombros = (y[..., PULSO_ESQ] < linha_media_ombros) & visivel[..., PULSO_ESQ] & ombros_visiveis
+    pulso_dir_acima_ombros = (y[..., PULSO_DIR] < linha_media_ombros) & visivel[..., PULSO_DIR] & ombros_visiveis
+    pulso_esq_acima_quadris = ((y[..., PULSO_ESQ] < linha_media_quadris - (linha_media_quadris - linha_media_ombros) * 0.2)
+                               & visivel[..., PULSO_ESQ] & ombros_visiveis & quadris_visiveis)
+
+    return pulso_esq_acima_ombros | pulso_dir_acima_ombros | pulso_esq_acima_quadris
+
 def carregar_dados_json(json_path):
     """Carrega dados de um arquivo JSON."""
     try:
         with open(json_path, 'r') as f:
             return json.load(f)
     except FileNotFoundError:
-        print(f"Arquivo JSON não encontrado: {json_path}")
+        logger.error("Arquivo JSON não encontrado: %s", json_path)
         return []
 
 def salvar_resultado_json(data, output_path):
     """Salva os dados em um arquivo JSON."""
     with open(output_path, 'w') as f:
-        json.dump(data, f, indent=4)
+        json.dump(preparar_para_json(data), f, indent=4, default=converter_para_json)
 
 if __name__ == '__main__':
     # Este script usa os keypoints do primeiro detector
@@ -0,0 +1,371 @@
+
+import argparse
+import logging
+import queue
+import threading
+import time
+
+import cv2
+
+from quadro import Quadro
+from detector_pessoas_pose import detectar_pessoas_e_poses_quadro
+from detector_faces import detectar_faces_quadro
+from expressao_boca_face_mesh import analisar_expressoes_faciais_quadro
+from analise_pose_gestos import analisar_gesticulacao
+from direcao_olhar import analisar_direcao_olhar
+from classificador_social import classificar_papeis_sociais
+from configuracao import CONFIGURACAO_PADRAO, PRESETS, configuracao_preset
+from inferencia_pose import BACKENDS_POSE
+from rastreador import RastreadorPessoas
+from deteccao_fala import DetectorFala
+from escalonador import EscalonadorEtapas
+from app_teste import desenhar_resultados
+from saidas import FORMATOS, criar_saida
+from instrumentacao import METRICAS, configurar_logging
+
+logger = logging.getLogger(__name__)
+
+# Marca o fim do fluxo entre as etapas
+_FIM = object()
+
+class EstatisticasFluxo:
+    """Contadores do fluxo de vídeo, atualizados pelas threads das etapas."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.quadros_lidos = 0
+        self.quadros_processados = 0
+        self.descartados = {}
+        # EscalonadorEtapas do fluxo, com a taxa efetiva de cada etapa
+        self.escalonador = None
+        # Primeira exceção de uma etapa; processar_video a relança no consumidor
+        self.erro = None
+        self.inicio = time.perf_counter()
+
+    def registrar_descarte(self, etapa):
+        with self._lock:
+            self.descartados[etapa] = self.descartados.get(etapa, 0) + 1
+
+    def registrar_erro(self, etapa, erro):
+        with self._lock:
+            if self.erro is None:
+                self.erro = erro
+        logger.error("Falha na etapa '%s' do fluxo de vídeo: %r", etapa, erro)
+
+    def fps(self):
+        """FPS efetivo (quadros que chegaram ao fim do pipeline)."""
+        decorrido = time.perf_counter() - self.inicio
+        return self.quadros_processados / decorrido if decorrido > 0 else 0.0
+
+def _colocar(fila, item, descartar, parar, estatisticas, etapa):
+    """
+    Coloca um item na fila limitada. Se a fila estiver cheia e o descarte
+    estiver ativo, remove o quadro mais antigo (a etapa seguinte está atrasada);
+    caso contrário, bloqueia até haver espaço (backpressure).
+    """
+    descartar = descartar and item is not _FIM
+    while not parar.is_set():
+        try:
+            if descartar:
+                fila.put_nowait(item)
+            else:
+                fila.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            if descartar:
+                try:
+                    fila.get_nowait()
+                    estatisticas.registrar_descarte(etapa)
+                except queue.Empty:
+                    pass
+
+def _ler_quadros(captura, saida, descartar, parar, estatisticas):
+    """Thread produtora: decodifica os quadros da fonte de vídeo."""
+    indice = 0
+    while not parar.is_set():
+        ok, frame = captura.read()
+        if not ok:
+            break
+        estatisticas.quadros_lidos += 1
+        item = {"indice": indice, "timestamp": time.time(), "quadro": Quadro(frame)}
+        _colocar(saida, item, descartar, parar, estatisticas, "captura")
+        indice += 1
+    _colocar(saida, _FIM, False, parar, estatisticas, "captura")
+
+def _executar_etapa(nome, funcao, entrada, saida, descartar, parar, estatisticas):
+    """
+    Thread consumidora/produtora genérica: aplica `funcao` a cada item da fila e
+    registra o tempo de cada aplicação na série "fluxo_<nome>" de METRICAS.
+    """
+    while not parar.is_set():
+        try:
+            item = entrada.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        if item is _FIM:
+            break
+        try:
+            with METRICAS.cronometrar(f"fluxo_{nome}"):
+                funcao(item)
+        except Exception as e:
+            # Sem isso, as etapas anteriores ficariam bloqueadas na fila desta e o
+            # consumidor esperaria para sempre: para o fluxo inteiro e repassa o erro
+            estatisticas.registrar_erro(nome, e)
+            parar.set()
+            _sinalizar_fim(saida)
+            return
+        _colocar(saida, item, descartar, parar, estatisticas, nome)
+    _colocar(saida, _FIM, False, parar, estatisticas, nome)
+
+def _sinalizar_fim(fila):
+    """Coloca o fim do fluxo na fila sem bloquear, descartando o item mais antigo se preciso."""
+    while True:
+        try:
+            fila.put_nowait(_FIM)
+            return
+        except queue.Full:
+            try:
+                fila.get_nowait()
+            except queue.Empty:
+                pass
+
+# Resultados por pessoa mais antigos que isto (em quadros) são descartados do escalonador
+_IDADE_MAXIMA_CACHE = 300
+
+def _miniatura(quadro):
+    """Versão pequena em tons de cinza do quadro, para o gatilho de movimento do YOLO."""
+    return cv2.resize(cv2.cvtColor(quadro.bgr, cv2.COLOR_BGR2GRAY), (64, 36), interpolation=cv2.INTER_AREA)
+
+def _etapa_pose(item, rastreador, escalonador, config, estado):
+    """
+    YOLO na cadência `config.cadencia_pose` (ou antes, se o quadro mudar mais que
+    `config.limiar_movimento_quadro`). Nos quadros intermediários, as detecções do
+    último quadro analisado são deslocadas pela velocidade de cada trilha.
+    """
+    indice = item["indice"]
+    miniatura = _miniatura(item["quadro"]) if config.limiar_movimento_quadro > 0 else None
+    forcar = (miniatura is not None and estado.get("miniatura") is not None and
+              cv2.absdiff(miniatura, estado["miniatura"]).mean() / 255 > config.limiar_movimento_quadro)
+
+    if escalonador.deve_executar("pose", indice, forcar=forcar):
+        deteccoes = detectar_pessoas_e_poses_quadro(item["quadro"], config) or []
+        if rastreador is not None:
+            # IDs persistentes entre quadros, no lugar do índice da detecção
+            deteccoes = rastreador.atualizar(deteccoes, indice - estado.get("indice", indice - 1))
+        # Cópias próprias desta thread: as etapas seguintes acrescentam chaves às detecções
+        estado.update(deteccoes=[dict(p) for p in deteccoes], indice=indice, miniatura=miniatura)
+    elif rastreador is not None:
+        deteccoes = rastreador.interpolar(estado["deteccoes"], indice - estado["indice"])
+    else:
+        deteccoes = [dict(p, interpolada=True) for p in estado["deteccoes"]]
+    item["deteccoes"] = deteccoes
+
+def _etapa_faces(item, config, escalonador):
+    """
+    Faces e expressões por pessoa, cada uma na sua cadência por trilha. Uma trilha que
+    mudou de bbox mais que `config.limiar_movimento_reuso` é recalculada antes da hora.
+    """
+    deteccoes = item["deteccoes"]
+    if not deteccoes:
+        return
+    indice = item["indice"]
+
+    pendentes = []
+    for pessoa in deteccoes:
+        if escalonador.deve_executar("faces", indice, pessoa['id'], pessoa['bbox']):
+            pendentes.append(pessoa)
+        else:
+            _reaproveitar_face(pessoa, *escalonador.obter("faces", pessoa['id']))
+    if pendentes:
+        detectar_faces_quadro(item["quadro"], pendentes, config)
+        for pessoa in pendentes:
+            escalonador.guardar("faces", pessoa['id'], pessoa.get('face_info'))
+
+    pendentes = []
+    for pessoa in deteccoes:
+        if escalonador.deve_executar("expressoes", indice, pessoa['id'], pessoa['bbox']):
+            pendentes.append(pessoa)
+        else:
+            _, expressoes = escalonador.obter("expressoes", pessoa['id'])
+            pessoa['expressoes'] = dict(expressoes) if expressoes is not None else None
+            # Não é uma nova medição da boca: deteccao_fala mantém a probabilidade anterior
+            pessoa['expressoes_reaproveitadas'] = True
+    if pendentes:
+        analisar_expressoes_faciais_quadro(item["quadro"], pendentes, config)
+        for pessoa in pendentes:
+            escalonador.guardar("expressoes", pessoa['id'], pessoa.get('expressoes'))
+
+    for etapa in ("faces", "expressoes"):
+        escalonador.descartar_antigos(etapa, indice, _IDADE_MAXIMA_CACHE)
+
+def _reaproveitar_face(pessoa, bbox_anterior, face_info):
+    """Reaproveita a face da última execução, deslocada junto com a bbox da pessoa."""
+    if face_info:
+        dx = pessoa['bbox'][0] - bbox_anterior[0]
+        dy = pessoa['bbox'][1] - bbox_anterior[1]
+        x1, y1, x2, y2 = face_info['face_bbox']
+        face_info = dict(face_info, face_bbox=[x1 + dx, y1 + dy, x2 + dx, y2 + dy])
+    pessoa['face_info'] = face_info
+
+def _etapa_classificacao(item, desenhar, config, detector_fala):
+    deteccoes = item["deteccoes"]
+    if deteccoes:
+        if detector_fala is not None:
+            # Fala pela oscilação da boca ao longo dos quadros de cada trilha
+            deteccoes = detector_fala.atualizar(deteccoes)
+        deteccoes = analisar_gesticulacao(deteccoes, config)
+        deteccoes = analisar_direcao_olhar(deteccoes)
+        deteccoes = classificar_papeis_sociais(deteccoes)
+    item["deteccoes"] = deteccoes
+    if desenhar:
+        item["imagem"] = desenhar_resultados(item["quadro"].bgr.copy(), deteccoes or [])
+
+def processar_video(fonte=0, tamanho_fila=2, descartar_quadros=None, desenhar=True, estatisticas=None,
+                    config=None, rastrear=True):
+    """
+    Processa um vídeo ou webcam com as 6 etapas em um pipeline produtor/consumidor.
+
+    Captura, YOLO, faces + Face Mesh e classificação + desenho rodam em threads
+    separadas, ligadas por filas limitadas. Quando uma etapa fica para trás, a
+    fila anterior enche: a etapa produtora é bloqueada (backpressure) ou, se
+    `descartar_quadros` estiver ativo, o quadro mais antigo é descartado. Assim
+    a memória fica limitada independentemente da velocidade de cada etapa.
+
+    Com `rastrear`, cada pessoa recebe um ID persistente entre quadros (RastreadorPessoas),
+    de modo que 'olhando_para_id' e 'papel_social' se referem à mesma pessoa ao longo do
+    vídeo, e 'falando' é decidido pela oscilação da abertura da boca de cada trilha
+    (DetectorFala), e não por um único quadro.
+
+    As etapas caras rodam na cadência definida em `config` (EscalonadorEtapas): o YOLO a
+    cada `cadencia_pose` quadros, com as posições interpoladas pelo rastreador entre uma
+    execução e outra; faces e Face Mesh por trilha, a cada `cadencia_faces` e
+    `cadencia_expressoes` quadros ou quando a bbox da pessoa muda mais que
+    `limiar_movimento_reuso`, reaproveitando o último resultado nos quadros intermediários.
+    Sem `rastrear`, faces e expressões rodam em todo quadro. `estatisticas.escalonador`
+    relata a taxa efetiva de cada etapa.
+
+    Args:
+        fonte (int | str): Índice da webcam ou caminho/URL do vídeo (cv2.VideoCapture).
+        tamanho_fila (int): Capacidade máxima de cada fila entre as etapas.
+        descartar_quadros (bool, opcional): Descarta quadros atrasados. Por padrão,
+            ativo para webcams (fonte inteira) e inativo para arquivos.
+        desenhar (bool): Se True, inclui a imagem anotada em cada resultado.
+        estatisticas (EstatisticasFluxo, opcional): Objeto que recebe os contadores.
+        config (ConfiguracaoPipeline, opcional): Opções das etapas.
+        rastrear (bool): Associa as detecções de quadros consecutivos em trilhas.
+
+    Yields:
+        dict: {"indice", "timestamp", "quadro", "deteccoes", "imagem"} para cada quadro processado.
+
+    Raises:
+        Exception: A exceção da etapa que falhou; o fluxo inteiro é encerrado.
+    """
+    if descartar_quadros is None:
+        descartar_quadros = isinstance(fonte, int)
+    if estatisticas is None:
+        estatisticas = EstatisticasFluxo()
+
+    captura = cv2.VideoCapture(fonte)
+    if not captura.isOpened():
+        logger.error("Não foi possível abrir a fonte de vídeo %s", fonte)
+        return
+
+    config = config or CONFIGURACAO_PADRAO
+    rastreador = RastreadorPessoas() if rastrear else None
+    detector_fala = DetectorFala(config.janela_fala) if rastrear else None
+    # Sem trilhas, os IDs mudam a cada quadro e resultados por pessoa não podem ser reaproveitados
+    cadencias = {"pose": config.cadencia_pose, "faces": config.cadencia_faces if rastrear else 1,
+                 "expressoes": config.cadencia_expressoes if rastrear else 1}
+    escalonador = EscalonadorEtapas(cadencias, config.limiar_movimento_reuso)
+    estatisticas.escalonador = escalonador
+    estado_pose = {}
+    parar = threading.Event()
+    filas = [queue.Queue(maxsize=tamanho_fila) for _ in range(4)]
+    threads = [
+        threading.Thread(target=_ler_quadros, args=(captura, filas[0], descartar_quadros, parar, estatisticas)),
+        threading.Thread(target=_executar_etapa, args=("pose", lambda item: _etapa_pose(item, rastreador, escalonador, config, estado_pose), filas[0], filas[1], descartar_quadros, parar, estatisticas)),
+        threading.Thread(target=_executar_etapa, args=("faces", lambda item: _etapa_faces(item, config, escalonador), filas[1], filas[2], descartar_quadros, parar, estatisticas)),
+        threading.Thread(target=_executar_etapa, args=("classificacao", lambda item: _etapa_classificacao(item, desenhar, config, detector_fala),
+                                                       filas[2], filas[3], descartar_quadros, parar, estatisticas)),
+    ]
+    for t in threads:
+        t.daemon = True
+        t.start()
+
+    try:
+        while True:
+            try:
+                item = filas[3].get(timeout=0.1)
+            except queue.Empty:
+                item = None
+            if estatisticas.erro is not None:
+                raise estatisticas.erro
+            if item is None:
+                if not any(t.is_alive() for t in threads):
+                    break
+                continue
+            if item is _FIM:
+                break
+            estatisticas.quadros_processados += 1
+            item.setdefault("imagem", None)
+            yield item
+    finally:
+        # Encerra as threads mesmo se o consumidor parar de iterar no meio do vídeo
+        parar.set()
+        for t in threads:
+            t.join(timeout=1.0)
+        captura.release()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Análise de papéis sociais em vídeo ou webcam.")
+    parser.add_argument("fonte", nargs="?", default="0", help="Índice da webcam (ex.: 0) ou caminho do vídeo.")
+    parser.add_argument("--tamanho-fila", type=int, default=2)
+    parser.add_argument("--sem-rastreamento", action="store_true", help="IDs por quadro, sem associar pessoas entre quadros.")
+    parser.add_argument("--preset", choices=PRESETS, default=None,
+                        help="Ponto de operação (configuracao.PRESETS); as demais opções o alteram.")
+    parser.add_argument("--cadencia-pose", type=int, default=None,
+                        help=f"Executa o YOLO a cada N quadros (padrão: {CONFIGURACAO_PADRAO.cadencia_pose}, ou o do preset).")
+    parser.add_argument("--cadencia-faces", type=int, default=None,
+                        help=f"Localiza a face de cada pessoa a cada N quadros (padrão: {CONFIGURACAO_PADRAO.cadencia_faces}).")
+    parser.add_argument("--cadencia-expressoes", type=int, default=None,
+                        help=f"Executa o Face Mesh de cada pessoa a cada N quadros (padrão: {CONFIGURACAO_PADRAO.cadencia_expressoes}).")
+    parser.add_argument("--saida", default=None,
+                        help="Grava as detecções de cada quadro (arquivo, ou diretório no formato colunar).")
+    parser.add_argument("--formato", choices=FORMATOS, default=None,
+                        help="Formato da saída (padrão: deduzido da extensão de --saida; sem extensão, colunar).")
+    parser.add_argument("--backend-pose", choices=BACKENDS_POSE, default=None,
+                        help="Runtime do YOLO: pytorch, onnx (ONNX Runtime) ou openvino.")
+    parser.add_argument("--modelo-pose", default=None, help="Modelo do YOLO (padrão: o do backend).")
+    parser.add_argument("--threads-pose", type=int, default=None, help="Threads de inferência do YOLO (0 = padrão do runtime).")
+    args = parser.parse_args()
+
+    configurar_logging()
+    fonte = int(args.fonte) if args.fonte.isdigit() else args.fonte
+    estatisticas = EstatisticasFluxo()
+    config = configuracao_preset(args.preset, cadencia_pose=args.cadencia_pose, cadencia_faces=args.cadencia_faces,
+                                 cadencia_expressoes=args.cadencia_expressoes, backend_pose=args.backend_pose,
+                                 modelo_pose=args.modelo_pose, threads_pose=args.threads_pose)
+
+    saida = criar_saida(args.saida, args.formato) if args.saida else None
+    try:
+        for resultado in processar_video(fonte, tamanho_fila=args.tamanho_fila, estatisticas=estatisticas,
+                                         config=config, rastrear=not args.sem_rastreamento):
+            if saida is not None:
+                saida.escrever(resultado["deteccoes"] or [], indice=resultado["indice"],
+                               timestamp=resultado["timestamp"])
+            img = resultado["imagem"]
+            cv2.putText(img, f"{estatisticas.fps():.1f} FPS", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+            cv2.imshow('Classificacao de Papeis Sociais', img)
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+    finally:
+        if saida is not None:
+            saida.fechar()
+    cv2.destroyAllWindows()
+
+    print(f"Quadros lidos: {estatisticas.quadros_lidos}, processados: {estatisticas.quadros_processados}")
+    print(f"Quadros descartados por etapa: {estatisticas.descartados}")
+    for etapa, taxa in (estatisticas.escalonador.relatorio() if estatisticas.escalonador else {}).items():
+        print(f"Etapa '{etapa}': executada em {taxa['execucoes']}/{taxa['oportunidades']} "
+              f"({taxa['fracao']:.0%}), {taxa['por_segundo']:.1f}/s")
+    print(METRICAS.relatorio())
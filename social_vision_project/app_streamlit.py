@@ -1,18 +1,19 @@
 
 import streamlit as st
-import cv2
+import json
 import os
 from PIL import Image
-import numpy as np
 
 
-from detector_pessoas_pose import detectar_pessoas_e_poses
-from detector_faces import detectar_faces
-from expressao_boca_face_mesh import analisar_expressoes_faciais
-from analise_pose_gestos import analisar_gesticulacao
-from direcao_olhar import analisar_direcao_olhar
-from classificador_social import classificar_papeis_sociais
+from quadro import Quadro
+from pipeline import analisar_imagem
+from configuracao import PRESETS_IMAGEM, configuracao_preset
+from cache_resultados import CacheResultados
+from serializacao import converter_para_json, preparar_para_json
 from app_teste import desenhar_resultados 
+from instrumentacao import METRICAS, configurar_logging
+
+configurar_logging()
 
 st.set_page_config(
     page_title="Analisador de Interação Social",
@@ -22,23 +23,38 @@ st.set_page_config(
 )
 
 # --- Funções Auxiliares ---
-def run_pipeline(image_path):
+@st.cache_resource
+def obter_cache():
+    """
+    Cache de resultados do servidor, compartilhado entre sessões: reabrir uma imagem já
+    analisada não executa os modelos de novo. SOCIAL_VISION_CACHE_DIR ativa o nível em disco.
+    """
+    # Até 6 entradas (uma por etapa) por imagem
+    return CacheResultados(capacidade=6 * 32, diretorio=os.environ.get("SOCIAL_VISION_CACHE_DIR"))
+
+def obter_quadro_da_sessao(uploaded_file):
+    """
+    Decodifica o upload em memória, sem passar pelo disco, uma única vez por arquivo.
+
+    O quadro fica em `st.session_state`, que é isolado por sessão: usuários
+    simultâneos não compartilham arquivos temporários, e as reexecuções da
+    página (a cada interação) reaproveitam o quadro já decodificado.
+    """
+    if st.session_state.get("upload_id") != uploaded_file.file_id:
+        st.session_state["upload_id"] = uploaded_file.file_id
+        st.session_state["quadro"] = Quadro.de_bytes(uploaded_file.getvalue(), origem=uploaded_file.name)
+    return st.session_state["quadro"]
+
+def run_pipeline(quadro, config=None):
     """Executa o pipeline completo e retorna os resultados e a imagem final."""
-    # Etapa 1: Detecção de Pessoas e Pose
-    deteccoes_pose = detectar_pessoas_e_poses(image_path)
-    if not deteccoes_pose:
+    # O quadro em memória é compartilhado por todas as etapas;
+    # etapas já calculadas para esta imagem (com a mesma configuração) vêm do cache
+    resultado_final, quadro = analisar_imagem(quadro, config, cache=obter_cache())
+    if not resultado_final:
         return None, None # Retorna None se ninguém for detectado
 
-    # Etapas subsequentes
-    deteccoes_face = detectar_faces(image_path, deteccoes_pose)
-    deteccoes_expressoes = analisar_expressoes_faciais(image_path, deteccoes_face)
-    deteccoes_gestos = analisar_gesticulacao(deteccoes_expressoes)
-    deteccoes_olhar = analisar_direcao_olhar(deteccoes_gestos)
-    resultado_final = classificar_papeis_sociais(deteccoes_olhar)
-
-    # Desenha o resultado na imagem
-    img = cv2.imread(image_path)
-    img_resultado = desenhar_resultados(img, resultado_final)
+    # Desenha o resultado sobre uma cópia do quadro já decodificado
+    img_resultado = desenhar_resultados(quadro.bgr.copy(), resultado_final)
     
     return resultado_final, img_resultado
 
@@ -65,22 +81,32 @@ uploaded_file = st.sidebar.file_uploader(
     type=['jpg', 'jpeg', 'png']
 )
 
+# O preset "tempo_real" rastreia faces entre quadros e é voltado a vídeo
+preset = st.sidebar.selectbox("Preset de análise", ["padrão"] + list(PRESETS_IMAGEM),
+                              help="equilibrado: faces pelos keypoints; preciso: YOLO maior e detector CNN de faces.")
+config = configuracao_preset(None if preset == "padrão" else preset)
+
 st.sidebar.markdown("--- ")
 st.sidebar.info("Projeto desenvolvido para demonstrar um pipeline de análise de comportamento social.")
 
+estatisticas_cache = obter_cache().estatisticas()
+st.sidebar.caption(f"Cache de resultados: {estatisticas_cache['acertos_memoria'] + estatisticas_cache['acertos_disco']} "
+                   f"acerto(s), {estatisticas_cache['falhas']} falha(s)")
+# Tempos acumulados de todas as análises deste servidor
+with st.sidebar.expander("⏱️ Tempo por etapa"):
+    st.text(METRICAS.relatorio())
+
 # --- Lógica Principal da Aplicação ---
 if uploaded_file is not None:
     
-    file_bytes = np.asarray(bytearray(uploaded_file.read()), dtype=np.uint8)
-    opencv_image = cv2.imdecode(file_bytes, 1)
-    
-    temp_dir = "."
-    temp_image_path = os.path.join(temp_dir, "temp_uploaded_image.jpg")
-    cv2.imwrite(temp_image_path, opencv_image)
+    quadro = obter_quadro_da_sessao(uploaded_file)
+    if quadro is None:
+        st.error("❌ Não foi possível ler a imagem enviada.")
+        st.stop()
 
     # Exibe a imagem original
     st.header("🖼️ Imagem Original")
-    st.image(opencv_image, channels="BGR", caption="Imagem enviada pelo usuário.", use_column_width=True)
+    st.image(quadro.bgr, channels="BGR", caption="Imagem enviada pelo usuário.", use_column_width=True)
 
     st.markdown("--- ")
 
@@ -88,7 +114,7 @@ if uploaded_file is not None:
     if st.button("🚀 Iniciar Análise Agora", use_container_width=True):
         # Executa o pipeline
         with st.spinner('🧠 Analisando a imagem... Isso pode levar alguns segundos... '):
-            resultados_json, imagem_processada = run_pipeline(temp_image_path)
+            resultados_json, imagem_processada = run_pipeline(quadro, config)
 
         if resultados_json is None:
             st.warning("⚠️ Nenhuma pessoa foi detectada na imagem. Tente outra imagem.")
@@ -148,7 +174,7 @@ if uploaded_file is not None:
 
                 # Expander para mostrar os dados JSON
                 with st.expander("📄 Ver detalhes técnicos (JSON)"):
-                    st.json(resultados_json)
+                    st.json(json.dumps(preparar_para_json(resultados_json), default=converter_para_json))
 
 else:
     st.info("Aguardando o upload de uma imagem para iniciar a análise.")
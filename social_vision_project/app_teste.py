@@ -1,14 +1,17 @@
+import contextlib
 import cv2
 import os
-import json
 
 # Importa as funções dos outros scripts
-from detector_pessoas_pose import detectar_pessoas_e_poses
-from detector_faces import detectar_faces
-from expressao_boca_face_mesh import analisar_expressoes_faciais
+from quadro import Quadro
+from detector_pessoas_pose import detectar_pessoas_e_poses_quadro
+from detector_faces import detectar_faces_quadro
+from expressao_boca_face_mesh import analisar_expressoes_faciais_quadro
 from analise_pose_gestos import analisar_gesticulacao
 from direcao_olhar import analisar_direcao_olhar
 from classificador_social import classificar_papeis_sociais
+from saidas import criar_saida
+from instrumentacao import METRICAS, configurar_logging, perfilar
 
 def desenhar_resultados(image, resultados):
     """
@@ -30,60 +33,83 @@ def desenhar_resultados(image, resultados):
 
     return image
 
-def main(image_path):
+def main(image_path, config=None, perfil=None):
     """
     Executa o pipeline completo de análise de papéis sociais.
+
+    Args:
+        image_path (str): Caminho da imagem.
+        config (ConfiguracaoPipeline, opcional): Opções das etapas.
+        perfil (str, opcional): Arquivo .prof em que gravar o perfil (cProfile) das 6 etapas.
     """
     if not os.path.exists(image_path):
         print(f"Erro: A imagem de entrada não foi encontrada em {image_path}")
         return
 
-    print("--- Iniciando Pipeline de Análise de Papel Social ---")
-
-    # Etapa 1: Detecção de Pessoas e Pose
-    print("\n[ETAPA 1/6] Detectando pessoas e poses...")
-    deteccoes_pose = detectar_pessoas_e_poses(image_path)
-    if not deteccoes_pose:
-        print("Nenhuma pessoa detectada. Encerrando.")
+    # Decodifica a imagem uma única vez; todas as etapas compartilham o mesmo quadro
+    quadro = Quadro.de_arquivo(image_path)
+    if quadro is None:
+        print(f"Erro: Não foi possível ler a imagem em {image_path}")
         return
-    print(f"{len(deteccoes_pose)} pessoa(s) detectada(s).")
-
-    # Etapa 2: Detecção de Faces
-    print("\n[ETAPA 2/6] Detectando faces...")
-    deteccoes_face = detectar_faces(image_path, deteccoes_pose)
-    print("Detecção de faces concluída.")
-
-    # Etapa 3: Análise de Expressões Faciais (Boca Aberta)
-    print("\n[ETAPA 3/6] Analisando expressões faciais...")
-    deteccoes_expressoes = analisar_expressoes_faciais(image_path, deteccoes_face)
-    print("Análise de expressões concluída.")
-
-    # Etapa 4: Análise de Gestos
-    print("\n[ETAPA 4/6] Analisando gestos...")
-    deteccoes_gestos = analisar_gesticulacao(deteccoes_expressoes)
-    print("Análise de gestos concluída.")
-
-    # Etapa 5: Análise da Direção do Olhar
-    print("\n[ETAPA 5/6] Analisando direção do olhar...")
-    deteccoes_olhar = analisar_direcao_olhar(deteccoes_gestos)
-    print("Análise do olhar concluída.")
 
-    # Etapa 6: Classificação do Papel Social
-    print("\n[ETAPA 6/6] Classificando papéis sociais...")
-    resultado_final = classificar_papeis_sociais(deteccoes_olhar)
-    print("Classificação concluída.")
+    # Com `perfil`, as 6 etapas rodam sob o cProfile (e o tracemalloc)
+    with perfilar(perfil, memoria=True) if perfil else contextlib.nullcontext():
+        print("--- Iniciando Pipeline de Análise de Papel Social ---")
+
+        # Etapa 1: Detecção de Pessoas e Pose
+        print("\n[ETAPA 1/6] Detectando pessoas e poses...")
+        with METRICAS.cronometrar("pose"):
+            deteccoes_pose = detectar_pessoas_e_poses_quadro(quadro, config)
+        if not deteccoes_pose:
+            print("Nenhuma pessoa detectada. Encerrando.")
+            return
+        print(f"{len(deteccoes_pose)} pessoa(s) detectada(s).")
+
+        # Etapa 2: Detecção de Faces
+        print("\n[ETAPA 2/6] Detectando faces...")
+        with METRICAS.cronometrar("faces"):
+            deteccoes_face = detectar_faces_quadro(quadro, deteccoes_pose, config)
+        print("Detecção de faces concluída.")
+
+        # Etapa 3: Análise de Expressões Faciais (Boca Aberta)
+        print("\n[ETAPA 3/6] Analisando expressões faciais...")
+        with METRICAS.cronometrar("expressoes"):
+            deteccoes_expressoes = analisar_expressoes_faciais_quadro(quadro, deteccoes_face, config)
+        print("Análise de expressões concluída.")
+
+        # Etapa 4: Análise de Gestos
+        print("\n[ETAPA 4/6] Analisando gestos...")
+        with METRICAS.cronometrar("gestos"):
+            deteccoes_gestos = analisar_gesticulacao(deteccoes_expressoes, config)
+        print("Análise de gestos concluída.")
+
+        # Etapa 5: Análise da Direção do Olhar
+        print("\n[ETAPA 5/6] Analisando direção do olhar...")
+        with METRICAS.cronometrar("olhar"):
+            deteccoes_olhar = analisar_direcao_olhar(deteccoes_gestos)
+        print("Análise do olhar concluída.")
+
+        # Etapa 6: Classificação do Papel Social
+        print("\n[ETAPA 6/6] Classificando papéis sociais...")
+        with METRICAS.cronometrar("classificacao"):
+            resultado_final = classificar_papeis_sociais(deteccoes_olhar)
+        print("Classificação concluída.")
+
+    # Tempo de cada etapa (e por pessoa, nas etapas de face e Face Mesh) e contadores
+    print("\n--- Tempos ---")
+    print(METRICAS.relatorio())
 
     # Salva o resultado final em JSON para depuração
     output_dir = os.path.dirname(image_path)
     final_json_path = os.path.join(output_dir, "resultado_completo.json")
-    with open(final_json_path, 'w') as f:
-        json.dump(resultado_final, f, indent=4)
+    with criar_saida(final_json_path) as saida:
+        saida.escrever(resultado_final)
     print(f"\nResultado final salvo em: {final_json_path}")
 
     # Exibição do resultado final
     print("\n--- Exibindo resultado final --- ")
-    img = cv2.imread(image_path)
-    img_resultado = desenhar_resultados(img, resultado_final)
+    # Desenha sobre uma cópia para não alterar o quadro compartilhado
+    img_resultado = desenhar_resultados(quadro.bgr.copy(), resultado_final)
 
  
     h, w, _ = img_resultado.shape
@@ -100,5 +126,8 @@ def main(image_path):
 if __name__ == '__main__':
     # Caminho para a imagem que você quer analisar
     caminho_da_imagem = 'sample_image.jpg'
-    main(caminho_da_imagem)
+    # SOCIAL_VISION_LOG=DEBUG mostra o diagnóstico de cada pessoa;
+    # SOCIAL_VISION_PERFIL=perfil.prof grava o perfil das etapas
+    configurar_logging()
+    main(caminho_da_imagem, perfil=os.environ.get("SOCIAL_VISION_PERFIL"))
 
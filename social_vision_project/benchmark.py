@@ -0,0 +1,435 @@
+
+import argparse
+import datetime
+import importlib.metadata
+import json
+import os
+import platform
+import subprocess
+import time
+
+import cv2
+import numpy as np
+
+from quadro import Quadro
+from deteccao import DeteccoesPose
+from configuracao import ConfiguracaoPipeline, PRESETS, configuracao_preset
+from inferencia_pose import BACKENDS_POSE
+
+# Esqueleto COCO (17 keypoints) de uma pessoa em pé, de frente, em coordenadas
+# relativas à bbox (0 a 1). O lado esquerdo da pessoa aparece à direita da imagem.
+ESQUELETO_REPOUSO = np.array([
+    [0.50, 0.08],                # 0 nariz
+    [0.54, 0.06], [0.46, 0.06],  # 1-2 olhos
+    [0.58, 0.08], [0.42, 0.08],  # 3-4 orelhas
+    [0.68, 0.22], [0.32, 0.22],  # 5-6 ombros
+    [0.74, 0.38], [0.26, 0.38],  # 7-8 cotovelos
+    [0.76, 0.52], [0.24, 0.52],  # 9-10 pulsos
+    [0.62, 0.55], [0.38, 0.55],  # 11-12 quadris
+    [0.63, 0.75], [0.37, 0.75],  # 13-14 joelhos
+    [0.64, 0.95], [0.36, 0.95],  # 15-16 tornozelos
+])
+# Braço esquerdo levantado acima dos ombros (gesticulando): cotovelo e pulso
+BRACO_LEVANTADO = np.array([[0.84, 0.26], [0.82, 0.10]])
+LIGACOES = ((5, 7), (7, 9), (6, 8), (8, 10), (5, 6), (5, 11), (6, 12), (11, 12),
+            (11, 13), (13, 15), (12, 14), (14, 16))
+
+def gerar_cena(num_pessoas, largura=1280, altura=720, semente=0, fracao_gesticulando=0.3):
+    """
+    Gera uma cena sintética com `num_pessoas` pessoas em grade, sem depender de
+    imagens ou modelos: a imagem (bonecos desenhados) e as detecções de pose
+    correspondentes, como o YOLO as entregaria.
+
+    As cabeças são viradas para a esquerda ou para a direita, de modo que a análise
+    do olhar encontre alvos, e uma fração das pessoas está com o braço levantado.
+    A cena serve para medir o custo das etapas, não a sua acurácia: os modelos
+    reais não necessariamente reconhecem os bonecos.
+
+    Returns:
+        tuple: (Quadro, DeteccoesPose).
+    """
+    rng = np.random.default_rng(semente)
+    colunas = max(1, int(np.ceil(np.sqrt(num_pessoas * largura / altura / 2.2))))
+    linhas = max(1, int(np.ceil(num_pessoas / colunas)))
+    largura_celula, altura_celula = largura / colunas, altura / linhas
+
+    bboxes = np.zeros((num_pessoas, 4), dtype=np.float64)
+    keypoints = np.zeros((num_pessoas, 17, 2), dtype=np.float64)
+    for i in range(num_pessoas):
+        linha, coluna = divmod(i, colunas)
+        # Bbox com proporção de uma pessoa em pé (largura ~ 0.45 x altura), dentro da célula
+        h = min(altura_celula * rng.uniform(0.75, 0.95), largura_celula / 0.45 * 0.95)
+        w = h * 0.45
+        x1 = coluna * largura_celula + rng.uniform(0, largura_celula - w)
+        y1 = linha * altura_celula + rng.uniform(0, altura_celula - h)
+        bboxes[i] = (x1, y1, x1 + w, y1 + h)
+
+        esqueleto = ESQUELETO_REPOUSO.copy()
+        if rng.random() < fracao_gesticulando:
+            esqueleto[[7, 9]] = BRACO_LEVANTADO
+        # Cabeça virada: o nariz se desloca para um lado, quase na horizontal
+        angulo = rng.uniform(-0.7, 0.7) + (0 if rng.random() < 0.5 else np.pi)
+        esqueleto[0] = esqueleto[[1, 2]].mean(axis=0) + 0.05 * np.array([np.cos(angulo), abs(np.sin(angulo)) * 0.45])
+        esqueleto += rng.normal(0, 0.005, esqueleto.shape)
+        keypoints[i] = (x1, y1) + esqueleto * (w, h)
+
+    confiancas = rng.uniform(0.6, 1.0, (num_pessoas, 17)).astype(np.float32)
+    deteccoes = DeteccoesPose(np.arange(num_pessoas), bboxes, keypoints, confiancas,
+                              rng.uniform(0.5, 0.95, num_pessoas))
+
+    # Fundo com gradiente (para que as ROIs não sejam constantes) e os bonecos por cima
+    gradiente = np.linspace(60, 180, largura, dtype=np.uint8)
+    img = np.repeat(np.repeat(gradiente[None, :, None], altura, axis=0), 3, axis=2)
+    for i in range(num_pessoas):
+        pontos = deteccoes.keypoints[i]
+        espessura = max(1, int((bboxes[i, 2] - bboxes[i, 0]) / 12))
+        for a, b in LIGACOES:
+            cv2.line(img, tuple(map(int, pontos[a])), tuple(map(int, pontos[b])), (40, 40, 120), espessura)
+        raio = max(2, int(np.linalg.norm(pontos[3] - pontos[4]) * 0.7))
+        cv2.circle(img, tuple(map(int, (pontos[1] + pontos[2]) / 2)), raio, (140, 170, 220), -1)
+        for olho in (1, 2):
+            cv2.circle(img, tuple(map(int, pontos[olho])), max(1, raio // 6), (30, 30, 30), -1)
+        cv2.ellipse(img, tuple(map(int, pontos[0] + (0, raio * 0.45))), (max(1, raio // 3), max(1, raio // 8)),
+                    0, 0, 360, (40, 40, 160), -1)
+    return Quadro(img, origem=f"sintetica:{num_pessoas}p:{largura}x{altura}"), deteccoes
+
+def medir(funcao, repeticoes=20, aquecimento=2, duracao_maxima=None):
+    """
+    Mede o tempo de `funcao()` em `repeticoes` execuções, após `aquecimento` execuções descartadas.
+
+    Args:
+        duracao_maxima (float, opcional): Interrompe antes das `repeticoes` se as medições
+            já somarem este tempo (em segundos), com no mínimo 3 execuções.
+
+    Returns:
+        dict: repetições, média, desvio padrão, mínimo, p50 e p95 (ms) e execuções por segundo.
+    """
+    for _ in range(aquecimento):
+        funcao()
+    tempos = []
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - t0)
+        if duracao_maxima and len(tempos) >= 3 and time.perf_counter() - inicio > duracao_maxima:
+            break
+    tempos = np.array(tempos) * 1000
+    p50, p95 = np.percentile(tempos, (50, 95))
+    return {
+        "repeticoes": len(tempos),
+        "media_ms": float(tempos.mean()),
+        "desvio_ms": float(tempos.std()),
+        "min_ms": float(tempos.min()),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "por_segundo": float(1000 / tempos.mean()) if tempos.mean() > 0 else float('inf'),
+    }
+
+def _pessoas(deteccoes, semente=0):
+    """Dicionários das pessoas, com as expressões sintéticas que a classificação consome."""
+    rng = np.random.default_rng(semente)
+    pessoas = deteccoes.pessoas()
+    for pessoa in pessoas:
+        pessoa['expressoes'] = {"boca_aberta": bool(rng.random() < 0.2), "olhos_fechados": False, "razao_boca": None}
+    return pessoas
+
+# --- Suítes ---
+
+def suite_micro(pessoas_por_imagem, repeticoes):
+    """Etapas 4 a 6 (NumPy puro) sobre keypoints sintéticos, para cada número de pessoas."""
+    from analise_pose_gestos import analisar_gesticulacao
+    from direcao_olhar import analisar_direcao_olhar
+    from classificador_social import classificar_papeis_sociais
+
+    config = ConfiguracaoPipeline()
+    resultados = []
+    for n in pessoas_por_imagem:
+        _, deteccoes = gerar_cena(n)
+        pessoas = _pessoas(deteccoes)
+        # As etapas só acrescentam chaves às pessoas: repetir sobre a mesma lista é idempotente
+        casos = [
+            ("gestos", lambda: analisar_gesticulacao(pessoas, config)),
+            ("olhar", lambda: analisar_direcao_olhar(pessoas)),
+            ("classificacao", lambda: classificar_papeis_sociais(pessoas)),
+        ]
+        for caso, funcao in casos:
+            resultados.append(dict(suite="micro", caso=caso, parametros={"pessoas": n}, **medir(funcao, repeticoes)))
+    return resultados
+
+def _verificar_modelo(nome, config):
+    """Carrega e aquece um modelo. Retorna None se estiver disponível ou o motivo de não estar."""
+    from modelos import aquecer
+    from detector_pessoas_pose import parametros_modelo_pose
+    parametros = {'yolo_pose': parametros_modelo_pose(config)}
+    if nome == 'yolo_pose':
+        caminho = parametros['yolo_pose']['caminho']
+        if not os.path.exists(caminho):
+            # Sem os pesos locais o ultralytics tentaria baixá-los, e o benchmark deve rodar offline
+            return f"modelo {caminho} ausente no diretório atual"
+    try:
+        aquecer(nome, parametros=parametros)
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+    return None
+
+def _ignorado(suite, caso, parametros, motivo):
+    return {"suite": suite, "caso": caso, "parametros": parametros, "ignorado": motivo}
+
+def suite_etapas(pessoas_por_imagem, resolucoes, repeticoes, config):
+    """Etapas 1 a 3 (modelos), as etapas 2 a 6 juntas e o pipeline completo, por resolução e número de pessoas."""
+    from detector_pessoas_pose import detectar_pessoas_e_poses_quadro
+    from detector_faces import detectar_faces_quadro, estimar_bbox_cabeca
+    from expressao_boca_face_mesh import analisar_expressoes_faciais_quadro
+    from pipeline import analisar_quadro, completar_analise
+
+    indisponiveis = {nome: _verificar_modelo(nome, config) for nome in ('yolo_pose', 'face_recognition', 'face_mesh')}
+    indisponiveis = {nome: motivo for nome, motivo in indisponiveis.items() if motivo}
+    # Sem HOG/CNN nem encoding, a etapa de faces não usa o dlib
+    dlib = () if config.modo_localizacao_face == "somente_keypoints" and not config.calcular_encoding_facial \
+        else ('face_recognition',)
+    for nome, motivo in indisponiveis.items():
+        print(f"  Modelo '{nome}' indisponível: {motivo}")
+
+    resultados = []
+    for largura, altura in resolucoes:
+        for n in pessoas_por_imagem:
+            quadro, deteccoes = gerar_cena(n, largura, altura)
+            quadro.rgb # Conversão feita uma vez, como no pipeline
+            parametros = {"pessoas": n, "resolucao": f"{largura}x{altura}"}
+
+            def registrar(caso, modelo, funcao, **extras):
+                if modelo in indisponiveis:
+                    resultados.append(_ignorado("etapas", caso, parametros, indisponiveis[modelo]))
+                else:
+                    resultados.append(dict(suite="etapas", caso=caso, parametros=parametros,
+                                           **medir(funcao, repeticoes, duracao_maxima=10.0), **extras))
+
+            if 'yolo_pose' not in indisponiveis:
+                encontradas = len(detectar_pessoas_e_poses_quadro(quadro, config))
+                registrar("pose", 'yolo_pose', lambda: detectar_pessoas_e_poses_quadro(quadro, config),
+                          pessoas_detectadas=encontradas)
+            else:
+                registrar("pose", 'yolo_pose', None)
+
+            # Etapas 2 em diante partem das detecções sintéticas (o YOLO não reconhece os bonecos)
+            registrar("faces", dlib[0] if dlib else None, lambda: detectar_faces_quadro(quadro, _pessoas(deteccoes), config))
+
+            pessoas = _pessoas(deteccoes)
+            for pessoa in pessoas:
+                # Face estimada pelos keypoints, para que o Face Mesh tenha onde rodar mesmo sem o dlib
+                bbox = estimar_bbox_cabeca(pessoa['keypoints'], pessoa['keypoints_conf'], 0.5, quadro.rgb.shape)
+                pessoa['face_info'] = {"face_bbox": bbox, "origem": "keypoints"} if bbox else None
+            registrar("expressoes", 'face_mesh', lambda: analisar_expressoes_faciais_quadro(quadro, pessoas, config))
+            # Etapas 4 a 6 não dependem da resolução: ver a suíte "micro"
+
+            faltando = lambda *modelos: "; ".join(indisponiveis[m] for m in modelos if m in indisponiveis)
+            for caso, modelos, funcao in (
+                    ("etapas_2_a_6", dlib + ('face_mesh',),
+                     lambda: completar_analise(quadro, _pessoas(deteccoes), config)),
+                    ("ponta_a_ponta", ('yolo_pose',) + dlib + ('face_mesh',),
+                     lambda: analisar_quadro(quadro, config))):
+                if faltando(*modelos):
+                    resultados.append(_ignorado("etapas", caso, parametros, faltando(*modelos)))
+                else:
+                    registrar(caso, None, funcao)
+
+            quadro_video = _estimar_quadro_video(resultados, parametros, config)
+            if quadro_video:
+                resultados.append(quadro_video)
+    return resultados
+
+def _estimar_quadro_video(resultados, parametros, config):
+    """
+    Custo médio de um quadro de vídeo com as cadências da configuração, estimado a partir
+    das medições da mesma cena: YOLO / cadencia_pose + faces / cadencia_faces + Face Mesh /
+    cadencia_expressoes + etapas 4 a 6 (todo quadro). None se faltar alguma medição.
+    """
+    medidos = {r["caso"]: r for r in resultados
+               if r["suite"] == "etapas" and r["parametros"] == parametros and "p50_ms" in r}
+    if not all(caso in medidos for caso in ("pose", "faces", "expressoes", "etapas_2_a_6")):
+        return None
+    estimativa = {}
+    for chave in ("p50_ms", "p95_ms"):
+        pose, faces, expressoes = (medidos[caso][chave] for caso in ("pose", "faces", "expressoes"))
+        demais = max(0.0, medidos["etapas_2_a_6"][chave] - faces - expressoes)
+        estimativa[chave] = (pose / config.cadencia_pose + faces / config.cadencia_faces
+                             + expressoes / config.cadencia_expressoes + demais)
+    return dict(suite="etapas", caso="quadro_video", parametros=parametros, estimado=True, **estimativa,
+                por_segundo=1000 / estimativa["p50_ms"] if estimativa["p50_ms"] > 0 else float("inf"))
+
+def suite_lote(tamanhos_lote, resolucoes, repeticoes, config, imagens_por_medicao=16):
+    """Vazão do YOLO em lote (detectar_pessoas_e_poses_lote) por tamanho de lote e resolução."""
+    from detector_pessoas_pose import detectar_pessoas_e_poses_lote
+
+    motivo = _verificar_modelo('yolo_pose', config)
+    resultados = []
+    for largura, altura in resolucoes:
+        quadros = [gerar_cena(4, largura, altura, semente=i)[0] for i in range(imagens_por_medicao)]
+        for tamanho in tamanhos_lote:
+            parametros = {"tamanho_lote": tamanho, "resolucao": f"{largura}x{altura}", "imagens": imagens_por_medicao}
+            if motivo:
+                resultados.append(_ignorado("lote", "pose_lote", parametros, motivo))
+                continue
+            medicao = medir(lambda: detectar_pessoas_e_poses_lote(quadros, tamanho, config), repeticoes, aquecimento=1,
+                            duracao_maxima=30.0)
+            # Uma execução processa `imagens_por_medicao` imagens
+            medicao["imagens_por_segundo"] = medicao["por_segundo"] * imagens_por_medicao
+            resultados.append(dict(suite="lote", caso="pose_lote", parametros=parametros, **medicao))
+    return resultados
+
+# --- Registro e comparação ---
+
+def _commit_atual():
+    """Hash do commit atual e se há alterações locais, ou (None, None) fora de um repositório git."""
+    diretorio = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=diretorio, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        alteracoes = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=diretorio,
+                                    capture_output=True, text=True, check=True).stdout.strip()
+        return commit, bool(alteracoes)
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+def descrever_ambiente():
+    versoes = {}
+    for pacote in ("numpy", "opencv-python", "torch", "ultralytics", "onnxruntime", "openvino", "mediapipe",
+                   "face_recognition", "dlib"):
+        try:
+            versoes[pacote] = importlib.metadata.version(pacote)
+        except importlib.metadata.PackageNotFoundError:
+            pass
+    return {
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "processador": platform.processor() or platform.machine(),
+        "nucleos": os.cpu_count(),
+        "pacotes": versoes,
+    }
+
+def _chave(resultado):
+    return resultado["suite"], resultado["caso"], json.dumps(resultado["parametros"], sort_keys=True)
+
+def comparar(base, atual, limiar=0.10):
+    """
+    Compara a mediana (p50) de cada caso presente nos dois resultados.
+
+    Returns:
+        list: (suite, caso, parametros, p50 base, p50 atual, variação relativa, regressão?)
+              para cada caso medido nos dois.
+    """
+    anteriores = {_chave(r): r for r in base["resultados"] if "p50_ms" in r}
+    linhas = []
+    for r in atual["resultados"]:
+        anterior = anteriores.get(_chave(r))
+        if anterior is None or "p50_ms" not in r:
+            continue
+        variacao = r["p50_ms"] / anterior["p50_ms"] - 1 if anterior["p50_ms"] > 0 else 0.0
+        linhas.append((r["suite"], r["caso"], r["parametros"], anterior["p50_ms"], r["p50_ms"], variacao, variacao > limiar))
+    return linhas
+
+def executar(suites, pessoas_por_imagem, resolucoes, tamanhos_lote, repeticoes, config=None, presets=None):
+    """
+    Executa as suítes pedidas e retorna o registro completo (serializável em JSON).
+
+    Args:
+        presets (dict, opcional): {nome: ConfiguracaoPipeline}. As suítes "etapas" e "lote"
+            rodam uma vez para cada preset (no lugar de `config`), e o nome entra nos
+            parâmetros de cada resultado: o perfil de latência de cada ponto de operação.
+    """
+    configuracoes = presets or {None: config or ConfiguracaoPipeline()}
+    commit, alteracoes = _commit_atual()
+    resultados = []
+    inicio = time.perf_counter()
+    if "micro" in suites:
+        print("Suíte 'micro' (etapas 4 a 6, NumPy)...")
+        resultados += suite_micro(pessoas_por_imagem, repeticoes)
+    for preset, config_preset in configuracoes.items():
+        sufixo = f" [preset {preset}]" if preset else ""
+        medidos = []
+        if "etapas" in suites:
+            print(f"Suíte 'etapas' (por etapa e ponta a ponta){sufixo}...")
+            medidos += suite_etapas(pessoas_por_imagem, resolucoes, repeticoes, config_preset)
+        if "lote" in suites:
+            print(f"Suíte 'lote' (YOLO em lote){sufixo}...")
+            medidos += suite_lote(tamanhos_lote, resolucoes, repeticoes, config_preset)
+        if preset:
+            for r in medidos:
+                r["parametros"] = dict(r["parametros"], preset=preset)
+        resultados += medidos
+    return {
+        "versao": 1,
+        "commit": commit,
+        "alteracoes_locais": alteracoes,
+        "data": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "duracao_s": time.perf_counter() - inicio,
+        "ambiente": descrever_ambiente(),
+        "parametros": {"suites": list(suites), "pessoas_por_imagem": list(pessoas_por_imagem),
+                       "resolucoes": [f"{l}x{a}" for l, a in resolucoes], "tamanhos_lote": list(tamanhos_lote),
+                       "repeticoes": repeticoes,
+                       **({"presets": {nome: vars(c) for nome, c in presets.items()}} if presets
+                          else {"config": vars(configuracoes[None])})},
+        "resultados": resultados,
+    }
+
+def _resolucao(texto):
+    largura, altura = texto.lower().split("x")
+    return int(largura), int(altura)
+
+if __name__ == '__main__':
+    # Somente CPU: esconde as GPUs antes que o torch seja importado
+    os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+    parser = argparse.ArgumentParser(description="Benchmarks do pipeline com cenas sintéticas (offline, CPU).")
+    parser.add_argument("--suites", nargs="+", choices=("micro", "etapas", "lote"), default=["micro", "etapas", "lote"])
+    parser.add_argument("--pessoas", type=int, nargs="+", default=[1, 5, 10, 25, 50, 100, 150],
+                        help="Números de pessoas por imagem.")
+    parser.add_argument("--resolucoes", type=_resolucao, nargs="+", default=[(640, 480), (1280, 720), (1920, 1080)])
+    parser.add_argument("--tamanhos-lote", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--presets", nargs="+", choices=PRESETS, default=None,
+                        help="Mede as suítes etapas e lote com cada preset (as opções abaixo alteram todos).")
+    parser.add_argument("--modo-face", choices=("hog", "cnn", "keypoints", "somente_keypoints"), default=None)
+    parser.add_argument("--modo-face-mesh", choices=("por_pessoa", "quadro_inteiro"), default=None)
+    parser.add_argument("--threads-por-pessoa", type=int, default=None)
+    parser.add_argument("--backend-pose", choices=BACKENDS_POSE, default=None,
+                        help="Runtime do YOLO: pytorch, onnx (ONNX Runtime) ou openvino.")
+    parser.add_argument("--modelo-pose", default=None, help="Modelo do YOLO (padrão: o do backend).")
+    parser.add_argument("--threads-pose", type=int, default=None, help="Threads de inferência do YOLO (0 = padrão do runtime).")
+    parser.add_argument("--saida", default=None, help="Arquivo JSON do resultado (padrão: benchmark_<commit>.json).")
+    parser.add_argument("--comparar", default=None, help="Resultado anterior (JSON) com o qual comparar.")
+    parser.add_argument("--limiar-regressao", type=float, default=0.10,
+                        help="Aumento relativo do p50 considerado regressão (padrão: 10%%).")
+    args = parser.parse_args()
+
+    alteracoes = dict(modo_localizacao_face=args.modo_face, modo_face_mesh=args.modo_face_mesh,
+                      threads_por_pessoa=args.threads_por_pessoa, backend_pose=args.backend_pose,
+                      modelo_pose=args.modelo_pose, threads_pose=args.threads_pose)
+    presets = {nome: configuracao_preset(nome, **alteracoes) for nome in args.presets} if args.presets else None
+    registro = executar(args.suites, args.pessoas, args.resolucoes, args.tamanhos_lote, args.repeticoes,
+                        configuracao_preset(None, **alteracoes), presets)
+
+    saida = args.saida or f"benchmark_{(registro['commit'] or 'sem-git')[:10]}.json"
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(registro, f, indent=2)
+
+    for r in registro["resultados"]:
+        descricao = f"{r['suite']:<7}{r['caso']:<15}{json.dumps(r['parametros'], sort_keys=True):<52}"
+        if "ignorado" in r:
+            print(f"{descricao} ignorado ({r['ignorado']})")
+        else:
+            print(f"{descricao} p50 {r['p50_ms']:9.3f} ms  p95 {r['p95_ms']:9.3f} ms  {r['por_segundo']:9.1f}/s")
+    print(f"Resultado salvo em: {saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            base = json.load(f)
+        linhas = comparar(base, registro, args.limiar_regressao)
+        print(f"\nComparação com {args.comparar} (commit {(base.get('commit') or '?')[:10]}):")
+        for suite, caso, parametros, p50_base, p50_atual, variacao, regressao in linhas:
+            print(f"{suite:<7}{caso:<15}{json.dumps(parametros, sort_keys=True):<52}"
+                  f"{p50_base:9.3f} -> {p50_atual:9.3f} ms ({variacao:+.0%}){'  REGRESSÃO' if regressao else ''}")
+        regressoes = sum(1 for linha in linhas if linha[-1])
+        print(f"{regressoes} regressão(ões) acima de {args.limiar_regressao:.0%} em {len(linhas)} caso(s) comparado(s).")
+        raise SystemExit(1 if regressoes else 0)
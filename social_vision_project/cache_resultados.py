@@ -0,0 +1,146 @@
+
+import copy
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+
+def derivar_chave(*partes):
+    """Combina as partes (strings ou valores com repr estável) em uma chave hexadecimal."""
+    h = hashlib.blake2b(digest_size=16)
+    for parte in partes:
+        h.update(repr(parte).encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()
+
+class CacheResultados:
+    """
+    Cache de resultados endereçado pelo conteúdo.
+
+    As chaves são derivadas do hash dos pixels da imagem, da versão de cada
+    etapa e das opções da configuração que a afetam (ver pipeline.py), de modo
+    que uma imagem já analisada com os mesmos modelos e opções não é analisada
+    de novo. Há dois níveis: um LRU em memória com até `capacidade` entradas e,
+    opcionalmente, um diretório em disco (um arquivo pickle por entrada),
+    compartilhável entre processos e execuções.
+
+    Os valores são copiados ao guardar e ao obter: as etapas do pipeline
+    alteram as detecções no lugar, e isso não pode corromper o cache.
+    """
+
+    def __init__(self, capacidade=128, diretorio=None):
+        """
+        Args:
+            capacidade (int): Máximo de entradas no nível em memória.
+            diretorio (str, opcional): Diretório do nível em disco. None desativa o disco.
+        """
+        self.capacidade = capacidade
+        self.diretorio = diretorio
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        self._memoria = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos_memoria = 0
+        self.acertos_disco = 0
+        self.falhas = 0
+        self.acertos_por_etapa = {}
+
+    def obter(self, chave, etapa=None):
+        """Retorna uma cópia do valor guardado em `chave`, ou None se não houver."""
+        return self.procurar([(etapa, chave)])[1]
+
+    def procurar(self, candidatos):
+        """
+        Procura, em ordem, a primeira chave presente no cache. Conta um único acerto
+        (por etapa e nível) ou uma única falha para toda a procura.
+
+        Args:
+            candidatos (list): Pares (etapa, chave), do mais ao menos desejado.
+
+        Returns:
+            tuple: (etapa, cópia do valor) do primeiro acerto, ou (None, None).
+        """
+        with self._lock:
+            for etapa, chave in candidatos:
+                if chave in self._memoria:
+                    self._memoria.move_to_end(chave)
+                    self.acertos_memoria += 1
+                    self._contar_acerto(etapa)
+                    return etapa, copy.deepcopy(self._memoria[chave])
+
+        for etapa, chave in candidatos:
+            valor = self._ler_disco(chave)
+            if valor is not None:
+                with self._lock:
+                    self.acertos_disco += 1
+                    self._contar_acerto(etapa)
+                    self._guardar_memoria(chave, valor)
+                return etapa, copy.deepcopy(valor)
+
+        with self._lock:
+            self.falhas += 1
+        return None, None
+
+    def guardar(self, chave, valor):
+        """Guarda uma cópia de `valor` nos dois níveis."""
+        valor = copy.deepcopy(valor)
+        with self._lock:
+            self._guardar_memoria(chave, valor)
+        self._escrever_disco(chave, valor)
+
+    def limpar(self):
+        """Esvazia o nível em memória (o disco é mantido)."""
+        with self._lock:
+            self._memoria.clear()
+
+    def estatisticas(self):
+        """Contadores de acertos e falhas (uma consulta por análise de imagem)."""
+        with self._lock:
+            consultas = self.acertos_memoria + self.acertos_disco + self.falhas
+            return {
+                "acertos_memoria": self.acertos_memoria,
+                "acertos_disco": self.acertos_disco,
+                "falhas": self.falhas,
+                "taxa_acerto": (self.acertos_memoria + self.acertos_disco) / consultas if consultas else 0.0,
+                "acertos_por_etapa": dict(self.acertos_por_etapa),
+                "entradas_memoria": len(self._memoria),
+            }
+
+    def _contar_acerto(self, etapa):
+        if etapa is not None:
+            self.acertos_por_etapa[etapa] = self.acertos_por_etapa.get(etapa, 0) + 1
+
+    def _guardar_memoria(self, chave, valor):
+        self._memoria[chave] = valor
+        self._memoria.move_to_end(chave)
+        while len(self._memoria) > self.capacidade:
+            self._memoria.popitem(last=False)
+
+    def _caminho(self, chave):
+        return os.path.join(self.diretorio, chave[:2], chave + '.pkl')
+
+    def _ler_disco(self, chave):
+        if not self.diretorio:
+            return None
+        try:
+            with open(self._caminho(chave), 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def _escrever_disco(self, chave, valor):
+        if not self.diretorio:
+            return
+        caminho = self._caminho(chave)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        # Escreve em um arquivo temporário e renomeia: outros processos nunca leem um arquivo pela metade
+        descritor, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho), suffix='.tmp')
+        try:
+            with os.fdopen(descritor, 'wb') as f:
+                pickle.dump(valor, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporario, caminho)
+        except OSError:
+            if os.path.exists(temporario):
+                os.remove(temporario)
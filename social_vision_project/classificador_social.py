@@ -1,5 +1,10 @@
 
 import json
+import logging
+
+from serializacao import converter_para_json, preparar_para_json
+
+logger = logging.getLogger(__name__)
 
 def classificar_papeis_sociais(deteccoes):
     """
@@ -17,13 +22,18 @@ def classificar_papeis_sociais(deteccoes):
     # Primeira passagem: identificar quem está claramente falando
     for pessoa in deteccoes:
         # Features da pessoa
-        boca_aberta = pessoa.get('expressoes', {}).get('boca_aberta', False)
+        boca_aberta = (pessoa.get('expressoes') or {}).get('boca_aberta', False)
         gesticulando = pessoa.get('gesticulando', False)
 
         # Lógica de classificação para "Falando"
         # Ter a boca aberta é o indicador mais forte.
         # Gesticular aumenta a confiança.
-        if boca_aberta:
+        # Em vídeo, 'falando' (deteccao_fala.py) substitui a boca aberta de um único
+        # quadro pela oscilação da boca ao longo dos últimos quadros.
+        falando = pessoa.get('falando')
+        if falando is None:
+            falando = boca_aberta
+        if falando:
             pessoa['papel_social'] = 'Falando'
             ids_falando.add(pessoa['id'])
         else:
@@ -60,13 +70,13 @@ def carregar_dados_json(json_path):
         with open(json_path, 'r') as f:
             return json.load(f)
     except FileNotFoundError:
-        print(f"Arquivo JSON não encontrado: {json_path}")
+        logger.error("Arquivo JSON não encontrado: %s", json_path)
         return []
 
 def salvar_resultado_json(data, output_path):
     """Salva os dados em um arquivo JSON."""
     with open(output_path, 'w') as f:
-        json.dump(data, f, indent=4)
+        json.dump(preparar_para_json(data), f, indent=4, default=converter_para_json)
 
 if __name__ == '__main__':
     caminho_olhar_json = 'direcao_olhar.json'
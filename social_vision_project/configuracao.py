@@ -0,0 +1,160 @@
+
+from dataclasses import dataclass, replace
+
+@dataclass
+class ConfiguracaoPipeline:
+    """
+    Opções de cada etapa do pipeline. Os valores padrão reproduzem o
+    comportamento original, exceto pelas features que nenhuma etapa
+    posterior consome, que só são calculadas se pedidas explicitamente.
+    """
+
+    # Etapa 2 (detector_faces): calcula o embedding de identidade de 128 dimensões
+    # (ResNet do dlib). Nenhuma etapa do pipeline o utiliza; ative apenas se algum
+    # consumidor precisar reconhecer a mesma pessoa entre imagens.
+    calcular_encoding_facial: bool = False
+
+    # Etapa 1 (detector_pessoas_pose): backend de inferência do YOLOv8 Pose.
+    #   "pytorch":  ultralytics/PyTorch (comportamento original).
+    #   "onnx":     modelo ONNX exportado por exportar_pose.py (FP32 ou INT8) no ONNX Runtime, na CPU.
+    #   "openvino": modelo do OpenVINO (diretório *_openvino_model/ ou o próprio .onnx), na CPU.
+    # Os backends exportados não dependem do PyTorch; `python exportar_pose.py comparar`
+    # mede a diferença das detecções de cada um em relação ao PyTorch.
+    backend_pose: str = "pytorch"
+    # Tamanho do YOLOv8 Pose ("n", "s", "m", "l" ou "x"): do mais rápido ao mais preciso
+    variante_pose: str = "n"
+    # Arquivo (ou diretório) do modelo; vazio = padrão do backend para a variante
+    # (inferencia_pose.MODELOS_PADRAO, ex.: yolov8s-pose.pt)
+    modelo_pose: str = ""
+    # Lado da entrada da rede (múltiplo de 32). Menor é mais rápido, mas perde pessoas pequenas.
+    # Nos backends exportados vale o tamanho da exportação, a menos que o grafo seja dinâmico.
+    tamanho_entrada_pose: int = 640
+    # Threads de inferência do YOLO (0 = padrão do runtime). No PyTorch o valor vale para o processo todo.
+    threads_pose: int = 0
+
+    # Etapa 1: o YOLO recebe uma cópia do quadro reduzida para que
+    # o maior lado não passe deste valor (as coordenadas voltam à resolução original).
+    # Reduzir antes, uma única vez e com INTER_AREA, tira o custo de pré-processar fotos de
+    # 12 MP, mas a entrada da rede passa a vir de dois redimensionamentos e seus pixels
+    # mudam (ver README, "Resolução de Trabalho"). 0 (padrão) envia o quadro em resolução
+    # original, como antes; os presets ativam a redução.
+    lado_maximo_pose: int = 0
+
+    # Etapa 2: como localizar a face de cada pessoa.
+    #   "hog":       HOG do dlib sobre toda a bbox da pessoa (comportamento original).
+    #   "cnn":       detector CNN (MMOD) do dlib sobre a bbox da pessoa. Encontra faces de
+    #                perfil e menores, mas é muito mais lento na CPU.
+    #   "keypoints": recorta a cabeça a partir dos keypoints 0-4 do YOLO (nariz, olhos,
+    #                orelhas) e só recorre ao HOG, em resolução reduzida, quando esses
+    #                keypoints têm baixa confiança.
+    #   "somente_keypoints": como "keypoints", mas sem o HOG: sem keypoints confiáveis, sem face.
+    modo_localizacao_face: str = "hog"
+    # Confiança mínima de um keypoint do YOLO para ser usado: cabeça no modo "keypoints"
+    # da etapa 2 e ombros/pulsos/quadris na análise de gestos (etapa 4)
+    limiar_confianca_keypoints: float = 0.5
+    # Maior lado (em pixels) da região onde o HOG de fallback é executado
+    lado_maximo_hog: int = 320
+    # Faixa do maior lado (em pixels) da bbox da pessoa em que o dlib procura a face nos
+    # modos "hog" e "cnn". Pessoas pequenas são ampliadas até `lado_minimo_roi_hog` (o HOG
+    # do dlib não encontra faces com menos de ~80 px) e grandes são reduzidas até
+    # `lado_maximo_roi_hog` (no modo "keypoints", o limite superior do fallback é
+    # `lado_maximo_hog`). 0 = sem limite.
+    lado_minimo_roi_hog: int = 0
+    lado_maximo_roi_hog: int = 0
+
+    # Etapas 2 e 3: threads usadas para processar as pessoas de uma imagem em paralelo
+    # (HOG/encodings do dlib e Face Mesh liberam o GIL durante boa parte do trabalho; cada
+    # thread carrega suas próprias instâncias, pois nenhum dos dois aceita chamadas
+    # simultâneas). 1 processa uma pessoa por vez (comportamento original). A ordem do
+    # resultado não muda.
+    threads_por_pessoa: int = 1
+
+    # Etapa 3 (expressao_boca_face_mesh): como executar o Face Mesh.
+    #   "por_pessoa":     uma chamada por pessoa, sobre o recorte da face (comportamento original).
+    #   "quadro_inteiro": uma única chamada por quadro com até `max_faces_mesh` faces; os
+    #                     landmarks são associados às pessoas por IoU. Mais eficiente em
+    #                     cenas com muitas pessoas.
+    modo_face_mesh: str = "por_pessoa"
+    max_faces_mesh: int = 30
+    # Modo "quadro_inteiro": False usa o Face Mesh em modo de rastreamento
+    # (`static_image_mode=False`), que só procura as faces de novo quando as perde. É mais
+    # rápido em vídeo, mas supõe quadros consecutivos: não use em imagens independentes.
+    # O modo "por_pessoa" recebe recortes de pessoas diferentes e é sempre estático.
+    face_mesh_estatico: bool = True
+    # Pontuação mínima (IoU/contenção) para associar uma malha a uma pessoa
+    limiar_associacao_mesh: float = 0.3
+    # Modo "por_pessoa": faixa do maior lado (em pixels) do recorte da face enviado ao Face
+    # Mesh. O modelo trabalha internamente em 192 px: recortes muito maiores só custam a
+    # cópia e o redimensionamento, e faces muito pequenas passam a ser encontradas se
+    # ampliadas. 0 = sem limite (o recorte vai no tamanho em que está na imagem).
+    lado_minimo_roi_mesh: int = 0
+    lado_maximo_roi_mesh: int = 512
+
+    # Vídeo (analise_video / escalonador): cada etapa cara roda a cada N quadros e, nos
+    # quadros intermediários, o último resultado é reaproveitado. 1 = todo quadro.
+    #   pose:       YOLO; entre execuções, as posições são interpoladas pelo rastreador.
+    #   faces:      localização da face, por trilha.
+    #   expressoes: Face Mesh, por trilha. Quadros reaproveitados não entram na detecção de fala.
+    cadencia_pose: int = 1
+    cadencia_faces: int = 30
+    cadencia_expressoes: int = 1
+    # Faces/expressões de uma trilha são recalculadas antes da cadência se a bbox da pessoa
+    # mudar mais que esta fração (rastreador.movimento_relativo). 0 desativa o gatilho.
+    limiar_movimento_reuso: float = 0.02
+    # O YOLO roda antes da cadência se o quadro mudar mais que esta fração (diferença média
+    # de uma miniatura em tons de cinza). 0 desativa o gatilho.
+    limiar_movimento_quadro: float = 0.0
+    # Vídeo: quantos quadros da abertura da boca de cada trilha são considerados para
+    # decidir se a pessoa está falando (deteccao_fala.py)
+    janela_fala: int = 15
+
+CONFIGURACAO_PADRAO = ConfiguracaoPipeline()
+
+# Pontos de operação prontos: o que cada um altera em relação à configuração padrão.
+# `python benchmark.py --presets ...` mede a latência de cada um na máquina de destino.
+#   tempo_real:  vídeo/webcam na CPU. YOLO nano em 416 px, faces só pelos keypoints, um
+#                Face Mesh por quadro em modo de rastreamento e YOLO a cada 2 quadros.
+#   equilibrado: imagens e vídeo. YOLO nano em 640 px, faces pelos keypoints (HOG só
+#                quando a cabeça não é confiável), Face Mesh por pessoa.
+#   preciso:     análise offline. YOLO small em 960 px, detector CNN do dlib em recortes
+#                ampliados, Face Mesh por pessoa em recortes de pelo menos 192 px e todas
+#                as etapas em todos os quadros.
+PRESETS = {
+    "tempo_real": dict(
+        variante_pose="n", tamanho_entrada_pose=416, lado_maximo_pose=640,
+        modo_localizacao_face="somente_keypoints",
+        modo_face_mesh="quadro_inteiro", face_mesh_estatico=False, max_faces_mesh=10, lado_maximo_roi_mesh=256,
+        cadencia_pose=2, cadencia_faces=30, cadencia_expressoes=2, limiar_movimento_quadro=0.02,
+    ),
+    "equilibrado": dict(
+        variante_pose="n", tamanho_entrada_pose=640, lado_maximo_pose=1280,
+        modo_localizacao_face="keypoints",
+        modo_face_mesh="por_pessoa", face_mesh_estatico=True,
+        cadencia_pose=1, cadencia_faces=15, cadencia_expressoes=1,
+    ),
+    "preciso": dict(
+        variante_pose="s", tamanho_entrada_pose=960, lado_maximo_pose=1920,
+        modo_localizacao_face="cnn", lado_minimo_roi_hog=160, lado_maximo_roi_hog=800,
+        modo_face_mesh="por_pessoa", face_mesh_estatico=True, lado_minimo_roi_mesh=192,
+        cadencia_pose=1, cadencia_faces=1, cadencia_expressoes=1,
+    ),
+}
+
+# Presets para imagens independentes (lote, servidor HTTP, Streamlit). Os que usam o Face
+# Mesh em modo de rastreamento levariam o estado de uma imagem para a seguinte.
+PRESETS_IMAGEM = tuple(nome for nome, valores in PRESETS.items() if valores.get("face_mesh_estatico", True))
+
+def configuracao_preset(nome=None, **alteracoes):
+    """
+    Cria a configuração de um preset (ou a padrão, se `nome` for None) com alterações.
+
+    Alterações com valor None são ignoradas, então os argumentos de linha de comando
+    não informados podem ser repassados diretamente.
+
+    Raises:
+        ValueError: Se o preset não existir.
+    """
+    if nome is not None and nome not in PRESETS:
+        raise ValueError(f"Preset desconhecido: {nome!r} (opções: {', '.join(PRESETS)})")
+    base = replace(CONFIGURACAO_PADRAO, **PRESETS[nome]) if nome else ConfiguracaoPipeline()
+    return replace(base, **{campo: valor for campo, valor in alteracoes.items() if valor is not None})
@@ -0,0 +1,156 @@
+
+import numpy as np
+
+NUM_KEYPOINTS = 17
+
+class DeteccoesPose:
+    """
+    Detecções de pose de uma imagem em arrays contíguos do NumPy.
+
+    Em vez de 17 dicionários {"point_id", "x", "y"} por pessoa, os keypoints
+    ficam em um único array (n, 17, 2) e suas confianças em um array (n, 17).
+    Os dicionários de cada pessoa (`pessoas()`) guardam apenas vistas (sem
+    cópia) desses arrays; `para_dicts()` gera o formato antigo para JSON.
+    """
+
+    __slots__ = ('ids', 'bboxes', 'confiancas_bbox', 'keypoints', 'confiancas_keypoints')
+
+    def __init__(self, ids, bboxes, keypoints, confiancas_keypoints=None, confiancas_bbox=None):
+        """
+        Args:
+            ids (array-like): (n,) IDs das pessoas.
+            bboxes (array-like): (n, 4) bboxes absolutas [x1, y1, x2, y2].
+            keypoints (array-like): (n, 17, 2) coordenadas absolutas (x, y) dos keypoints.
+            confiancas_keypoints (array-like, opcional): (n, 17) confiança de cada keypoint.
+                NaN indica um keypoint ausente; se omitido, todos têm confiança 1.
+            confiancas_bbox (array-like, opcional): (n,) confiança de cada detecção.
+        """
+        self.ids = np.asarray(ids, dtype=np.int32)
+        n = len(self.ids)
+        self.bboxes = np.asarray(bboxes, dtype=np.int32).reshape(n, 4)
+        keypoints = np.asarray(keypoints, dtype=np.int32)
+        # Sem pessoas, o número de keypoints não pode ser deduzido do tamanho do array
+        forma = (n, -1, 2) if n else (0, keypoints.shape[1] if keypoints.ndim == 3 else NUM_KEYPOINTS, 2)
+        self.keypoints = keypoints.reshape(forma)
+        if confiancas_keypoints is None:
+            confiancas_keypoints = np.ones(self.keypoints.shape[:2], dtype=np.float32)
+        self.confiancas_keypoints = np.asarray(confiancas_keypoints, dtype=np.float32).reshape(self.keypoints.shape[:2])
+        if confiancas_bbox is None:
+            confiancas_bbox = np.ones(n, dtype=np.float32)
+        self.confiancas_bbox = np.asarray(confiancas_bbox, dtype=np.float32).reshape(n)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def vazio(cls):
+        return cls(np.zeros(0), np.zeros((0, 4)), np.zeros((0, NUM_KEYPOINTS, 2)))
+
+    @classmethod
+    def de_pessoas(cls, pessoas):
+        """
+        Monta o contêiner a partir da lista de dicionários das pessoas.
+
+        Se os keypoints das pessoas forem as vistas geradas por `pessoas()` (mesmo
+        array base, mesma ordem), os arrays originais são reaproveitados sem cópia.
+        Aceita também o formato antigo (lista de dicionários por keypoint).
+        """
+        base = _base_compartilhada(pessoas)
+        if base is not None:
+            keypoints, confiancas = base
+        else:
+            pares = [keypoints_como_array(p) for p in pessoas]
+            keypoints = np.array([kp for kp, _ in pares]).reshape(len(pessoas), -1, 2)
+            confiancas = np.array([c for _, c in pares]).reshape(keypoints.shape[:2])
+        return cls([p['id'] for p in pessoas],
+                   [p.get('bbox', (0, 0, 0, 0)) for p in pessoas],
+                   keypoints, confiancas,
+                   [p.get('conf', 1.0) for p in pessoas])
+
+    def pessoas(self):
+        """
+        Retorna um dicionário por pessoa, no formato usado pelas etapas do pipeline.
+        'keypoints' e 'keypoints_conf' são vistas dos arrays deste contêiner.
+        """
+        return [{
+            "id": int(self.ids[i]),
+            "bbox": self.bboxes[i].tolist(), # [x1, y1, x2, y2]
+            "conf": float(self.confiancas_bbox[i]),
+            "keypoints": self.keypoints[i],
+            "keypoints_conf": self.confiancas_keypoints[i],
+        } for i in range(len(self))]
+
+    def para_dicts(self):
+        """Formato antigo, compatível com JSON: keypoints como lista de {"point_id", "x", "y", "conf"}."""
+        return [pessoa_para_json(p) for p in self.pessoas()]
+
+def tem_keypoints(pessoa):
+    """Indica se a pessoa possui keypoints (em qualquer um dos dois formatos)."""
+    keypoints = pessoa.get('keypoints')
+    return keypoints is not None and len(keypoints) > 0
+
+def keypoints_como_array(pessoa):
+    """
+    Retorna os keypoints da pessoa como arrays ((17, 2) int32, (17,) float32).
+
+    Se já estiverem no formato de arrays, devolve as vistas sem cópia. No formato
+    antigo (lista de dicionários), keypoints ausentes recebem confiança NaN e os
+    que não informam confiança recebem 1.
+    """
+    keypoints = pessoa.get('keypoints')
+    if isinstance(keypoints, np.ndarray):
+        confiancas = pessoa.get('keypoints_conf')
+        if confiancas is None:
+            confiancas = np.ones(len(keypoints), dtype=np.float32)
+        return keypoints, confiancas
+
+    xy = np.zeros((NUM_KEYPOINTS, 2), dtype=np.int32)
+    confiancas = np.full(NUM_KEYPOINTS, np.nan, dtype=np.float32)
+    for kp in keypoints or []:
+        indice = kp['point_id']
+        if 0 <= indice < NUM_KEYPOINTS:
+            xy[indice] = (kp['x'], kp['y'])
+            confiancas[indice] = kp.get('conf', 1.0)
+    return xy, confiancas
+
+def keypoints_para_dicts(keypoints, confiancas=None):
+    """Converte um array (17, 2) de keypoints para a lista de dicionários do formato antigo."""
+    lista = []
+    for indice, (x, y) in enumerate(np.asarray(keypoints).tolist()):
+        if confiancas is not None and np.isnan(confiancas[indice]):
+            continue # Keypoint ausente
+        kp = {"point_id": indice, "x": int(x), "y": int(y)}
+        if confiancas is not None:
+            kp["conf"] = float(confiancas[indice])
+        lista.append(kp)
+    return lista
+
+def pessoa_para_json(pessoa):
+    """Cópia rasa da pessoa com os keypoints no formato antigo (lista de dicionários)."""
+    if not isinstance(pessoa.get('keypoints'), np.ndarray):
+        return pessoa
+    pessoa = dict(pessoa)
+    pessoa['keypoints'] = keypoints_para_dicts(pessoa['keypoints'], pessoa.pop('keypoints_conf', None))
+    return pessoa
+
+def _base_compartilhada(pessoas):
+    """
+    Se os keypoints de todas as pessoas forem vistas consecutivas do mesmo array
+    (n, 17, 2), retorna (keypoints, confiancas) desse array; caso contrário, None.
+    """
+    if not pessoas:
+        return None
+    bases = []
+    for nome in ('keypoints', 'keypoints_conf'):
+        vistas = [p.get(nome) for p in pessoas]
+        base = getattr(vistas[0], 'base', None)
+        if (not isinstance(base, np.ndarray) or base.shape[:1] != (len(pessoas),)
+                or any(not isinstance(v, np.ndarray) or v.base is not base or base.shape[1:] != v.shape
+                       for v in vistas)):
+            return None
+        # Confere a ordem: a i-ésima pessoa deve apontar para a i-ésima linha da base
+        inicio = base.__array_interface__['data'][0]
+        if any(v.__array_interface__['data'][0] != inicio + i * base.strides[0] for i, v in enumerate(vistas)):
+            return None
+        bases.append(base)
+    return tuple(bases)
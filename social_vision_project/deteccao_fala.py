@@ -0,0 +1,133 @@
+
+import numpy as np
+
+class EstadoFala:
+    """
+    Estado incremental de fala de uma pessoa, a partir da série temporal da
+    abertura da boca ('razao_boca' da etapa 3).
+
+    Uma boca parada (fechada ou aberta) não indica fala; o que indica é a boca
+    abrindo e fechando repetidamente. O estado guarda as últimas
+    `tamanho_janela` razões em um buffer circular e mantém, de forma
+    incremental (O(1) por quadro), a soma, a soma dos quadrados e o número de
+    transições aberta/fechada da janela. A evidência de fala de cada quadro
+    combina o desvio padrão da abertura com o número de transições, e a
+    probabilidade é uma média móvel exponencial dessa evidência. `falando` usa
+    histerese para não alternar a cada quadro.
+    """
+
+    def __init__(self, tamanho_janela=15, limiar_abertura=0.25, desvio_fala=0.08, transicoes_fala=2,
+                 suavizacao=0.3, limiar_entrada=0.6, limiar_saida=0.4):
+        """
+        Args:
+            tamanho_janela (int): Quantos quadros formam a janela (~0.5 s a 30 FPS).
+            limiar_abertura (float): Razão acima da qual a boca é considerada aberta.
+            desvio_fala (float): Desvio padrão da razão a partir do qual a evidência é máxima.
+            transicoes_fala (int): Transições aberta/fechada na janela para evidência máxima.
+            suavizacao (float): Peso do quadro atual na média móvel da probabilidade.
+            limiar_entrada, limiar_saida (float): Histerese de `falando`.
+        """
+        self._razoes = np.zeros(tamanho_janela)
+        self._transicoes = np.zeros(tamanho_janela, dtype=bool)
+        self._posicao = 0
+        self._quantidade = 0
+        self._soma = 0.0
+        self._soma_quadrados = 0.0
+        self._num_transicoes = 0
+        self._aberta_anterior = None
+        self.limiar_abertura = limiar_abertura
+        self.desvio_fala = desvio_fala
+        self.transicoes_fala = transicoes_fala
+        self.suavizacao = suavizacao
+        self.limiar_entrada = limiar_entrada
+        self.limiar_saida = limiar_saida
+        self.probabilidade = 0.0
+        self.falando = False
+
+    def atualizar(self, razao_boca):
+        """
+        Acrescenta a razão de abertura do quadro atual e atualiza a probabilidade de fala.
+        Sem medição (None), a probabilidade decai em direção a zero.
+
+        Returns:
+            float: A probabilidade suavizada de fala.
+        """
+        if razao_boca is None:
+            evidencia = 0.0
+        else:
+            tamanho_janela = len(self._razoes)
+            if self._quantidade == tamanho_janela:
+                # Remove a contribuição do valor mais antigo, que será sobrescrito
+                antiga = self._razoes[self._posicao]
+                self._soma -= antiga
+                self._soma_quadrados -= antiga * antiga
+                self._num_transicoes -= int(self._transicoes[self._posicao])
+            else:
+                self._quantidade += 1
+
+            aberta = razao_boca > self.limiar_abertura
+            transicao = self._aberta_anterior is not None and aberta != self._aberta_anterior
+            self._aberta_anterior = aberta
+
+            self._razoes[self._posicao] = razao_boca
+            self._transicoes[self._posicao] = transicao
+            self._soma += razao_boca
+            self._soma_quadrados += razao_boca * razao_boca
+            self._num_transicoes += int(transicao)
+            self._posicao = (self._posicao + 1) % tamanho_janela
+
+            media = self._soma / self._quantidade
+            desvio = np.sqrt(max(self._soma_quadrados / self._quantidade - media * media, 0.0))
+            evidencia = min(desvio / self.desvio_fala, 1.0) * min(self._num_transicoes / self.transicoes_fala, 1.0)
+
+        self.probabilidade += self.suavizacao * (evidencia - self.probabilidade)
+        if self.falando:
+            self.falando = self.probabilidade >= self.limiar_saida
+        else:
+            self.falando = self.probabilidade >= self.limiar_entrada
+        return self.probabilidade
+
+class DetectorFala:
+    """
+    Mantém um EstadoFala por trilha (ID persistente do RastreadorPessoas) e
+    descarta os estados de trilhas que não aparecem há `max_quadros_ausente` quadros.
+    """
+
+    def __init__(self, tamanho_janela=15, max_quadros_ausente=30):
+        self.tamanho_janela = tamanho_janela
+        self.max_quadros_ausente = max_quadros_ausente
+        self._estados = {}
+        self._ultimo_quadro = {}
+        self._quadro = 0
+
+    def atualizar(self, deteccoes):
+        """
+        Atualiza o estado de cada pessoa com a 'razao_boca' do quadro atual.
+
+        Pessoas cujas expressões foram reaproveitadas de um quadro anterior
+        ('expressoes_reaproveitadas') não acrescentam uma nova amostra: a
+        probabilidade anterior é mantida.
+
+        Args:
+            deteccoes (list): Detecções do quadro, com IDs persistentes.
+
+        Returns:
+            list: As detecções com 'probabilidade_fala' e 'falando'.
+        """
+        self._quadro += 1
+        for pessoa in deteccoes:
+            estado = self._estados.get(pessoa['id'])
+            if estado is None:
+                estado = self._estados[pessoa['id']] = EstadoFala(self.tamanho_janela)
+            self._ultimo_quadro[pessoa['id']] = self._quadro
+
+            if not pessoa.get('expressoes_reaproveitadas'):
+                estado.atualizar((pessoa.get('expressoes') or {}).get('razao_boca'))
+            pessoa['probabilidade_fala'] = estado.probabilidade
+            pessoa['falando'] = estado.falando
+
+        for id_trilha in [i for i, q in self._ultimo_quadro.items() if self._quadro - q > self.max_quadros_ausente]:
+            del self._estados[id_trilha]
+            del self._ultimo_quadro[id_trilha]
+
+        return deteccoes
@@ -1,84 +1,226 @@
 
-import cv2
-import face_recognition
 import json
+import logging
 import numpy as np
 
-def detectar_faces(image_path, deteccoes_pessoas):
+from quadro import Quadro
+from modelos import obter_modelo
+from configuracao import CONFIGURACAO_PADRAO
+from deteccao import tem_keypoints, keypoints_como_array
+from paralelismo import mapear_por_pessoa
+from serializacao import converter_para_json, preparar_para_json
+from instrumentacao import METRICAS
+
+logger = logging.getLogger(__name__)
+
+def detectar_faces(image_path, deteccoes_pessoas, config=None):
     """
     Detecta faces nas áreas das pessoas detectadas.
 
     Args:
         image_path (str): Caminho para a imagem original.
         deteccoes_pessoas (list): Lista de dicionários com as detecções de pessoas.
+        config (ConfiguracaoPipeline, opcional): Opções da etapa.
 
     Returns:
         list: A lista de detecções de pessoas atualizada com informações das faces.
     """
-    img = cv2.imread(image_path)
-    if img is None:
-        print(f"Erro ao ler a imagem: {image_path}")
+    quadro = Quadro.de_arquivo(image_path)
+    if quadro is None:
+        logger.error("Erro ao ler a imagem: %s", image_path)
         return deteccoes_pessoas
 
-    # Converte a imagem de BGR (OpenCV) para RGB (face_recognition)
-    img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    return detectar_faces_quadro(quadro, deteccoes_pessoas, config)
 
-    for pessoa in deteccoes_pessoas:
-        # Extrai a bounding box da pessoa
-        x1, y1, x2, y2 = pessoa['bbox']
-        # Garante que as coordenadas estão dentro dos limites da imagem
-        x1, y1 = max(0, x1), max(0, y1)
-        x2, y2 = min(img.shape[1], x2), min(img.shape[0], y2)
-        
-        roi_pessoa = img_rgb[y1:y2, x1:x2].copy()
+def detectar_faces_quadro(quadro, deteccoes_pessoas, config=None):
+    """
+    Detecta faces nas áreas das pessoas detectadas, a partir de um quadro já decodificado.
 
-        if roi_pessoa.size == 0:
-            pessoa['face_info'] = None
-            continue
-            
-        print(f"Debug (Pessoa ID {pessoa['id']}): ROI shape: {roi_pessoa.shape}, ROI dtype: {roi_pessoa.dtype}")
+    Args:
+        quadro (Quadro): A imagem original, decodificada uma única vez.
+        deteccoes_pessoas (list): Lista de dicionários com as detecções de pessoas.
+        config (ConfiguracaoPipeline, opcional): Opções da etapa: modo de localização
+            da face (`modo_localizacao_face`), faixa de tamanho da região em que o dlib
+            procura a face (`lado_minimo_roi_hog`, `lado_maximo_roi_hog`) e se o
+            embedding facial deve ser calculado (`calcular_encoding_facial`).
 
-        face_locations = face_recognition.face_locations(roi_pessoa, model="hog") 
-        
-        # --- DEBUG ---
-        print(f"Debug (Pessoa ID {pessoa['id']}): Encontradas {len(face_locations)} faces com o modelo 'hog'.")
-
-        if not face_locations:
-            pessoa['face_info'] = None
-            continue
-
-        face_encodings = face_recognition.face_encodings(roi_pessoa, face_locations)
-
-        if face_encodings:
-            # Pega a maior face encontrada na ROI, caso haja mais de uma
-            main_face_loc = max(face_locations, key=lambda rect: (rect[2] - rect[0]) * (rect[3] - rect[1]))
-            main_face_encoding = face_encodings[face_locations.index(main_face_loc)]
-
-            top, right, bottom, left = main_face_loc
-            face_bbox_abs = [left + x1, top + y1, right + x1, bottom + y1]
-            
-            pessoa['face_info'] = {
-                "face_bbox": face_bbox_abs,
-                "face_encoding": main_face_encoding.tolist() # Converte para lista para ser serializável em JSON
-            }
-        else:
-            pessoa['face_info'] = None # Nenhuma face encontrada para esta pessoa
+    Returns:
+        list: A lista de detecções de pessoas atualizada com informações das faces.
+    """
+    config = config or CONFIGURACAO_PADRAO
+
+    # Uma pessoa por vez ou, com `config.threads_por_pessoa` > 1, em paralelo (ordem preservada)
+    def detectar_pessoa(pessoa):
+        # Os modelos do dlib são carregados no primeiro uso, e não ao importar este módulo:
+        # uma instância por thread, pois os detectores não aceitam chamadas simultâneas
+        with METRICAS.cronometrar("faces_por_pessoa"):
+            return _detectar_face_pessoa(quadro, pessoa, config, _obter_dlib(config))
+
+    faces = mapear_por_pessoa(detectar_pessoa, deteccoes_pessoas, config.threads_por_pessoa)
+    for pessoa, face_info in zip(deteccoes_pessoas, faces):
+        pessoa['face_info'] = face_info
 
     return deteccoes_pessoas
 
+def detectar_face_pessoa(quadro, pessoa, config=None):
+    """
+    Localiza a face de uma única pessoa. As pessoas são independentes entre si,
+    então esta função pode ser chamada para várias pessoas em paralelo.
+
+    Returns:
+        dict: O face_info da pessoa, ou None se nenhuma face for encontrada.
+    """
+    config = config or CONFIGURACAO_PADRAO
+    with METRICAS.cronometrar("faces_por_pessoa"):
+        return _detectar_face_pessoa(quadro, pessoa, config, _obter_dlib(config))
+
+# Keypoints da cabeça no formato COCO (YOLOv8-Pose)
+NARIZ, OLHO_ESQ, OLHO_DIR, ORELHA_ESQ, ORELHA_DIR = 0, 1, 2, 3, 4
+
+def estimar_bbox_cabeca(keypoints, confiancas, limiar_confianca=0.5, shape=None):
+    """
+    Estima a bbox da face a partir dos keypoints da cabeça (nariz, olhos e orelhas).
+
+    Args:
+        keypoints (np.ndarray): (17, 2) coordenadas dos keypoints da pessoa.
+        confiancas (np.ndarray): (17,) confiança de cada keypoint (NaN = ausente).
+        limiar_confianca (float): Confiança mínima para um keypoint ser considerado.
+        shape (tuple, opcional): Dimensões da imagem, para limitar a bbox às bordas.
+
+    Returns:
+        list: [x1, y1, x2, y2] da face, ou None se os keypoints não forem confiáveis.
+    """
+    pontos = {}
+    for indice in range(ORELHA_DIR + 1):
+        # O YOLO marca keypoints não visíveis com coordenadas (0, 0)
+        if confiancas[indice] >= limiar_confianca and keypoints[indice].any():
+            pontos[indice] = keypoints[indice].astype(np.float32)
+
+    if NARIZ not in pontos or len(pontos) < 3:
+        return None
+
+    # O tamanho da face é estimado pela maior das distâncias disponíveis,
+    # com fatores aproximados das proporções de um rosto frontal.
+    estimativas = []
+    if ORELHA_ESQ in pontos and ORELHA_DIR in pontos:
+        estimativas.append(np.linalg.norm(pontos[ORELHA_ESQ] - pontos[ORELHA_DIR]) * 1.2)
+    if OLHO_ESQ in pontos and OLHO_DIR in pontos:
+        estimativas.append(np.linalg.norm(pontos[OLHO_ESQ] - pontos[OLHO_DIR]) * 2.5)
+    for orelha in (ORELHA_ESQ, ORELHA_DIR):
+        # Rosto de perfil: a distância orelha-nariz cobre cerca de metade da face
+        if orelha in pontos:
+            estimativas.append(np.linalg.norm(pontos[orelha] - pontos[NARIZ]) * 1.8)
+    if not estimativas:
+        return None
+    lado = max(estimativas)
+    if lado < 1:
+        return None
+
+    olhos = [pontos[i] for i in (OLHO_ESQ, OLHO_DIR) if i in pontos]
+    centro_x = np.mean([p[0] for p in pontos.values()])
+    # O centro da face fica um pouco abaixo da linha dos olhos, próximo ao nariz
+    centro_y = (np.mean([p[1] for p in olhos]) if olhos else pontos[NARIZ][1]) + 0.15 * lado
+
+    x1, y1 = int(centro_x - lado / 2), int(centro_y - lado / 2)
+    x2, y2 = int(centro_x + lado / 2), int(centro_y + lado / 2)
+    if shape is not None:
+        x1, y1 = max(0, x1), max(0, y1)
+        x2, y2 = min(shape[1], x2), min(shape[0], y2)
+        if x2 <= x1 or y2 <= y1:
+            return None
+    return [x1, y1, x2, y2]
+
+def _obter_dlib(config):
+    """Os modelos do dlib desta thread, ou None se a configuração não os usa (só keypoints, sem encoding)."""
+    if config.modo_localizacao_face == "somente_keypoints" and not config.calcular_encoding_facial:
+        return None
+    return obter_modelo('face_recognition')
+
+def _localizar_face_dlib(quadro, regiao, face_recognition, modelo="hog", lado_minimo=0, lado_maximo=0):
+    """
+    Executa o detector do dlib ("hog" ou "cnn") em uma região do quadro e retorna a bbox
+    absoluta da face principal, ou None. A região é ampliada ou reduzida para que o maior
+    lado fique entre `lado_minimo` e `lado_maximo` (0 = sem limite) antes da busca.
+    """
+    x1, y1, x2, y2 = regiao
+    if x2 <= x1 or y2 <= y1:
+        return None
+    # Recorte RGB contíguo, já no tamanho da busca (uma única cópia)
+    roi, escala = quadro.recorte_rgb(regiao, lado_minimo, lado_maximo)
+
+    face_locations = face_recognition.face_locations(roi, model=modelo)
+
+    if not face_locations:
+        return None
+
+    # Pega a maior face encontrada na ROI, caso haja mais de uma
+    top, right, bottom, left = max(face_locations, key=lambda rect: (rect[2] - rect[0]) * (rect[3] - rect[1]))
+    return [int(left / escala) + x1, int(top / escala) + y1, int(right / escala) + x1, int(bottom / escala) + y1]
+
+def _detectar_face_pessoa(quadro, pessoa, config, face_recognition):
+    """Localiza a face principal de uma pessoa. Retorna o face_info ou None."""
+    # Extrai a bounding box da pessoa
+    x1, y1, x2, y2 = pessoa['bbox']
+    # Garante que as coordenadas estão dentro dos limites da imagem
+    x1, y1 = max(0, x1), max(0, y1)
+    x2, y2 = min(quadro.largura, x2), min(quadro.altura, y2)
+
+    if x2 <= x1 or y2 <= y1:
+        return None
+
+    face_bbox = None
+    modo = config.modo_localizacao_face
+    origem = "cnn" if modo == "cnn" else "hog"
+    if modo in ("keypoints", "somente_keypoints"):
+        if tem_keypoints(pessoa):
+            keypoints, confiancas = keypoints_como_array(pessoa)
+            face_bbox = estimar_bbox_cabeca(keypoints, confiancas, config.limiar_confianca_keypoints,
+                                            quadro.bgr.shape)
+        if face_bbox is not None:
+            origem = "keypoints"
+        elif modo == "keypoints":
+            # Keypoints da cabeça pouco confiáveis: HOG em resolução reduzida
+            face_bbox = _localizar_face_dlib(quadro, (x1, y1, x2, y2), face_recognition, "hog",
+                                             config.lado_minimo_roi_hog, config.lado_maximo_hog)
+    else:
+        logger.debug("Pessoa ID %s: ROI shape %s", pessoa['id'], (y2 - y1, x2 - x1))
+        face_bbox = _localizar_face_dlib(quadro, (x1, y1, x2, y2), face_recognition, origem,
+                                         config.lado_minimo_roi_hog, config.lado_maximo_roi_hog)
+
+    logger.debug("Pessoa ID %s: face %s (modo '%s').", pessoa['id'], 'encontrada' if face_bbox else 'não encontrada', origem)
+    METRICAS.contar("faces_encontradas" if face_bbox else "faces_nao_encontradas")
+    if face_bbox is not None and origem == "keypoints":
+        METRICAS.contar("faces_por_keypoints")
+
+    if face_bbox is None:
+        return None # Nenhuma face encontrada para esta pessoa
+
+    face_info = {"face_bbox": face_bbox, "origem": origem}
+
+    if config.calcular_encoding_facial:
+        # Calcula o embedding (ResNet do dlib) apenas para a face principal e o mantém
+        # como array float32 compacto; serializacao.converter_para_json o converte para JSON.
+        fx1, fy1, fx2, fy2 = face_bbox
+        face_encodings = face_recognition.face_encodings(quadro.rgb, [(fy1, fx2, fy2, fx1)])
+        if not face_encodings:
+            return None
+        face_info["face_encoding"] = np.asarray(face_encodings[0], dtype=np.float32)
+
+    return face_info
+
 def carregar_dados_json(json_path):
     """Carrega dados de um arquivo JSON."""
     try:
         with open(json_path, 'r') as f:
             return json.load(f)
     except FileNotFoundError:
-        print(f"Arquivo JSON não encontrado: {json_path}")
+        logger.error("Arquivo JSON não encontrado: %s", json_path)
         return []
 
 def salvar_resultado_json(data, output_path):
     """Salva os dados em um arquivo JSON."""
     with open(output_path, 'w') as f:
-        json.dump(data, f, indent=4)
+        json.dump(preparar_para_json(data), f, indent=4, default=converter_para_json)
 
 if __name__ == '__main__':
     caminho_imagem = 'C:/Users/juanm/Desktop/G_CLI-1.0/social_vision_project/sample_image.jpg'
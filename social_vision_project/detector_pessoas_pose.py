@@ -1,12 +1,35 @@
 
 import cv2
 import json
-from ultralytics import YOLO
+import logging
 import numpy as np
 
-# Carrega o modelo YOLOv8 Pose pré-treinado
-model_path = 'yolov8n-pose.pt'
-model = YOLO(model_path)
+from quadro import Quadro, obter_quadro
+from modelos import obter_modelo
+from configuracao import CONFIGURACAO_PADRAO
+from inferencia_pose import modelo_padrao
+from deteccao import DeteccoesPose
+from serializacao import converter_para_json, preparar_para_json
+from instrumentacao import METRICAS
+
+logger = logging.getLogger(__name__)
+
+def __getattr__(nome):
+    # Compatibilidade: `detector_pessoas_pose.model` continua disponível, mas o
+    # modelo YOLOv8 Pose só é carregado no primeiro acesso (ver modelos.py).
+    if nome == 'model':
+        return obter_detector_pose().modelo
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+
+def parametros_modelo_pose(config=None):
+    """Parâmetros de `obter_modelo('yolo_pose')` para o backend escolhido na configuração."""
+    config = config or CONFIGURACAO_PADRAO
+    caminho = config.modelo_pose or modelo_padrao(config.backend_pose, config.variante_pose)
+    return {"backend": config.backend_pose, "caminho": caminho, "threads": config.threads_pose}
+
+def obter_detector_pose(config=None):
+    """O backend do YOLOv8 Pose (ver inferencia_pose.py), criado no primeiro uso."""
+    return obter_modelo('yolo_pose', **parametros_modelo_pose(config))
 
 def detectar_pessoas_e_poses(image_path):
     """
@@ -18,54 +41,120 @@ def detectar_pessoas_e_poses(image_path):
     Returns:
         list: Uma lista de dicionários, onde cada dicionário contém
               informações sobre uma pessoa detectada (ID, bbox, keypoints).
+              'keypoints' é um array (17, 2) e 'keypoints_conf' um array (17,);
+              use `deteccao.pessoa_para_json` para obter o formato de dicionários.
     """
     # Lê a imagem
-    img = cv2.imread(image_path)
-    if img is None:
-        print(f"Erro: Não foi possível ler a imagem em {image_path}")
+    quadro = Quadro.de_arquivo(image_path)
+    if quadro is None:
+        logger.error("Não foi possível ler a imagem em %s", image_path)
         return []
 
+    return detectar_pessoas_e_poses_quadro(quadro)
+
+def detectar_pessoas_e_poses_quadro(quadro, config=None):
+    """
+    Detecta pessoas e suas poses em um quadro já decodificado.
+
+    Args:
+        quadro (Quadro): A imagem de entrada, decodificada uma única vez.
+        config (ConfiguracaoPipeline, opcional): `lado_maximo_pose` define a resolução
+            do quadro reduzido enviado ao modelo.
+
+    Returns:
+        list: Uma lista de dicionários com as pessoas detectadas (ID, bbox, keypoints),
+              em coordenadas do quadro original.
+    """
+    config = config or CONFIGURACAO_PADRAO
+    img, _ = quadro.reduzido(config.lado_maximo_pose)
+
     # Executa a inferência do modelo na imagem
-    results = model(img, verbose=False)
-
-    pessoas_detectadas = []
-    # Itera sobre os resultados da detecção
-    for i, r in enumerate(results):
-        if r.boxes and r.keypoints:
-            # Extrai as bounding boxes e os keypoints
-            boxes = r.boxes.xyxyn.cpu().numpy()  
-            keypoints = r.keypoints.xyn.cpu().numpy()  
-
-            for person_idx in range(len(boxes)): 
-                h, w, _ = img.shape
-                bbox_abs = [
-                    int(boxes[person_idx][0] * w),
-                    int(boxes[person_idx][1] * h),
-                    int(boxes[person_idx][2] * w),
-                    int(boxes[person_idx][3] * h)
-                ]
-                
-                kpts_abs = []
-                for kp_idx in range(keypoints[person_idx].shape[0]):
-                    kpts_abs.append({
-                        "point_id": kp_idx,
-                        "x": int(keypoints[person_idx][kp_idx][0] * w),
-                        "y": int(keypoints[person_idx][kp_idx][1] * h)
-                    })
-
-                pessoa_info = {
-                    "id": person_idx,
-                    "bbox": bbox_abs, # [x1, y1, x2, y2]
-                    "keypoints": kpts_abs
-                }
-                pessoas_detectadas.append(pessoa_info)
-
-    return pessoas_detectadas
+    poses, = obter_detector_pose(config).detectar([img], config.tamanho_entrada_pose)
+
+    # As coordenadas normalizadas são convertidas para a resolução original,
+    # e não para a do quadro reduzido
+    return _converter_resultado(poses, quadro.bgr.shape)
+
+def detectar_pessoas_e_poses_lote(imagens, tamanho_lote=8, config=None):
+    """
+    Detecta pessoas e poses em várias imagens, enviando-as ao modelo em lotes.
+
+    Args:
+        imagens (iterable): Lista ou iterador de caminhos, ndarrays BGR ou Quadros.
+        tamanho_lote (int): Quantidade de imagens por chamada ao modelo.
+        config (ConfiguracaoPipeline, opcional): Resolução máxima enviada ao modelo (`lado_maximo_pose`).
+
+    Returns:
+        list: Uma lista de detecções (no mesmo formato de `detectar_pessoas_e_poses`)
+              para cada imagem, na ordem de entrada. Imagens ilegíveis resultam em [].
+    """
+    return list(iterar_pessoas_e_poses_em_lote(imagens, tamanho_lote, config))
+
+def iterar_pessoas_e_poses_em_lote(imagens, tamanho_lote=8, config=None):
+    """
+    Versão preguiçosa de `detectar_pessoas_e_poses_lote`: consome o iterador de
+    entrada um lote por vez e produz as detecções de cada imagem em ordem, sem
+    manter o acervo inteiro na memória.
+
+    Yields:
+        list: As detecções de cada imagem de entrada.
+    """
+    config = config or CONFIGURACAO_PADRAO
+    lote = []
+    for fonte in imagens:
+        lote.append(obter_quadro(fonte))
+        if len(lote) >= tamanho_lote:
+            yield from _detectar_lote(lote, config)
+            lote = []
+    if lote:
+        yield from _detectar_lote(lote, config)
+
+def _detectar_lote(quadros, config):
+    """Executa uma única inferência para todos os quadros válidos do lote."""
+    validos = [q.reduzido(config.lado_maximo_pose)[0] for q in quadros if q is not None]
+    results = []
+    if validos:
+        # Uma única chamada: o pré-processamento (letterbox + empilhamento) é feito
+        # de uma vez para o lote inteiro e a rede roda sobre um único tensor
+        # (nos grafos exportados com lote fixo em 1, uma inferência por imagem).
+        results = obter_detector_pose(config).detectar(validos, config.tamanho_entrada_pose)
+
+    results = iter(results)
+    for quadro in quadros:
+        if quadro is None:
+            yield []
+        else:
+            yield _converter_resultado(next(results), quadro.bgr.shape)
+
+def _converter_resultado(poses, shape):
+    """
+    Converte as detecções normalizadas de um backend, (caixas, confiancas, keypoints,
+    confiancas_keypoints), em uma lista de dicionários com coordenadas absolutas.
+
+    As coordenadas de todas as pessoas são convertidas de uma vez para um
+    `DeteccoesPose`; os dicionários guardam vistas dos seus arrays.
+    """
+    boxes, confiancas_bbox, keypoints, confiancas = poses
+    if not len(boxes):
+        return []
+
+    h, w = shape[:2]
+    METRICAS.contar("pessoas_detectadas", len(boxes))
+
+    escala = np.array([w, h], dtype=np.float32)
+    deteccoes = DeteccoesPose(
+        ids=np.arange(len(boxes)),
+        bboxes=(boxes.reshape(-1, 2, 2) * escala).astype(np.int32).reshape(-1, 4), # [x1, y1, x2, y2]
+        keypoints=(keypoints * escala).astype(np.int32),
+        confiancas_keypoints=confiancas,
+        confiancas_bbox=confiancas_bbox,
+    )
+    return deteccoes.pessoas()
 
 def salvar_resultado_json(data, output_path):
     """Salva os dados em um arquivo JSON."""
     with open(output_path, 'w') as f:
-        json.dump(data, f, indent=4)
+        json.dump(preparar_para_json(data), f, indent=4, default=converter_para_json)
 
 if __name__ == '__main__':
     caminho_imagem_teste = 'C:/Users/juanm/Desktop/G_CLI-1.0/social_vision_project/sample_image.jpg' # Crie ou adicione uma imagem aqui
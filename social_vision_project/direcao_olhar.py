@@ -1,7 +1,13 @@
 
 import json
+import logging
 import numpy as np
 
+from deteccao import tem_keypoints, keypoints_como_array
+from serializacao import converter_para_json, preparar_para_json
+
+logger = logging.getLogger(__name__)
+
 def estimar_vetor_olhar(keypoints_pessoa):
     """
     Estima um vetor de direção do olhar (simplificado).
@@ -40,57 +46,72 @@ def analisar_direcao_olhar(deteccoes):
     """
     Analisa para onde cada pessoa está olhando.
 
+    Os vetores de olhar e os centros de todas as pessoas são empacotados em
+    arrays (n, 2) e os ângulos entre cada vetor de olhar e cada direção
+    pessoa -> alvo são calculados de uma vez, em vez de par a par. O alvo
+    escolhido é o de menor ângulo dentro do cone de 30 graus, como antes.
+
     Args:
         deteccoes (list): Lista de detecções de pessoas.
 
     Returns:
         list: A lista de detecções atualizada com a informação do alvo do olhar.
     """
+    n = len(deteccoes)
+    centros = np.zeros((n, 2))
+    tem_centro = np.zeros(n, dtype=bool)
+    pontos_cabeca = np.zeros((n, 3, 2))
+    tem_olhar = np.zeros(n, dtype=bool)
+
     # Primeiro, calcula o centro de cada pessoa (usando a bbox)
-    for pessoa in deteccoes:
+    for i, pessoa in enumerate(deteccoes):
+        pessoa['olhando_para_id'] = None
         if 'bbox' in pessoa:
             x1, y1, x2, y2 = pessoa['bbox']
             pessoa['centro'] = np.array([(x1 + x2) / 2, (y1 + y2) / 2])
+            centros[i] = pessoa['centro']
+            tem_centro[i] = True
         else:
             pessoa['centro'] = None
-
-    # Agora, analisa o olhar de cada pessoa
-    for i, pessoa_olhando in enumerate(deteccoes):
-        pessoa_olhando['olhando_para_id'] = None
-        
-        if 'keypoints' not in pessoa_olhando or not pessoa_olhando['keypoints'] or pessoa_olhando['centro'] is None:
-            continue
-
-        keypoints_dict = {kp['point_id']: kp for kp in pessoa_olhando['keypoints']}
-        vetor_olhar = estimar_vetor_olhar(keypoints_dict)
-
-        if vetor_olhar is None:
             continue
 
-        melhor_alvo_id = -1
-        menor_angulo = np.pi # Inicia com 180 graus
-
-        # Verifica para quem a pessoa pode estar olhando
-        for j, pessoa_alvo in enumerate(deteccoes):
-            if i == j or pessoa_alvo['centro'] is None: # Não pode olhar para si mesma
-                continue
-
-            # Vetor da pessoa que olha para o alvo
-            vetor_para_alvo = pessoa_alvo['centro'] - pessoa_olhando['centro']
-            norma = np.linalg.norm(vetor_para_alvo)
-            if norma == 0:
-                continue
-            vetor_para_alvo_norm = vetor_para_alvo / norma
-
-            cos_theta = np.dot(vetor_olhar, vetor_para_alvo_norm)
-            angulo = np.arccos(np.clip(cos_theta, -1.0, 1.0)) # Clip para evitar erros de precisão
-
-            if angulo < np.pi / 6 and angulo < menor_angulo:
-                menor_angulo = angulo
-                melhor_alvo_id = pessoa_alvo['id']
-        
-        if melhor_alvo_id != -1:
-            pessoa_olhando['olhando_para_id'] = melhor_alvo_id
+        if tem_keypoints(pessoa):
+            # Nariz e olhos; um keypoint ausente (confiança NaN) impede o cálculo do olhar
+            keypoints, confiancas = keypoints_como_array(pessoa)
+            if not np.isnan(confiancas[:3]).any():
+                pontos_cabeca[i] = keypoints[:3]
+                tem_olhar[i] = True
+
+    if n < 2 or not tem_olhar.any():
+        return deteccoes
+
+    # Vetores de olhar (n, 2): do centro dos olhos para o nariz, normalizados
+    centro_olhos = (pontos_cabeca[:, 1] + pontos_cabeca[:, 2]) / 2
+    vetores_olhar = pontos_cabeca[:, 0] - centro_olhos
+    normas_olhar = np.sqrt(vetores_olhar[:, 0] * vetores_olhar[:, 0] + vetores_olhar[:, 1] * vetores_olhar[:, 1])
+    tem_olhar &= normas_olhar != 0
+    vetores_olhar = np.divide(vetores_olhar, normas_olhar[:, None], out=np.zeros_like(vetores_olhar),
+                              where=normas_olhar[:, None] != 0)
+
+    # Direções (n, n, 2) de cada pessoa que olha (linha) para cada alvo (coluna)
+    vetores_para_alvo = centros[None, :, :] - centros[:, None, :]
+    normas_alvo = np.sqrt(vetores_para_alvo[..., 0] * vetores_para_alvo[..., 0] +
+                          vetores_para_alvo[..., 1] * vetores_para_alvo[..., 1])
+    validos = (normas_alvo != 0) & tem_olhar[:, None] & tem_centro[:, None] & tem_centro[None, :]
+    np.fill_diagonal(validos, False) # Não pode olhar para si mesma
+    vetores_para_alvo = np.divide(vetores_para_alvo, normas_alvo[..., None], out=np.zeros_like(vetores_para_alvo),
+                                  where=normas_alvo[..., None] != 0)
+
+    cos_theta = (vetores_olhar[:, None, 0] * vetores_para_alvo[..., 0] +
+                 vetores_olhar[:, None, 1] * vetores_para_alvo[..., 1])
+    angulos = np.arccos(np.clip(cos_theta, -1.0, 1.0)) # Clip para evitar erros de precisão
+    angulos[~validos] = np.inf
+
+    # Menor ângulo de cada linha; em caso de empate, argmin mantém o primeiro alvo, como o laço original
+    melhores = np.argmin(angulos, axis=1)
+    menores_angulos = angulos[np.arange(n), melhores]
+    for olhando in np.flatnonzero(menores_angulos < np.pi / 6):
+        deteccoes[olhando]['olhando_para_id'] = deteccoes[melhores[olhando]]['id']
 
     return deteccoes
 
@@ -100,13 +121,13 @@ def carregar_dados_json(json_path):
         with open(json_path, 'r') as f:
             return json.load(f)
     except FileNotFoundError:
-        print(f"Arquivo JSON não encontrado: {json_path}")
+        logger.error("Arquivo JSON não encontrado: %s", json_path)
         return []
 
 def salvar_resultado_json(data, output_path):
     """Salva os dados em um arquivo JSON."""
     with open(output_path, 'w') as f:
-        json.dump(data, f, indent=4)
+        json.dump(preparar_para_json(data), f, indent=4, default=converter_para_json)
 
 if __name__ == '__main__':
     caminho_gestos_json = 'C:/Users/juanm/Desktop/G_CLI-1.0/social_vision_project/gestos.json'
@@ -0,0 +1,83 @@
+
+import threading
+import time
+
+from rastreador import movimento_relativo
+
+class EscalonadorEtapas:
+    """
+    Decide, quadro a quadro, quais etapas caras precisam ser executadas.
+
+    Cada etapa tem uma cadência (executa a cada N quadros). Etapas por pessoa
+    (faces, expressões) são escalonadas por trilha: além da cadência, uma
+    mudança da bbox acima de `limiar_movimento` desde a última execução
+    antecipa o cálculo. Nos quadros intermediários, o resultado guardado da
+    última execução (`guardar`/`obter`) é reaproveitado. O escalonador também
+    conta execuções e oportunidades, para relatar a taxa efetiva de cada etapa.
+    """
+
+    def __init__(self, cadencias=None, limiar_movimento=0.0):
+        """
+        Args:
+            cadencias (dict, opcional): {etapa: N}. Etapas ausentes rodam em todo quadro.
+            limiar_movimento (float): Mudança relativa da bbox (rastreador.movimento_relativo)
+                que força a execução de uma etapa por pessoa. 0 desativa o gatilho.
+        """
+        self.cadencias = dict(cadencias or {})
+        self.limiar_movimento = limiar_movimento
+        self._lock = threading.Lock()
+        # (etapa, chave) -> [índice do quadro, bbox, resultado] da última execução
+        self._ultimas = {}
+        self.execucoes = {}
+        self.oportunidades = {}
+        self.inicio = time.perf_counter()
+
+    def deve_executar(self, etapa, indice_quadro, chave=None, bbox=None, forcar=False):
+        """
+        Indica se `etapa` deve rodar neste quadro para `chave` (ID da trilha, ou None
+        para etapas por quadro) e, em caso afirmativo, registra a execução.
+        """
+        cadencia = self.cadencias.get(etapa, 1)
+        ultima = self._ultimas.get((etapa, chave))
+        executar = (forcar or cadencia <= 1 or ultima is None or indice_quadro - ultima[0] >= cadencia
+                    or (bbox is not None and ultima[1] is not None and self.limiar_movimento > 0
+                        and movimento_relativo(ultima[1], bbox) > self.limiar_movimento))
+        if executar:
+            self._ultimas[(etapa, chave)] = [indice_quadro, bbox, None]
+
+        with self._lock:
+            self.oportunidades[etapa] = self.oportunidades.get(etapa, 0) + 1
+            if executar:
+                self.execucoes[etapa] = self.execucoes.get(etapa, 0) + 1
+        return executar
+
+    def guardar(self, etapa, chave, resultado):
+        """Guarda o resultado da execução registrada por `deve_executar`."""
+        ultima = self._ultimas.get((etapa, chave))
+        if ultima is not None:
+            ultima[2] = resultado
+
+    def obter(self, etapa, chave):
+        """Retorna (bbox, resultado) da última execução de `etapa` para `chave`, ou (None, None)."""
+        ultima = self._ultimas.get((etapa, chave))
+        return (ultima[1], ultima[2]) if ultima is not None else (None, None)
+
+    def descartar_antigos(self, etapa, indice_quadro, idade_maxima):
+        """Esquece os resultados de `etapa` não atualizados há mais de `idade_maxima` quadros."""
+        for chave in [c for c, u in self._ultimas.items() if c[0] == etapa and indice_quadro - u[0] > idade_maxima]:
+            del self._ultimas[chave]
+
+    def relatorio(self):
+        """
+        Returns:
+            dict: {etapa: {"execucoes", "oportunidades", "fracao", "por_segundo"}}, em que
+                  "fracao" é a parte dos quadros (ou pessoa-quadros) em que a etapa rodou.
+        """
+        decorrido = time.perf_counter() - self.inicio
+        with self._lock:
+            return {etapa: {
+                "execucoes": self.execucoes.get(etapa, 0),
+                "oportunidades": oportunidades,
+                "fracao": self.execucoes.get(etapa, 0) / oportunidades if oportunidades else 0.0,
+                "por_segundo": self.execucoes.get(etapa, 0) / decorrido if decorrido > 0 else 0.0,
+            } for etapa, oportunidades in self.oportunidades.items()}
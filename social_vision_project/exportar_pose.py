@@ -0,0 +1,223 @@
+import argparse
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from analise_lote import listar_imagens
+from geometria import matriz_iou, associar_gulosamente
+from inferencia_pose import BACKENDS_POSE, TAMANHO_ENTRADA_PADRAO, criar_backend, letterbox, modelo_padrao
+from instrumentacao import configurar_logging
+
+# Exporta o YOLOv8 Pose para os backends sem PyTorch (ver inferencia_pose.py), gera a
+# variante INT8 para o ONNX Runtime e compara as detecções de cada backend com as do PyTorch.
+
+def exportar(pesos="yolov8n-pose.pt", formatos=("onnx", "openvino"), tamanho=TAMANHO_ENTRADA_PADRAO):
+    """
+    Exporta os pesos do ultralytics para ONNX e/ou OpenVINO (lote 1, entrada `tamanho` x `tamanho`).
+
+    Returns:
+        list: Os caminhos gerados, na ordem de `formatos`.
+    """
+    from ultralytics import YOLO
+    modelo = YOLO(pesos)
+    caminhos = []
+    for formato in formatos:
+        argumentos = {"simplify": True} if formato == "onnx" else {}
+        caminhos.append(modelo.export(format=formato, imgsz=tamanho, **argumentos))
+    return caminhos
+
+def _nos_da_cabeca(caminho):
+    """
+    Nós da cabeça de detecção (o último módulo, ex.: "/model.22/"), exceto as convoluções.
+    A decodificação das caixas e dos keypoints (Mul, Add, Concat, Sigmoid...) mistura escalas
+    muito diferentes e perde precisão quando quantizada, então fica em ponto flutuante.
+    """
+    import onnx
+    nos = onnx.load(caminho).graph.node
+    if not nos or not nos[-1].name.startswith("/"):
+        return []
+    prefixo = "/" + nos[-1].name.split("/")[1] + "/"
+    return [no.name for no in nos if no.name.startswith(prefixo) and no.op_type != "Conv"]
+
+def quantizar(modelo, saida, imagens_calibracao, max_imagens=100):
+    """
+    Gera a variante INT8 (quantização estática, pesos por canal, formato QDQ) de um
+    modelo ONNX exportado, calibrada com imagens reais. O resultado roda no ONNX Runtime
+    e também no OpenVINO.
+
+    Args:
+        modelo (str): O modelo ONNX FP32.
+        saida (str): O modelo INT8 a gravar.
+        imagens_calibracao (list): Caminhos das imagens de calibração (de preferência do
+            mesmo tipo de cena que será analisada).
+        max_imagens (int): Quantas imagens usar na calibração.
+    """
+    import onnxruntime as ort
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    if not imagens_calibracao:
+        raise ValueError("A quantização INT8 precisa de imagens de calibração")
+    entrada = ort.InferenceSession(modelo, providers=["CPUExecutionProvider"]).get_inputs()[0]
+    tamanho = tuple(d if isinstance(d, int) else TAMANHO_ENTRADA_PADRAO for d in entrada.shape[2:])
+
+    class LeitorCalibracao(CalibrationDataReader):
+        def __init__(self):
+            self._caminhos = iter(imagens_calibracao[:max_imagens])
+
+        def get_next(self):
+            for caminho in self._caminhos:
+                img = cv2.imread(caminho)
+                if img is not None:
+                    return {entrada.name: cv2.dnn.blobFromImage(letterbox(img, tamanho)[0], 1 / 255.0, swapRB=True)}
+            return None
+
+    preprocessado = saida + ".pre.onnx"
+    quant_pre_process(modelo, preprocessado)
+    try:
+        quantize_static(preprocessado, saida, LeitorCalibracao(), quant_format=QuantFormat.QDQ, per_channel=True,
+                        activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8,
+                        nodes_to_exclude=_nos_da_cabeca(preprocessado))
+    finally:
+        os.remove(preprocessado)
+    return saida
+
+def _tamanho_mb(caminho):
+    if os.path.isdir(caminho):
+        return sum(os.path.getsize(os.path.join(raiz, nome)) for raiz, _, nomes in os.walk(caminho) for nome in nomes) / 2**20
+    return os.path.getsize(caminho) / 2**20
+
+def comparar(imagens, candidatos, referencia=modelo_padrao("pytorch"), threads=0, limiar_iou=0.5,
+             limiar_keypoint=0.5):
+    """
+    Compara as detecções de cada backend com as do PyTorch (a referência), imagem a imagem.
+
+    As pessoas são associadas pelo IoU das bboxes. Para cada candidato, o resultado traz a
+    precisão e a revocação em relação à referência, o IoU médio das pessoas associadas, o
+    erro médio dos keypoints (em fração da diagonal da bbox de referência, contando só os
+    keypoints com confiança >= `limiar_keypoint` nos dois) e a fração desses keypoints a
+    menos de 5% da diagonal (PCK@0.05), além da latência e do tamanho do modelo.
+
+    Args:
+        imagens (list): Caminhos das imagens.
+        candidatos (list): Pares (backend, caminho), ex.: [("onnx", "yolov8n-pose-int8.onnx")].
+        referencia (str): Pesos do PyTorch.
+        threads (int): Threads de inferência de cada backend (0 = padrão do runtime).
+
+    Returns:
+        list: Um dicionário por backend, começando pela referência.
+    """
+    backends = [criar_backend("pytorch", referencia, threads)]
+    backends += [criar_backend(backend, caminho, threads) for backend, caminho in candidatos]
+    for backend in backends:
+        backend.detectar([np.zeros((TAMANHO_ENTRADA_PADRAO, TAMANHO_ENTRADA_PADRAO, 3), np.uint8)]) # aquecimento
+
+    tempos = [[] for _ in backends]
+    estatisticas = [dict(referencia=0, detectadas=0, associadas=0, iou=0.0, erros=[]) for _ in backends]
+    for caminho in imagens:
+        img = cv2.imread(caminho)
+        if img is None:
+            continue
+        escala = np.array([img.shape[1], img.shape[0]], dtype=np.float64)
+        saidas = []
+        for tempos_backend, backend in zip(tempos, backends):
+            inicio = time.perf_counter()
+            saidas.append(backend.detectar([img])[0])
+            tempos_backend.append(time.perf_counter() - inicio)
+
+        caixas_ref, _, pontos_ref, conf_ref = saidas[0]
+        caixas_ref = (caixas_ref.reshape(-1, 2, 2) * escala).reshape(-1, 4)
+        pontos_ref = pontos_ref * escala
+        diagonais = np.hypot(caixas_ref[:, 2] - caixas_ref[:, 0], caixas_ref[:, 3] - caixas_ref[:, 1])
+        for estatistica, (caixas, _, pontos, conf) in zip(estatisticas, saidas):
+            caixas = (caixas.reshape(-1, 2, 2) * escala).reshape(-1, 4)
+            ious = matriz_iou(caixas_ref, caixas)
+            pares = associar_gulosamente(ious, limiar_iou)
+            estatistica["referencia"] += len(caixas_ref)
+            estatistica["detectadas"] += len(caixas)
+            estatistica["associadas"] += len(pares)
+            for i, j in pares:
+                estatistica["iou"] += ious[i, j]
+                validos = (conf_ref[i] >= limiar_keypoint) & (conf[j] >= limiar_keypoint)
+                distancias = np.linalg.norm(pontos_ref[i] - pontos[j] * escala, axis=1)[validos]
+                estatistica["erros"].extend(distancias / max(diagonais[i], 1.0))
+
+    resultados = []
+    for backend, tempos_backend, e in zip(backends, tempos, estatisticas):
+        erros = np.array(e["erros"])
+        resultados.append({
+            "backend": backend.nome,
+            "modelo": backend.caminho,
+            "tamanho_mb": _tamanho_mb(backend.caminho),
+            "imagens": len(tempos_backend),
+            "latencia_media_ms": float(np.mean(tempos_backend) * 1000) if tempos_backend else None,
+            "latencia_p50_ms": float(np.median(tempos_backend) * 1000) if tempos_backend else None,
+            "pessoas": e["detectadas"],
+            "precisao": e["associadas"] / e["detectadas"] if e["detectadas"] else None,
+            "revocacao": e["associadas"] / e["referencia"] if e["referencia"] else None,
+            "iou_medio": e["iou"] / e["associadas"] if e["associadas"] else None,
+            "erro_keypoints_medio": float(erros.mean()) if len(erros) else None,
+            "pck_05": float((erros < 0.05).mean()) if len(erros) else None,
+        })
+    return resultados
+
+def _candidato(texto):
+    backend, _, caminho = texto.partition(":")
+    if backend not in BACKENDS_POSE:
+        raise argparse.ArgumentTypeError(f"use <backend>:<modelo>, com backend em {', '.join(BACKENDS_POSE)}")
+    return backend, caminho or modelo_padrao(backend)
+
+def _formatar(valor, formato):
+    return "-" if valor is None else format(valor, formato)
+
+if __name__ == '__main__':
+    # Somente CPU: a referência em PyTorch roda nas mesmas condições dos outros backends
+    os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")
+
+    parser = argparse.ArgumentParser(description="Exporta, quantiza e compara os backends do YOLOv8 Pose.")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    p_exportar = comandos.add_parser("exportar", help="Exporta os pesos do PyTorch para ONNX e/ou OpenVINO.")
+    p_exportar.add_argument("--pesos", default=modelo_padrao("pytorch"))
+    p_exportar.add_argument("--formatos", nargs="+", choices=("onnx", "openvino"), default=["onnx", "openvino"])
+    p_exportar.add_argument("--tamanho", type=int, default=TAMANHO_ENTRADA_PADRAO, help="Lado da entrada da rede.")
+
+    p_quantizar = comandos.add_parser("quantizar", help="Gera a variante INT8 de um modelo ONNX.")
+    p_quantizar.add_argument("--modelo", default=modelo_padrao("onnx"))
+    p_quantizar.add_argument("--saida", default="yolov8n-pose-int8.onnx")
+    p_quantizar.add_argument("--calibracao", required=True, help="Diretório com imagens de calibração.")
+    p_quantizar.add_argument("--max-imagens", type=int, default=100)
+
+    p_comparar = comandos.add_parser("comparar", help="Compara as detecções de cada backend com as do PyTorch.")
+    p_comparar.add_argument("--imagens", required=True, help="Diretório com as imagens de teste.")
+    p_comparar.add_argument("--referencia", default=modelo_padrao("pytorch"), help="Pesos do PyTorch.")
+    p_comparar.add_argument("--candidatos", type=_candidato, nargs="+", required=True,
+                            help="Backends a comparar, como <backend>:<modelo> (ex.: onnx:yolov8n-pose-int8.onnx).")
+    p_comparar.add_argument("--threads", type=int, default=0, help="Threads de inferência (0 = padrão do runtime).")
+    p_comparar.add_argument("--saida", default=None, help="Grava o resultado em JSON.")
+    args = parser.parse_args()
+
+    configurar_logging()
+    if args.comando == "exportar":
+        for caminho in exportar(args.pesos, args.formatos, args.tamanho):
+            print(f"Modelo exportado: {caminho}")
+    elif args.comando == "quantizar":
+        print(f"Modelo INT8 salvo em: {quantizar(args.modelo, args.saida, listar_imagens(args.calibracao), args.max_imagens)}")
+    else:
+        imagens = listar_imagens(args.imagens)
+        print(f"Comparando {len(args.candidatos)} backend(s) com o PyTorch em {len(imagens)} imagem(ns)...")
+        resultados = comparar(imagens, args.candidatos, args.referencia, args.threads)
+        print(f"{'Backend':<10}{'Modelo':<34}{'MB':>7}{'p50 ms':>9}{'Precisão':>10}{'Revocação':>11}"
+              f"{'IoU':>7}{'Erro kp':>9}{'PCK@.05':>9}")
+        for r in resultados:
+            print(f"{r['backend']:<10}{os.path.basename(os.path.normpath(r['modelo'])):<34}{r['tamanho_mb']:>7.1f}"
+                  f"{_formatar(r['latencia_p50_ms'], '.1f'):>9}{_formatar(r['precisao'], '.3f'):>10}"
+                  f"{_formatar(r['revocacao'], '.3f'):>11}{_formatar(r['iou_medio'], '.3f'):>7}"
+                  f"{_formatar(r['erro_keypoints_medio'], '.4f'):>9}{_formatar(r['pck_05'], '.3f'):>9}")
+        if args.saida:
+            with open(args.saida, 'w', encoding='utf-8') as f:
+                json.dump(resultados, f, indent=2)
+            print(f"Resultado salvo em: {args.saida}")
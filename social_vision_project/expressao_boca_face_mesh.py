@@ -1,89 +1,203 @@
 
 import cv2
-import mediapipe as mp
 import json
+import logging
 import numpy as np
 
-# Inicializa o MediaPipe Face Mesh
-mp_face_mesh = mp.solutions.face_mesh
-face_mesh = mp_face_mesh.FaceMesh(static_image_mode=True, max_num_faces=1, min_detection_confidence=0.5)
+from quadro import Quadro
+from modelos import obter_modelo
+from configuracao import CONFIGURACAO_PADRAO
+from geometria import matriz_iou, matriz_contencao, associar_gulosamente
+from paralelismo import mapear_por_pessoa
+from serializacao import converter_para_json, preparar_para_json
+from instrumentacao import METRICAS
+
+logger = logging.getLogger(__name__)
 
 def calcular_distancia_vertical(ponto1, ponto2):
     """Calcula a distância euclidiana vertical entre dois pontos."""
     return abs(ponto1.y - ponto2.y)
 
-def analisar_expressoes_faciais(image_path, deteccoes_com_faces):
+def analisar_expressoes_faciais(image_path, deteccoes_com_faces, config=None):
     """
     Analisa expressões faciais, como a abertura da boca, usando MediaPipe Face Mesh.
 
     Args:
         image_path (str): Caminho para a imagem original.
         deteccoes_com_faces (list): Lista de detecções com informações de face.
+        config (ConfiguracaoPipeline, opcional): Opções da etapa.
 
     Returns:
         list: A lista de detecções atualizada com features de expressão.
     """
-    img = cv2.imread(image_path)
-    if img is None:
+    quadro = Quadro.de_arquivo(image_path)
+    if quadro is None:
         return deteccoes_com_faces
 
-    img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    return analisar_expressoes_faciais_quadro(quadro, deteccoes_com_faces, config)
 
-    for pessoa in deteccoes_com_faces:
-        if not pessoa.get('face_info') or not pessoa['face_info'].get('face_bbox'):
-            pessoa['expressoes'] = {"boca_aberta": False, "olhos_fechados": False}
-            continue
+def analisar_expressoes_faciais_quadro(quadro, deteccoes_com_faces, config=None):
+    """
+    Analisa expressões faciais a partir de um quadro já decodificado.
+
+    Args:
+        quadro (Quadro): A imagem original, decodificada uma única vez.
+        deteccoes_com_faces (list): Lista de detecções com informações de face.
+        config (ConfiguracaoPipeline, opcional): Opções da etapa. Com
+            `modo_face_mesh="quadro_inteiro"`, o Face Mesh roda uma única vez
+            sobre o quadro inteiro em vez de uma vez por pessoa. No modo "por_pessoa",
+            `lado_minimo_roi_mesh` e `lado_maximo_roi_mesh` definem o tamanho do recorte da face.
+
+    Returns:
+        list: A lista de detecções atualizada com features de expressão.
+    """
+    config = config or CONFIGURACAO_PADRAO
+    if config.modo_face_mesh == "quadro_inteiro":
+        return _analisar_quadro_inteiro(quadro, deteccoes_com_faces, config)
+
+    def analisar_pessoa(pessoa):
+        # MediaPipe Face Mesh, criado no primeiro uso: uma instância por thread, pois o
+        # grafo não pode ser usado por duas threads ao mesmo tempo
+        with METRICAS.cronometrar("expressoes_por_pessoa"):
+            return _analisar_expressao_pessoa(quadro, pessoa, obter_modelo('face_mesh'), config)
+
+    # Uma pessoa por vez ou, com `config.threads_por_pessoa` > 1, em paralelo (ordem preservada)
+    expressoes = mapear_por_pessoa(analisar_pessoa, deteccoes_com_faces, config.threads_por_pessoa)
+    for pessoa, expressoes_pessoa in zip(deteccoes_com_faces, expressoes):
+        pessoa['expressoes'] = expressoes_pessoa
+
+    return deteccoes_com_faces
+
+def analisar_expressao_pessoa(quadro, pessoa, config=None):
+    """
+    Analisa as expressões de uma única pessoa (modo "por_pessoa"), com o Face Mesh
+    da thread atual. Pode ser chamada para várias pessoas em paralelo.
+
+    Returns:
+        dict: As expressões da pessoa.
+    """
+    with METRICAS.cronometrar("expressoes_por_pessoa"):
+        return _analisar_expressao_pessoa(quadro, pessoa, obter_modelo('face_mesh'), config or CONFIGURACAO_PADRAO)
+
+def _analisar_expressao_pessoa(quadro, pessoa, face_mesh, config):
+    """Executa o Face Mesh sobre a ROI da face de uma pessoa e retorna suas expressões."""
+    if not pessoa.get('face_info') or not pessoa['face_info'].get('face_bbox'):
+        return _expressoes_vazias()
 
-        # Recorta a região da face
-        x1, y1, x2, y2 = pessoa['face_info']['face_bbox']
-        roi_face = img_rgb[y1:y2, x1:x2]
+    # Recorta a região da face
+    x1, y1, x2, y2 = pessoa['face_info']['face_bbox']
+    x1, y1 = max(0, x1), max(0, y1)
+    x2, y2 = min(quadro.largura, x2), min(quadro.altura, y2)
 
-        if roi_face.size == 0:
-            pessoa['expressoes'] = {"boca_aberta": False, "olhos_fechados": False}
-            continue
+    if x2 <= x1 or y2 <= y1:
+        return _expressoes_vazias()
 
-        # Processa a ROI da face com o Face Mesh
-        results = face_mesh.process(roi_face)
+    # Recorte RGB contíguo, ampliado ou reduzido para a faixa configurada (uma única cópia)
+    roi_face, _ = quadro.recorte_rgb((x1, y1, x2, y2), config.lado_minimo_roi_mesh, config.lado_maximo_roi_mesh)
 
-        boca_aberta = False
-        olhos_fechados = False 
+    # Processa a ROI da face com o Face Mesh
+    results = face_mesh.process(roi_face)
 
-        if results.multi_face_landmarks:
-            for face_landmarks in results.multi_face_landmarks:
-                ponto_labio_superior = face_landmarks.landmark[13]
-                ponto_labio_inferior = face_landmarks.landmark[14]
-                ponto_canto_boca_esq = face_landmarks.landmark[61]
-                ponto_canto_boca_dir = face_landmarks.landmark[291]
+    expressoes = _expressoes_vazias()
+    if results.multi_face_landmarks:
+        for face_landmarks in results.multi_face_landmarks:
+            expressoes = _analisar_landmarks(face_landmarks, (x2 - x1) / (y2 - y1))
+    METRICAS.contar("mesh_acertos" if results.multi_face_landmarks else "mesh_falhas")
 
-                # Calcula a abertura vertical e horizontal da boca
-                abertura_vertical = calcular_distancia_vertical(ponto_labio_superior, ponto_labio_inferior)
-                abertura_horizontal = calcular_distancia_vertical(ponto_canto_boca_esq, ponto_canto_boca_dir)
-                
-                if abertura_horizontal > 0 and (abertura_vertical / abertura_horizontal) > 0.4:
-                    boca_aberta = True
+    return expressoes
 
-                # TODO: Adicionar lógica para olhos fechados se necessário            
+def _analisar_quadro_inteiro(quadro, deteccoes_com_faces, config):
+    """
+    Executa o Face Mesh uma única vez sobre o quadro inteiro (até `max_faces_mesh`
+    faces) e associa cada conjunto de landmarks a uma pessoa: pelo IoU com a
+    `face_bbox`, quando existir, ou pela fração da face contida na bbox da pessoa.
+    """
+    face_mesh = obter_modelo('face_mesh', max_num_faces=config.max_faces_mesh,
+                             static_image_mode=config.face_mesh_estatico)
+    results = face_mesh.process(quadro.rgb)
+
+    for pessoa in deteccoes_com_faces:
+        pessoa['expressoes'] = _expressoes_vazias()
+
+    faces = results.multi_face_landmarks or []
+    if not faces or not deteccoes_com_faces:
+        METRICAS.contar("mesh_falhas", len(deteccoes_com_faces))
+        return deteccoes_com_faces
 
-        pessoa['expressoes'] = {
-            "boca_aberta": boca_aberta,
-            "olhos_fechados": olhos_fechados
-        }
+    h, w = quadro.altura, quadro.largura
+    caixas_mesh = []
+    for face_landmarks in faces:
+        xs = [lm.x for lm in face_landmarks.landmark]
+        ys = [lm.y for lm in face_landmarks.landmark]
+        caixas_mesh.append([min(xs) * w, min(ys) * h, max(xs) * w, max(ys) * h])
+
+    caixas_face = [p['face_info']['face_bbox'] if p.get('face_info') and p['face_info'].get('face_bbox')
+                   else [0, 0, 0, 0] for p in deteccoes_com_faces]
+    caixas_pessoa = [p['bbox'] for p in deteccoes_com_faces]
+
+    # Pessoas com face localizada são associadas pelo IoU das faces; as demais, pela
+    # contenção da face na bbox da pessoa (penalizada para dar prioridade ao IoU).
+    pontuacoes = np.maximum(matriz_iou(caixas_mesh, caixas_face),
+                            matriz_contencao(caixas_mesh, caixas_pessoa) * 0.5)
+
+    associacoes = associar_gulosamente(pontuacoes, config.limiar_associacao_mesh)
+    for indice_face, indice_pessoa in associacoes:
+        deteccoes_com_faces[indice_pessoa]['expressoes'] = _analisar_landmarks(faces[indice_face], w / h)
+    METRICAS.contar("mesh_acertos", len(associacoes))
+    METRICAS.contar("mesh_falhas", len(deteccoes_com_faces) - len(associacoes))
 
     return deteccoes_com_faces
 
+def _expressoes_vazias():
+    return {"boca_aberta": False, "olhos_fechados": False, "razao_boca": None}
+
+def _analisar_landmarks(face_landmarks, proporcao=1.0):
+    """
+    Calcula as expressões a partir dos 468 landmarks de uma face.
+
+    `proporcao` é a razão largura/altura da imagem em que os landmarks foram
+    normalizados, para que 'razao_boca' seja medida em pixels.
+    """
+    boca_aberta = False
+    olhos_fechados = False # Ainda não é calculado; a chave é mantida no resultado por compatibilidade
+
+    ponto_labio_superior = face_landmarks.landmark[13]
+    ponto_labio_inferior = face_landmarks.landmark[14]
+    ponto_canto_boca_esq = face_landmarks.landmark[61]
+    ponto_canto_boca_dir = face_landmarks.landmark[291]
+
+    # Calcula a abertura vertical e horizontal da boca
+    abertura_vertical = calcular_distancia_vertical(ponto_labio_superior, ponto_labio_inferior)
+    abertura_horizontal = calcular_distancia_vertical(ponto_canto_boca_esq, ponto_canto_boca_dir)
+    
+    if abertura_horizontal > 0 and (abertura_vertical / abertura_horizontal) > 0.4:
+        boca_aberta = True
+
+    # Razão de abertura da boca (abertura entre os lábios / largura da boca), usada
+    # na detecção temporal de fala (deteccao_fala.py)
+    largura_boca = np.hypot((ponto_canto_boca_dir.x - ponto_canto_boca_esq.x) * proporcao,
+                            ponto_canto_boca_dir.y - ponto_canto_boca_esq.y)
+    razao_boca = float(abertura_vertical / largura_boca) if largura_boca > 0 else None
+
+    return {
+        "boca_aberta": boca_aberta,
+        "olhos_fechados": olhos_fechados,
+        "razao_boca": razao_boca
+    }
+
 def carregar_dados_json(json_path):
     """Carrega dados de um arquivo JSON."""
     try:
         with open(json_path, 'r') as f:
             return json.load(f)
     except FileNotFoundError:
-        print(f"Arquivo JSON não encontrado: {json_path}")
+        logger.error("Arquivo JSON não encontrado: %s", json_path)
         return []
 
 def salvar_resultado_json(data, output_path):
     """Salva os dados em um arquivo JSON."""
     with open(output_path, 'w') as f:
-        json.dump(data, f, indent=4)
+        json.dump(preparar_para_json(data), f, indent=4, default=converter_para_json)
 
 if __name__ == '__main__':
     caminho_imagem = 'C:/Users/juanm/Desktop/G_CLI-1.0/social_vision_project/sample_image.jpg'
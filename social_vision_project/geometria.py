@@ -0,0 +1,75 @@
+
+import numpy as np
+
+def matriz_iou(caixas_a, caixas_b):
+    """
+    Calcula o IoU (interseção sobre união) entre todos os pares de bboxes.
+
+    Args:
+        caixas_a (array-like): (n, 4) bboxes no formato [x1, y1, x2, y2].
+        caixas_b (array-like): (m, 4) bboxes no formato [x1, y1, x2, y2].
+
+    Returns:
+        np.ndarray: Matriz (n, m) com o IoU de cada par.
+    """
+    a = np.asarray(caixas_a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(caixas_b, dtype=np.float64).reshape(-1, 4)
+
+    ix1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    iy1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    ix2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    iy2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    intersecao = np.clip(ix2 - ix1, 0, None) * np.clip(iy2 - iy1, 0, None)
+
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    uniao = area_a[:, None] + area_b[None, :] - intersecao
+    return np.divide(intersecao, uniao, out=np.zeros_like(intersecao), where=uniao > 0)
+
+def matriz_contencao(caixas_a, caixas_b):
+    """
+    Fração da área de cada bbox de `caixas_a` que está dentro de cada bbox de `caixas_b`.
+    Útil para associar uma face (caixa pequena) à bbox da pessoa (caixa grande), onde o IoU é baixo.
+
+    Returns:
+        np.ndarray: Matriz (n, m) com valores entre 0 e 1.
+    """
+    a = np.asarray(caixas_a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(caixas_b, dtype=np.float64).reshape(-1, 4)
+
+    ix1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    iy1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    ix2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    iy2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    intersecao = np.clip(ix2 - ix1, 0, None) * np.clip(iy2 - iy1, 0, None)
+
+    area_a = ((a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1]))[:, None]
+    return np.divide(intersecao, area_a, out=np.zeros_like(intersecao), where=area_a > 0)
+
+def associar_gulosamente(pontuacoes, limiar):
+    """
+    Associação um-para-um entre linhas e colunas pela maior pontuação (ex.: IoU).
+
+    Args:
+        pontuacoes (np.ndarray): Matriz (n, m) de pontuações.
+        limiar (float): Pontuação mínima para aceitar um par.
+
+    Returns:
+        list: Pares (linha, coluna) associados, em ordem decrescente de pontuação.
+    """
+    pares = []
+    if pontuacoes.size == 0:
+        return pares
+    # Ordena todos os pares de uma vez e percorre do melhor para o pior
+    ordem = np.argsort(-pontuacoes, axis=None, kind='stable')
+    linhas_usadas, colunas_usadas = set(), set()
+    for indice in ordem:
+        linha, coluna = divmod(int(indice), pontuacoes.shape[1])
+        if pontuacoes[linha, coluna] < limiar:
+            break
+        if linha in linhas_usadas or coluna in colunas_usadas:
+            continue
+        pares.append((linha, coluna))
+        linhas_usadas.add(linha)
+        colunas_usadas.add(coluna)
+    return pares
@@ -0,0 +1,216 @@
+
+import glob
+import logging
+import os
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Backends de inferência do YOLOv8 Pose (etapa 1). Todos produzem o mesmo formato:
+# para cada imagem, (caixas, confiancas, keypoints, confiancas_keypoints), com as
+# caixas [x1, y1, x2, y2] e os keypoints [x, y] normalizados (0-1) pela imagem recebida.
+BACKENDS_POSE = ("pytorch", "onnx", "openvino")
+
+# Modelo usado quando `ConfiguracaoPipeline.modelo_pose` está vazio, para cada variante
+# (`ConfiguracaoPipeline.variante_pose`: n, s, m, l, x)
+MODELOS_PADRAO = {
+    "pytorch": "yolov8{variante}-pose.pt",
+    "onnx": "yolov8{variante}-pose.onnx",
+    "openvino": "yolov8{variante}-pose_openvino_model",
+}
+
+# Mesmos limiares de pós-processamento do ultralytics, para que os backends exportados
+# produzam as mesmas detecções que o PyTorch
+LIMIAR_CONFIANCA = 0.25
+LIMIAR_IOU_NMS = 0.7
+MAX_DETECCOES = 300
+TAMANHO_ENTRADA_PADRAO = 640
+
+def modelo_padrao(backend="pytorch", variante="n"):
+    """Arquivo padrão do modelo de uma variante do YOLOv8 Pose para o backend."""
+    return MODELOS_PADRAO[backend].format(variante=variante)
+
+def _vazio(num_keypoints=17):
+    return (np.zeros((0, 4), np.float32), np.zeros(0, np.float32),
+            np.zeros((0, num_keypoints, 2), np.float32), np.zeros((0, num_keypoints), np.float32))
+
+class BackendPyTorch:
+    """YOLOv8 Pose do ultralytics (PyTorch), o backend original."""
+
+    nome = "pytorch"
+
+    def __init__(self, caminho, threads=0):
+        from ultralytics import YOLO
+        if threads:
+            # Global para o processo: o PyTorch não tem um número de threads por modelo
+            import torch
+            torch.set_num_threads(threads)
+        self.caminho = caminho
+        self.modelo = YOLO(caminho)
+
+    def detectar(self, imagens, tamanho_entrada=TAMANHO_ENTRADA_PADRAO):
+        """Detecta as poses em uma lista de imagens BGR, em uma única chamada ao modelo."""
+        return [self._converter(r) for r in self.modelo(imagens, imgsz=tamanho_entrada, verbose=False)]
+
+    @staticmethod
+    def _converter(r):
+        if not (r.boxes and r.keypoints):
+            return _vazio()
+        # Confiança de cada keypoint (None se o modelo não a fornecer)
+        confiancas = r.keypoints.conf.cpu().numpy() if r.keypoints.conf is not None else None
+        return (r.boxes.xyxyn.cpu().numpy(), r.boxes.conf.cpu().numpy(), r.keypoints.xyn.cpu().numpy(), confiancas)
+
+class _BackendExportado:
+    """
+    Base dos backends que executam o grafo exportado pelo ultralytics (`exportar_pose.py`)
+    sem o PyTorch. O letterbox, a decodificação da saída (1, 5 + 3 * keypoints, âncoras)
+    e o NMS são feitos aqui, com o OpenCV e o NumPy, reproduzindo o `predict` do ultralytics.
+    """
+
+    def __init__(self, caminho, forma_entrada):
+        self.caminho = caminho
+        # Dimensões fixas do grafo (None se foi exportado com `dynamic=True`)
+        lote, _, altura, largura = forma_entrada
+        self.tamanho_fixo = (altura, largura) if isinstance(altura, int) and isinstance(largura, int) else None
+        self.lote_fixo = lote if isinstance(lote, int) else None
+
+    def _inferir(self, tensor):
+        """Executa o grafo sobre um tensor NCHW float32 e retorna a saída (N, 5 + 3k, âncoras)."""
+        raise NotImplementedError
+
+    def detectar(self, imagens, tamanho_entrada=TAMANHO_ENTRADA_PADRAO):
+        """
+        Detecta as poses em uma lista de imagens BGR. `tamanho_entrada` só vale para
+        grafos dinâmicos; nos demais, vale o tamanho com que o modelo foi exportado.
+        """
+        tamanho = self.tamanho_fixo or (tamanho_entrada, tamanho_entrada)
+        preparadas = [letterbox(img, tamanho) for img in imagens]
+        if self.lote_fixo == 1:
+            # Grafo exportado com lote 1 (o padrão do ultralytics): uma inferência por imagem
+            saidas = [self._inferir(cv2.dnn.blobFromImage(p[0], 1 / 255.0, swapRB=True))[0] for p in preparadas]
+        else:
+            saidas = self._inferir(cv2.dnn.blobFromImages([p[0] for p in preparadas], 1 / 255.0, swapRB=True))
+        return [_decodificar(saida, img.shape, razao, deslocamento)
+                for saida, img, (_, razao, deslocamento) in zip(saidas, imagens, preparadas)]
+
+class BackendONNXRuntime(_BackendExportado):
+    """
+    Modelo ONNX (FP32 ou quantizado em INT8) no ONNX Runtime, na CPU. A sessão é
+    thread-safe e pode ser compartilhada por todas as threads do processo.
+    """
+
+    nome = "onnx"
+
+    def __init__(self, caminho, threads=0):
+        import onnxruntime as ort
+        opcoes = ort.SessionOptions()
+        opcoes.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            opcoes.intra_op_num_threads = threads
+            opcoes.inter_op_num_threads = 1
+        self.sessao = ort.InferenceSession(caminho, sess_options=opcoes, providers=["CPUExecutionProvider"])
+        entrada = self.sessao.get_inputs()[0]
+        self.nome_entrada = entrada.name
+        super().__init__(caminho, entrada.shape)
+
+    def _inferir(self, tensor):
+        return self.sessao.run(None, {self.nome_entrada: tensor})[0]
+
+class BackendOpenVINO(_BackendExportado):
+    """
+    Modelo no runtime do OpenVINO, na CPU. Aceita o diretório exportado pelo ultralytics
+    (`*_openvino_model/`), um arquivo .xml ou diretamente um .onnx (inclusive o INT8).
+    Cada chamada usa seu próprio infer request, então o modelo compilado é compartilhado.
+    """
+
+    nome = "openvino"
+
+    def __init__(self, caminho, threads=0):
+        import openvino as ov
+        arquivo = caminho
+        if os.path.isdir(caminho):
+            arquivos = sorted(glob.glob(os.path.join(caminho, "*.xml")))
+            if not arquivos:
+                raise FileNotFoundError(f"Nenhum modelo .xml em {caminho}")
+            arquivo = arquivos[0]
+        opcoes = {"PERFORMANCE_HINT": "LATENCY"}
+        if threads:
+            opcoes["INFERENCE_NUM_THREADS"] = threads
+        nucleo = ov.Core()
+        modelo = nucleo.read_model(arquivo)
+        forma = [d.get_length() if d.is_static else None for d in modelo.inputs[0].get_partial_shape()]
+        self.compilado = nucleo.compile_model(modelo, "CPU", opcoes)
+        super().__init__(caminho, forma)
+
+    def _inferir(self, tensor):
+        requisicao = self.compilado.create_infer_request()
+        requisicao.infer({0: tensor})
+        return requisicao.get_output_tensor(0).data.copy()
+
+_CLASSES = {"pytorch": BackendPyTorch, "onnx": BackendONNXRuntime, "openvino": BackendOpenVINO}
+
+def criar_backend(backend="pytorch", caminho=None, threads=0):
+    """
+    Cria o backend de inferência do YOLOv8 Pose.
+
+    Args:
+        backend (str): Um de `BACKENDS_POSE`.
+        caminho (str, opcional): Modelo a carregar; padrão: `modelo_padrao(backend)`.
+        threads (int): Threads de inferência (0 = padrão do runtime).
+    """
+    if backend not in _CLASSES:
+        raise ValueError(f"Backend de pose desconhecido: {backend!r} (opções: {', '.join(BACKENDS_POSE)})")
+    caminho = caminho or modelo_padrao(backend)
+    logger.info("Carregando o YOLOv8 Pose (%s) de %s", backend, caminho)
+    return _CLASSES[backend](caminho, threads)
+
+def letterbox(img, tamanho):
+    """
+    Redimensiona mantendo a proporção e completa com cinza (114) até `tamanho` (altura,
+    largura), centralizado como no LetterBox do ultralytics.
+
+    Returns:
+        tuple: (imagem, razão, (deslocamento_x, deslocamento_y)).
+    """
+    altura, largura = img.shape[:2]
+    razao = min(tamanho[0] / altura, tamanho[1] / largura)
+    nova_largura, nova_altura = round(largura * razao), round(altura * razao)
+    if (nova_largura, nova_altura) != (largura, altura):
+        img = cv2.resize(img, (nova_largura, nova_altura), interpolation=cv2.INTER_LINEAR)
+    dx, dy = (tamanho[1] - nova_largura) / 2, (tamanho[0] - nova_altura) / 2
+    topo, base = round(dy - 0.1), round(dy + 0.1)
+    esquerda, direita = round(dx - 0.1), round(dx + 0.1)
+    img = cv2.copyMakeBorder(img, topo, base, esquerda, direita, cv2.BORDER_CONSTANT, value=(114, 114, 114))
+    return img, razao, (esquerda, topo)
+
+def _decodificar(saida, shape, razao, deslocamento):
+    """
+    Converte a saída bruta de uma imagem, (5 + 3k, âncoras) com [cx, cy, w, h, conf,
+    (x, y, conf) * k], em detecções normalizadas pela imagem original, após o NMS.
+    """
+    num_keypoints = (saida.shape[0] - 5) // 3
+    predicoes = saida.T
+    predicoes = predicoes[predicoes[:, 4] > LIMIAR_CONFIANCA]
+    if not len(predicoes):
+        return _vazio(num_keypoints)
+
+    cx, cy, largura, altura = predicoes[:, :4].T
+    x1, y1 = cx - largura / 2, cy - altura / 2
+    indices = cv2.dnn.NMSBoxes(np.stack([x1, y1, largura, altura], axis=1), predicoes[:, 4],
+                               LIMIAR_CONFIANCA, LIMIAR_IOU_NMS, top_k=MAX_DETECCOES)
+    # Em ordem decrescente de confiança, como no ultralytics
+    predicoes = predicoes[np.asarray(indices, dtype=np.int64).reshape(-1)]
+
+    # Do espaço do letterbox para a imagem original e, então, para 0-1
+    h, w = shape[:2]
+    deslocamento = np.asarray(deslocamento, dtype=np.float32)
+    tamanho = np.array([w, h], dtype=np.float32)
+    cx, cy, largura, altura = predicoes[:, :4].T
+    caixas = np.stack([cx - largura / 2, cy - altura / 2, cx + largura / 2, cy + altura / 2], axis=1).reshape(-1, 2, 2)
+    caixas = np.clip((caixas - deslocamento) / razao, 0, tamanho) / tamanho
+    keypoints = predicoes[:, 5:].reshape(-1, num_keypoints, 3)
+    pontos = np.clip((keypoints[:, :, :2] - deslocamento) / razao, 0, tamanho) / tamanho
+    return (caixas.reshape(-1, 4).astype(np.float32), predicoes[:, 4].astype(np.float32),
+            pontos.astype(np.float32), keypoints[:, :, 2].astype(np.float32))
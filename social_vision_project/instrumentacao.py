@@ -0,0 +1,199 @@
+
+import collections
+import contextlib
+import cProfile
+import io
+import logging
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+class Metricas:
+    """
+    Tempos e contadores do pipeline, compartilhados por todas as threads do processo.
+
+    Cada série de tempos (uma por etapa, e uma "<etapa>_por_pessoa" para o trabalho
+    feito pessoa a pessoa) guarda o total acumulado e as últimas `tamanho_janela`
+    medições, das quais saem os percentis. Os contadores registram, por exemplo,
+    pessoas detectadas, faces encontradas e faces com landmarks do Face Mesh.
+    """
+
+    def __init__(self, tamanho_janela=1000):
+        self.tamanho_janela = tamanho_janela
+        self._lock = threading.Lock()
+        self._tempos = {}
+        self._totais = collections.Counter()
+        self._execucoes = collections.Counter()
+        self.contadores = collections.Counter()
+
+    @contextlib.contextmanager
+    def cronometrar(self, serie):
+        """Mede o tempo do bloco `with` e o registra na série (ex.: "pose" ou "faces_por_pessoa")."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar_tempo(serie, time.perf_counter() - inicio)
+
+    def registrar_tempo(self, serie, segundos):
+        with self._lock:
+            janela = self._tempos.get(serie)
+            if janela is None:
+                janela = self._tempos[serie] = collections.deque(maxlen=self.tamanho_janela)
+            janela.append(segundos)
+            self._totais[serie] += segundos
+            self._execucoes[serie] += 1
+
+    def contar(self, nome, quantidade=1):
+        with self._lock:
+            self.contadores[nome] += quantidade
+
+    def zerar(self):
+        with self._lock:
+            self._tempos.clear()
+            self._totais.clear()
+            self._execucoes.clear()
+            self.contadores.clear()
+
+    def totais(self):
+        """
+        Versão barata do resumo, sem percentis: {"tempos": {serie: [execucoes, total_s]},
+        "contadores": {...}}. Totais de vários processos podem ser somados com `somar_totais`.
+        """
+        with self._lock:
+            return {"tempos": {serie: [self._execucoes[serie], self._totais[serie]] for serie in self._tempos},
+                    "contadores": dict(self.contadores)}
+
+    def resumo(self):
+        """
+        Resumo serializável em JSON.
+
+        Returns:
+            dict: {"tempos": {serie: {"execucoes", "total_ms", "media_ms", "p50_ms", "p95_ms",
+                   "p99_ms", "max_ms"}}, "contadores": {nome: valor}}. Os percentis e o
+                   máximo se referem às últimas `tamanho_janela` medições.
+        """
+        with self._lock:
+            janelas = {serie: np.array(janela) for serie, janela in self._tempos.items()}
+            totais = dict(self._totais)
+            execucoes = dict(self._execucoes)
+            contadores = dict(self.contadores)
+        tempos = {}
+        for serie, janela in janelas.items():
+            p50, p95, p99 = np.percentile(janela, (50, 95, 99)) * 1000
+            tempos[serie] = {
+                "execucoes": execucoes[serie],
+                "total_ms": totais[serie] * 1000,
+                "media_ms": totais[serie] * 1000 / execucoes[serie],
+                "p50_ms": float(p50),
+                "p95_ms": float(p95),
+                "p99_ms": float(p99),
+                "max_ms": float(janela.max() * 1000),
+            }
+        return {"tempos": tempos, "contadores": contadores}
+
+    def para_prometheus(self, prefixo="social_vision", extras=None):
+        """
+        Exporta as métricas no formato de texto do Prometheus.
+
+        Args:
+            prefixo (str): Prefixo do nome das métricas.
+            extras (dict, opcional): Valores numéricos adicionais, exportados como gauges
+                (ex.: os contadores do serviço HTTP).
+        """
+        resumo = self.resumo()
+        linhas = [
+            f"# HELP {prefixo}_etapa_segundos Tempo de cada etapa do pipeline.",
+            f"# TYPE {prefixo}_etapa_segundos summary",
+        ]
+        for serie, t in sorted(resumo["tempos"].items()):
+            for quantil, chave in (("0.5", "p50_ms"), ("0.95", "p95_ms"), ("0.99", "p99_ms")):
+                linhas.append(f'{prefixo}_etapa_segundos{{etapa="{serie}",quantile="{quantil}"}} {t[chave] / 1000:.6f}')
+            linhas.append(f'{prefixo}_etapa_segundos_sum{{etapa="{serie}"}} {t["total_ms"] / 1000:.6f}')
+            linhas.append(f'{prefixo}_etapa_segundos_count{{etapa="{serie}"}} {t["execucoes"]}')
+        for nome, valor in sorted(resumo["contadores"].items()):
+            linhas.append(f"# TYPE {prefixo}_{nome}_total counter")
+            linhas.append(f"{prefixo}_{nome}_total {valor}")
+        for nome, valor in sorted((extras or {}).items()):
+            if isinstance(valor, (int, float)):
+                linhas.append(f"# TYPE {prefixo}_{nome} gauge")
+                linhas.append(f"{prefixo}_{nome} {valor}")
+        return "\n".join(linhas) + "\n"
+
+    def relatorio(self):
+        """Tabela legível com o tempo de cada série, da mais cara para a mais barata."""
+        resumo = self.resumo()
+        linhas = [f"{'Etapa':<26}{'n':>7}{'média ms':>11}{'p50 ms':>10}{'p95 ms':>10}{'total ms':>12}"]
+        for serie, t in sorted(resumo["tempos"].items(), key=lambda item: -item[1]["total_ms"]):
+            linhas.append(f"{serie:<26}{t['execucoes']:>7}{t['media_ms']:>11.1f}{t['p50_ms']:>10.1f}"
+                          f"{t['p95_ms']:>10.1f}{t['total_ms']:>12.1f}")
+        if resumo["contadores"]:
+            linhas.append("Contadores: " + ", ".join(f"{nome}={valor}" for nome, valor in sorted(resumo["contadores"].items())))
+        return "\n".join(linhas)
+
+# Métricas do processo, alimentadas pelas etapas do pipeline
+METRICAS = Metricas()
+
+def somar_totais(lista_totais):
+    """
+    Soma os `Metricas.totais()` de vários processos.
+
+    Returns:
+        dict: {"tempos": {serie: {"execucoes", "total_ms", "media_ms"}}, "contadores": {...}}.
+    """
+    execucoes, segundos, contadores = collections.Counter(), collections.Counter(), collections.Counter()
+    for totais in lista_totais:
+        for serie, (n, total) in totais["tempos"].items():
+            execucoes[serie] += n
+            segundos[serie] += total
+        contadores.update(totais["contadores"])
+    tempos = {serie: {"execucoes": execucoes[serie], "total_ms": segundos[serie] * 1000,
+                      "media_ms": segundos[serie] * 1000 / execucoes[serie]}
+              for serie in execucoes if execucoes[serie]}
+    return {"tempos": tempos, "contadores": dict(contadores)}
+
+@contextlib.contextmanager
+def perfilar(caminho=None, linhas=25, memoria=False):
+    """
+    Executa o bloco `with` sob o cProfile (e, com `memoria`, o tracemalloc) e imprime
+    as funções mais caras e, se for o caso, as linhas que mais alocaram memória.
+
+    Args:
+        caminho (str, opcional): Grava também o perfil bruto (.prof), para o snakeviz ou o pstats.
+        linhas (int): Quantas entradas imprimir.
+        memoria (bool): Ativa o tracemalloc (mais lento; use só para investigar memória).
+    """
+    perfil = cProfile.Profile()
+    if memoria:
+        tracemalloc.start()
+    perfil.enable()
+    try:
+        yield perfil
+    finally:
+        perfil.disable()
+        saida = io.StringIO()
+        pstats.Stats(perfil, stream=saida).sort_stats("cumulative").print_stats(linhas)
+        print(saida.getvalue())
+        if caminho:
+            perfil.dump_stats(caminho)
+            print(f"Perfil salvo em: {caminho}")
+        if memoria:
+            instantaneo = tracemalloc.take_snapshot()
+            atual, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"Memória alocada: {atual / 2**20:.1f} MiB (pico {pico / 2**20:.1f} MiB)")
+            for estatistica in instantaneo.statistics("lineno")[:linhas]:
+                print(f"  {estatistica}")
+
+def configurar_logging(nivel=None):
+    """
+    Configura o logging dos scripts. O nível vem de `nivel` ou da variável de
+    ambiente SOCIAL_VISION_LOG (ex.: DEBUG, INFO); o padrão é WARNING.
+    """
+    nivel = nivel or os.environ.get("SOCIAL_VISION_LOG", "WARNING")
+    logging.basicConfig(level=nivel.upper() if isinstance(nivel, str) else nivel,
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
@@ -0,0 +1,173 @@
+
+import threading
+
+import numpy as np
+
+# Registro de modelos: cada modelo é criado apenas no primeiro uso (e não ao
+# importar os módulos do pipeline), pode ser aquecido sob demanda e descarregado.
+
+_fabricas = {}
+_compartilhados = {}
+_locais = threading.local()
+_lock = threading.Lock()
+# Incrementada a cada descarregamento de um modelo, para invalidar as instâncias por thread
+_geracoes = {}
+
+def registrar_modelo(nome, fabrica, por_thread=False, aquecimento=None):
+    """
+    Registra como criar um modelo.
+
+    Args:
+        nome (str): Nome do modelo no registro.
+        fabrica (callable): Função que cria o modelo; recebe os parâmetros de `obter_modelo`.
+        por_thread (bool ou callable): Se True, cada thread recebe sua própria instância
+            (para modelos que não são thread-safe). Caso contrário, a instância é
+            compartilhada. Uma função que recebe os parâmetros de `obter_modelo` decide
+            por instância (ex.: o YOLO em PyTorch é por thread; a sessão do ONNX Runtime,
+            compartilhada).
+        aquecimento (callable, opcional): Função que executa uma inferência de teste no modelo.
+    """
+    _fabricas[nome] = (fabrica, por_thread, aquecimento)
+
+def obter_modelo(nome, **parametros):
+    """
+    Retorna o modelo, criando-o no primeiro uso.
+
+    Parâmetros diferentes (ex.: `max_num_faces`) geram instâncias diferentes.
+    """
+    fabrica, por_thread, _ = _fabricas[nome]
+    chave = (nome, tuple(sorted(parametros.items())))
+    if callable(por_thread):
+        por_thread = por_thread(**parametros)
+
+    if por_thread:
+        if not hasattr(_locais, 'modelos'):
+            _locais.modelos = {}
+        geracao = _geracoes.get(nome, 0)
+        entrada = _locais.modelos.get(chave)
+        if entrada is None or entrada[0] != geracao:
+            entrada = _locais.modelos[chave] = (geracao, fabrica(**parametros))
+        return entrada[1]
+
+    modelo = _compartilhados.get(chave)
+    if modelo is None:
+        with _lock:
+            modelo = _compartilhados.get(chave)
+            if modelo is None:
+                modelo = _compartilhados[chave] = fabrica(**parametros)
+    return modelo
+
+def aquecer(*nomes, inferencia=True, parametros=None):
+    """
+    Carrega os modelos indicados (todos, se nenhum for indicado) antes do primeiro uso.
+
+    Args:
+        inferencia (bool): Se True, também executa uma inferência de teste, para que
+            a primeira imagem real não pague a inicialização preguiçosa do backend.
+            Modelos por thread são aquecidos apenas na thread que chama esta função.
+        parametros (dict, opcional): Parâmetros de `obter_modelo` por nome de modelo
+            (ex.: {'yolo_pose': parametros_modelo_pose(config)}).
+    """
+    for nome in nomes or list(_fabricas):
+        modelo = obter_modelo(nome, **(parametros or {}).get(nome, {}))
+        aquecimento = _fabricas[nome][2]
+        if inferencia and aquecimento is not None:
+            aquecimento(modelo)
+
+def descarregar(*nomes):
+    """Libera os modelos indicados (todos, se nenhum for indicado)."""
+    nomes = nomes or list(_fabricas)
+    with _lock:
+        for chave in list(_compartilhados):
+            if chave[0] in nomes:
+                del _compartilhados[chave]
+        for nome in nomes:
+            # As instâncias por thread são recriadas no próximo uso em cada thread
+            _geracoes[nome] = _geracoes.get(nome, 0) + 1
+    # Na thread atual, a referência pode ser liberada imediatamente
+    for chave in list(getattr(_locais, 'modelos', {})):
+        if chave[0] in nomes:
+            del _locais.modelos[chave]
+
+def modelos_carregados():
+    """Lista os nomes dos modelos compartilhados e os da thread atual que já foram criados."""
+    nomes = {chave[0] for chave in _compartilhados}
+    for chave, (geracao, _) in getattr(_locais, 'modelos', {}).items():
+        if geracao == _geracoes.get(chave[0], 0):
+            nomes.add(chave[0])
+    return sorted(nomes)
+
+# --- Modelos do pipeline ---
+
+def _criar_yolo_pose(backend='pytorch', caminho=None, threads=0):
+    # PyTorch, ONNX Runtime ou OpenVINO (ver inferencia_pose.py)
+    from inferencia_pose import criar_backend
+    return criar_backend(backend, caminho, threads)
+
+def _yolo_pose_por_thread(backend='pytorch', **_):
+    return backend == 'pytorch'
+
+def _aquecer_yolo_pose(modelo):
+    modelo.detectar([np.zeros((640, 640, 3), dtype=np.uint8)])
+
+def _criar_face_mesh(max_num_faces=1, static_image_mode=True):
+    import mediapipe as mp
+    return mp.solutions.face_mesh.FaceMesh(static_image_mode=static_image_mode,
+                                           max_num_faces=max_num_faces, min_detection_confidence=0.5)
+
+def _aquecer_face_mesh(modelo):
+    modelo.process(np.zeros((192, 192, 3), dtype=np.uint8))
+
+class DlibPorThread:
+    """
+    A parte da API do face_recognition usada pelo pipeline (face_locations e face_encodings),
+    mas com detectores e redes do dlib próprios. As do face_recognition são globais do módulo,
+    e os detectores do dlib não podem ser chamados por duas threads ao mesmo tempo (cada
+    chamada carrega a imagem no scanner interno do detector).
+    """
+
+    def __init__(self):
+        import dlib
+        import face_recognition_models
+        self._dlib = dlib
+        self._arquivos = face_recognition_models
+        self._hog = dlib.get_frontal_face_detector()
+        # Criados no primeiro uso: o CNN só no modo "cnn" e a ResNet só com encodings
+        self._cnn = None
+        self._pontos = None
+        self._encoder = None
+
+    def face_locations(self, img, number_of_times_to_upsample=1, model="hog"):
+        """Como face_recognition.face_locations: (top, right, bottom, left) de cada face."""
+        if model == "cnn":
+            if self._cnn is None:
+                self._cnn = self._dlib.cnn_face_detection_model_v1(self._arquivos.cnn_face_detector_model_location())
+            retangulos = [face.rect for face in self._cnn(img, number_of_times_to_upsample)]
+        else:
+            retangulos = self._hog(img, number_of_times_to_upsample)
+        altura, largura = img.shape[:2]
+        # dlib.rectangle -> (top, right, bottom, left), limitado à imagem
+        return [(max(r.top(), 0), min(r.right(), largura), min(r.bottom(), altura), max(r.left(), 0))
+                for r in retangulos]
+
+    def face_encodings(self, face_image, known_face_locations, num_jitters=1):
+        """Como face_recognition.face_encodings (modelo "small", de 5 pontos)."""
+        if self._encoder is None:
+            self._pontos = self._dlib.shape_predictor(self._arquivos.pose_predictor_five_point_model_location())
+            self._encoder = self._dlib.face_recognition_model_v1(self._arquivos.face_recognition_model_location())
+        pontos = [self._pontos(face_image, self._dlib.rectangle(left, top, right, bottom))
+                  for top, right, bottom, left in known_face_locations]
+        return [np.array(self._encoder.compute_face_descriptor(face_image, p, num_jitters)) for p in pontos]
+
+def _criar_face_recognition():
+    return DlibPorThread()
+
+def _aquecer_face_recognition(modelo):
+    modelo.face_locations(np.zeros((128, 128, 3), dtype=np.uint8), model="hog")
+
+# O predictor do ultralytics, o grafo do MediaPipe e os detectores e redes do dlib não são
+# thread-safe: uma instância por thread. As sessões do ONNX Runtime e do OpenVINO aceitam
+# chamadas simultâneas e são compartilhadas.
+registrar_modelo('yolo_pose', _criar_yolo_pose, por_thread=_yolo_pose_por_thread, aquecimento=_aquecer_yolo_pose)
+registrar_modelo('face_mesh', _criar_face_mesh, por_thread=True, aquecimento=_aquecer_face_mesh)
+registrar_modelo('face_recognition', _criar_face_recognition, por_thread=True, aquecimento=_aquecer_face_recognition)
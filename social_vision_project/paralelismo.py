@@ -0,0 +1,35 @@
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Pools compartilhados por número de threads, criados no primeiro uso e mantidos
+# durante todo o processo: as threads (e os modelos por thread que elas carregam,
+# como o Face Mesh) são reaproveitadas entre imagens.
+_pools = {}
+_lock = threading.Lock()
+
+def obter_pool(num_threads):
+    """Retorna o pool compartilhado com `num_threads` threads."""
+    pool = _pools.get(num_threads)
+    if pool is None:
+        with _lock:
+            pool = _pools.get(num_threads)
+            if pool is None:
+                pool = _pools[num_threads] = ThreadPoolExecutor(max_workers=num_threads,
+                                                                thread_name_prefix="por-pessoa")
+    return pool
+
+def mapear_por_pessoa(funcao, pessoas, num_threads):
+    """
+    Aplica `funcao` a cada pessoa e retorna os resultados na ordem das pessoas.
+
+    Com `num_threads` <= 1 (ou uma única pessoa), executa em sequência na thread
+    atual, como o comportamento original. Caso contrário, distribui as pessoas
+    no pool compartilhado; `funcao` deve ser thread-safe (modelos por thread).
+    Chamadas vindas de dentro do próprio pool rodam em sequência, para não
+    esperar por threads que estão ocupadas com a própria chamada.
+    """
+    if num_threads <= 1 or len(pessoas) <= 1 or threading.current_thread().name.startswith("por-pessoa"):
+        return [funcao(pessoa) for pessoa in pessoas]
+    # Executor.map preserva a ordem de entrada, independentemente da ordem de conclusão
+    return list(obter_pool(num_threads).map(funcao, pessoas))
@@ -0,0 +1,133 @@
+
+from quadro import obter_quadro
+from detector_pessoas_pose import detectar_pessoas_e_poses_quadro
+from detector_faces import detectar_faces_quadro
+from expressao_boca_face_mesh import analisar_expressoes_faciais_quadro
+from analise_pose_gestos import analisar_gesticulacao
+from direcao_olhar import analisar_direcao_olhar
+from classificador_social import classificar_papeis_sociais
+from configuracao import CONFIGURACAO_PADRAO
+from cache_resultados import derivar_chave
+from instrumentacao import METRICAS
+
+# Versão de cada etapa, parte da chave do cache de resultados. Incremente ao trocar o
+# modelo ou alterar a lógica de uma etapa, para que resultados antigos não sejam reaproveitados.
+VERSOES_ETAPAS = {
+    "pose": "yolov8n-pose/1",
+    "faces": "dlib-hog/1",
+    "expressoes": "face-mesh/1",
+    "gestos": "1",
+    "olhar": "1",
+    "classificacao": "1",
+}
+
+# Opções da ConfiguracaoPipeline que afetam cada etapa (também parte da chave do cache)
+CAMPOS_CONFIG_ETAPAS = {
+    "pose": ("backend_pose", "variante_pose", "modelo_pose", "tamanho_entrada_pose", "lado_maximo_pose"),
+    "faces": ("calcular_encoding_facial", "modo_localizacao_face", "limiar_confianca_keypoints", "lado_maximo_hog",
+              "lado_minimo_roi_hog", "lado_maximo_roi_hog"),
+    "expressoes": ("modo_face_mesh", "max_faces_mesh", "face_mesh_estatico", "limiar_associacao_mesh",
+                   "lado_minimo_roi_mesh", "lado_maximo_roi_mesh"),
+    "gestos": ("limiar_confianca_keypoints",),
+    "olhar": (),
+    "classificacao": (),
+}
+
+def _etapas(config):
+    """As 6 etapas, em ordem, como (nome, função(quadro, deteccoes))."""
+    return [
+        # Etapa 1: Detecção de Pessoas e Pose
+        ("pose", lambda quadro, _: detectar_pessoas_e_poses_quadro(quadro, config)),
+        # Etapas subsequentes
+        ("faces", lambda quadro, deteccoes: detectar_faces_quadro(quadro, deteccoes, config)),
+        ("expressoes", lambda quadro, deteccoes: analisar_expressoes_faciais_quadro(quadro, deteccoes, config)),
+        ("gestos", lambda quadro, deteccoes: analisar_gesticulacao(deteccoes, config)),
+        ("olhar", lambda quadro, deteccoes: analisar_direcao_olhar(deteccoes)),
+        ("classificacao", lambda quadro, deteccoes: classificar_papeis_sociais(deteccoes)),
+    ]
+
+def chaves_etapas(quadro, config=None):
+    """
+    Chave de cache de cada etapa para este quadro e configuração.
+
+    Cada chave encadeia a chave da etapa anterior: alterar uma etapa (ou suas
+    opções) invalida apenas ela e as seguintes. Por exemplo, mudar a lógica do
+    classificador reaproveita a inferência de pose, faces e Face Mesh.
+    """
+    config = config or CONFIGURACAO_PADRAO
+    chaves = {}
+    chave = quadro.chave_conteudo
+    for nome, _ in _etapas(config):
+        opcoes = tuple((campo, getattr(config, campo)) for campo in CAMPOS_CONFIG_ETAPAS[nome])
+        chave = derivar_chave(chave, nome, VERSOES_ETAPAS[nome], opcoes)
+        chaves[nome] = chave
+    return chaves
+
+def analisar_quadro(quadro, config=None, cache=None):
+    """
+    Executa as 6 etapas do pipeline sobre um quadro já decodificado. O tempo de
+    cada etapa é registrado em `instrumentacao.METRICAS`.
+
+    Args:
+        quadro (Quadro): A imagem de entrada. O mesmo ndarray é compartilhado por todas as etapas.
+        config (ConfiguracaoPipeline, opcional): Opções das etapas.
+        cache (CacheResultados, opcional): Cache da saída de cada etapa. A análise
+            recomeça a partir da última etapa já guardada para esta imagem e configuração.
+
+    Returns:
+        list: As detecções com a classificação final, ou None se ninguém for detectado.
+    """
+    etapas = _etapas(config)
+    deteccoes = None
+    inicio = 0
+    if cache is not None:
+        chaves = chaves_etapas(quadro, config)
+        # Procura a partir do fim: basta a saída da etapa mais avançada já calculada
+        nomes = [nome for nome, _ in etapas]
+        etapa, deteccoes = cache.procurar([(nome, chaves[nome]) for nome in reversed(nomes)])
+        if etapa is not None:
+            inicio = nomes.index(etapa) + 1
+
+    for nome, funcao in etapas[inicio:]:
+        if nome != "pose" and not deteccoes:
+            break # Ninguém detectado
+        with METRICAS.cronometrar(nome):
+            deteccoes = funcao(quadro, deteccoes)
+        if cache is not None:
+            cache.guardar(chaves[nome], deteccoes or [])
+
+    return deteccoes or None
+
+def completar_analise(quadro, deteccoes_pose, config=None):
+    """
+    Executa as etapas 2 a 6 sobre detecções de pose já calculadas (por exemplo,
+    por `detectar_pessoas_e_poses_lote`, que agrupa várias imagens em uma chamada ao YOLO).
+
+    Returns:
+        list: As detecções com a classificação final, ou None se ninguém foi detectado.
+    """
+    deteccoes = deteccoes_pose
+    for nome, funcao in _etapas(config)[1:]:
+        if not deteccoes:
+            break # Ninguém detectado
+        with METRICAS.cronometrar(nome):
+            deteccoes = funcao(quadro, deteccoes)
+    return deteccoes or None
+
+def analisar_imagem(fonte, config=None, cache=None):
+    """
+    Decodifica a imagem uma única vez e executa o pipeline completo.
+
+    Args:
+        fonte: Caminho, bytes, ndarray BGR ou Quadro.
+        config (ConfiguracaoPipeline, opcional): Opções das etapas.
+        cache (CacheResultados, opcional): Cache da saída de cada etapa.
+
+    Returns:
+        tuple: (resultado_final, quadro). resultado_final é None se ninguém for
+               detectado; quadro é None se a imagem não puder ser lida.
+    """
+    quadro = obter_quadro(fonte)
+    if quadro is None:
+        return None, None
+    return analisar_quadro(quadro, config, cache), quadro
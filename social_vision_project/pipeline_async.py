@@ -0,0 +1,141 @@
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from quadro import obter_quadro
+from configuracao import CONFIGURACAO_PADRAO
+from detector_pessoas_pose import detectar_pessoas_e_poses_quadro
+from detector_faces import detectar_face_pessoa
+from expressao_boca_face_mesh import analisar_expressao_pessoa, analisar_expressoes_faciais_quadro
+from analise_pose_gestos import analisar_gesticulacao
+from direcao_olhar import analisar_direcao_olhar
+from classificador_social import classificar_papeis_sociais
+
+class AnalisadorAssincrono:
+    """
+    Fachada asyncio do pipeline: nenhuma etapa bloqueia o event loop.
+
+    A decodificação e a inferência rodam em um pool de threads. Depois do
+    YOLO, a face e o Face Mesh de cada pessoa são independentes das demais e
+    são executados como tarefas concorrentes, uma por pessoa. Cancelar a
+    análise (ou estourar o `timeout`) cancela as tarefas por pessoa que ainda
+    não começaram; as que já estão em execução terminam, mas o resultado é
+    descartado.
+
+    Exemplo:
+        async with AnalisadorAssincrono(num_workers=4) as analisador:
+            async for fonte, resultado, erro in analisador.analisar_varios(caminhos, timeout=10):
+                ...
+    """
+
+    def __init__(self, num_workers=4, config=None, executor=None):
+        """
+        Args:
+            num_workers (int): Threads do pool (ignorado se `executor` for dado).
+            config (ConfiguracaoPipeline, opcional): Opções das etapas.
+            executor (concurrent.futures.Executor, opcional): Pool próprio do chamador.
+        """
+        self.config = config or CONFIGURACAO_PADRAO
+        self._executor_proprio = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix="pipeline-async")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *excecao):
+        self.fechar()
+
+    def fechar(self):
+        if self._executor_proprio:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def analisar(self, fonte, timeout=None):
+        """
+        Analisa uma imagem sem bloquear o event loop.
+
+        Args:
+            fonte: Caminho, bytes, ndarray BGR ou Quadro.
+            timeout (float, opcional): Prazo, em segundos; estoura asyncio.TimeoutError.
+
+        Returns:
+            tuple: (resultado_final, quadro), como `pipeline.analisar_imagem`.
+        """
+        return await asyncio.wait_for(self._analisar(fonte), timeout)
+
+    async def analisar_varios(self, fontes, concorrencia=4, timeout=None):
+        """
+        Analisa várias imagens, com até `concorrencia` em andamento, e produz cada
+        resultado assim que a imagem termina (não necessariamente na ordem de entrada).
+
+        Yields:
+            tuple: (fonte, resultado_final, erro). `erro` é None em caso de sucesso
+                   (inclusive quando ninguém é detectado) ou a exceção da imagem.
+        """
+        semaforo = asyncio.Semaphore(concorrencia)
+
+        async def analisar_uma(fonte):
+            async with semaforo:
+                try:
+                    resultado, quadro = await self.analisar(fonte, timeout)
+                    if quadro is None:
+                        origem = fonte if isinstance(fonte, str) else type(fonte).__name__
+                        return fonte, None, ValueError(f"Não foi possível ler a imagem: {origem}")
+                    return fonte, resultado, None
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    return fonte, None, e
+
+        tarefas = [asyncio.ensure_future(analisar_uma(fonte)) for fonte in fontes]
+        try:
+            for proxima in asyncio.as_completed(tarefas):
+                yield await proxima
+        finally:
+            # O consumidor parou de iterar (ou foi cancelado): cancela o que falta
+            for tarefa in tarefas:
+                tarefa.cancel()
+
+    async def _executar(self, funcao, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, funcao, *args)
+
+    async def _analisar(self, fonte):
+        quadro = await self._executar(_decodificar, fonte)
+        if quadro is None:
+            return None, None
+
+        deteccoes = await self._executar(detectar_pessoas_e_poses_quadro, quadro, self.config)
+        if not deteccoes:
+            return None, quadro
+
+        # Etapas 2 e 3: face e Face Mesh de cada pessoa, concorrentes entre pessoas
+        tarefas = [asyncio.ensure_future(self._analisar_pessoa(quadro, pessoa)) for pessoa in deteccoes]
+        try:
+            await asyncio.gather(*tarefas)
+        except BaseException:
+            for tarefa in tarefas:
+                tarefa.cancel()
+            raise
+        if self.config.modo_face_mesh == "quadro_inteiro":
+            # Uma única chamada para o quadro inteiro, depois que todas as faces foram localizadas
+            await self._executar(analisar_expressoes_faciais_quadro, quadro, deteccoes, self.config)
+
+        # Etapas 4 a 6: operações vetorizadas sobre todas as pessoas
+        resultado = await self._executar(_classificar, deteccoes, self.config)
+        return resultado, quadro
+
+    async def _analisar_pessoa(self, quadro, pessoa):
+        pessoa['face_info'] = await self._executar(detectar_face_pessoa, quadro, pessoa, self.config)
+        if self.config.modo_face_mesh != "quadro_inteiro":
+            pessoa['expressoes'] = await self._executar(analisar_expressao_pessoa, quadro, pessoa, self.config)
+
+def _decodificar(fonte):
+    quadro = obter_quadro(fonte)
+    if quadro is not None:
+        # Converte para RGB aqui, antes que as tarefas por pessoa usem a vista RGB ao mesmo tempo
+        quadro.rgb
+    return quadro
+
+def _classificar(deteccoes, config):
+    deteccoes = analisar_gesticulacao(deteccoes, config)
+    deteccoes = analisar_direcao_olhar(deteccoes)
+    return classificar_papeis_sociais(deteccoes)
@@ -0,0 +1,162 @@
+
+import hashlib
+
+import cv2
+import numpy as np
+
+class Quadro:
+    """
+    Representa uma imagem (ou frame de vídeo) decodificada uma única vez.
+
+    As etapas do pipeline recebem o mesmo objeto e compartilham o ndarray,
+    em vez de cada uma ler e converter o arquivo novamente. As vistas BGR
+    e RGB são calculadas sob demanda e apenas uma vez.
+    """
+
+    def __init__(self, img_bgr, origem=None):
+        """
+        Args:
+            img_bgr (np.ndarray): Imagem já decodificada no formato BGR (OpenCV).
+            origem (str, opcional): Caminho ou descrição da origem da imagem.
+        """
+        self._bgr = img_bgr
+        self._rgb = None
+        self._chave_conteudo = None
+        self._reduzidos = {}
+        self.origem = origem
+
+    @classmethod
+    def de_arquivo(cls, image_path):
+        """Decodifica uma imagem do disco. Retorna None se a leitura falhar."""
+        img = cv2.imread(image_path)
+        if img is None:
+            return None
+        return cls(img, origem=image_path)
+
+    @classmethod
+    def de_bytes(cls, dados, origem=None):
+        """Decodifica uma imagem a partir de bytes (ex.: upload). Retorna None se falhar."""
+        buffer = np.frombuffer(dados, dtype=np.uint8)
+        img = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+        if img is None:
+            return None
+        return cls(img, origem=origem)
+
+    @property
+    def bgr(self):
+        """Imagem no formato BGR (OpenCV)."""
+        return self._bgr
+
+    @property
+    def rgb(self):
+        """Imagem no formato RGB, convertida na primeira vez que for pedida."""
+        if self._rgb is None:
+            self._rgb = cv2.cvtColor(self._bgr, cv2.COLOR_BGR2RGB)
+        return self._rgb
+
+    @property
+    def chave_conteudo(self):
+        """
+        Hash dos pixels decodificados (e das dimensões), calculado uma única vez.
+        Independe de a imagem ter vindo de um arquivo, de bytes ou de um ndarray.
+        """
+        if self._chave_conteudo is None:
+            h = hashlib.blake2b(digest_size=16)
+            h.update(repr(self._bgr.shape).encode('utf-8'))
+            h.update(np.ascontiguousarray(self._bgr).data)
+            self._chave_conteudo = h.hexdigest()
+        return self._chave_conteudo
+
+    def reduzido(self, lado_maximo):
+        """
+        Versão BGR reduzida para que o maior lado não passe de `lado_maximo` (quadro
+        "proxy" para a detecção), calculada uma única vez para cada tamanho.
+
+        Returns:
+            tuple: (imagem, escala). Se a imagem já couber (ou `lado_maximo` for 0),
+                   retorna a própria imagem, sem cópia, e escala 1.0. As coordenadas
+                   na imagem reduzida são convertidas para o original dividindo pela escala.
+        """
+        escala = escala_para_faixa(self._bgr.shape, 0, lado_maximo)
+        if escala == 1.0:
+            return self._bgr, 1.0
+        reduzido = self._reduzidos.get(lado_maximo)
+        if reduzido is None:
+            reduzido = self._reduzidos[lado_maximo] = redimensionar(self._bgr, escala)
+        return reduzido, escala
+
+    def recorte_rgb(self, regiao, lado_minimo=0, lado_maximo=0):
+        """
+        Recorta uma região em RGB, contígua (como o dlib e o MediaPipe exigem) e com o
+        maior lado dentro de [`lado_minimo`, `lado_maximo`] (0 = sem limite).
+
+        Faz uma única cópia: a conversão de cor ou o redimensionamento já produzem um
+        array novo. Se a vista RGB do quadro inteiro ainda não existe, apenas a região
+        é convertida.
+
+        Args:
+            regiao (tuple): (x1, y1, x2, y2) em pixels do quadro, já limitada às bordas.
+
+        Returns:
+            tuple: (recorte, escala). Coordenadas no recorte são convertidas para o
+                   quadro dividindo pela escala e somando (x1, y1).
+        """
+        x1, y1, x2, y2 = regiao
+        escala = escala_para_faixa((y2 - y1, x2 - x1), lado_minimo, lado_maximo)
+        if self._rgb is not None:
+            recorte = self._rgb[y1:y2, x1:x2]
+            if escala == 1.0:
+                return np.ascontiguousarray(recorte), 1.0
+            return redimensionar(recorte, escala), escala
+        recorte = self._bgr[y1:y2, x1:x2]
+        if escala < 1.0:
+            # Reduz antes de converter: a conversão de cor roda sobre menos pixels
+            recorte = redimensionar(recorte, escala)
+            return cv2.cvtColor(recorte, cv2.COLOR_BGR2RGB), escala
+        recorte = cv2.cvtColor(recorte, cv2.COLOR_BGR2RGB)
+        if escala > 1.0:
+            recorte = redimensionar(recorte, escala)
+        return recorte, escala
+
+    @property
+    def altura(self):
+        return self._bgr.shape[0]
+
+    @property
+    def largura(self):
+        return self._bgr.shape[1]
+
+def escala_para_faixa(shape, lado_minimo=0, lado_maximo=0):
+    """
+    Escala que leva o maior lado de uma imagem (ou região) de dimensões `shape`
+    para dentro de [`lado_minimo`, `lado_maximo`]; 0 desativa o respectivo limite.
+    """
+    maior_lado = max(shape[0], shape[1])
+    if maior_lado <= 0:
+        return 1.0
+    if lado_maximo and maior_lado > lado_maximo:
+        return lado_maximo / maior_lado
+    if lado_minimo and maior_lado < lado_minimo:
+        return lado_minimo / maior_lado
+    return 1.0
+
+def redimensionar(imagem, escala):
+    """Redimensiona pela escala: INTER_AREA para reduzir (sem serrilhado), INTER_LINEAR para ampliar."""
+    altura, largura = imagem.shape[:2]
+    tamanho = (max(1, round(largura * escala)), max(1, round(altura * escala)))
+    return cv2.resize(imagem, tamanho, interpolation=cv2.INTER_AREA if escala < 1.0 else cv2.INTER_LINEAR)
+
+def obter_quadro(fonte):
+    """
+    Aceita um caminho, bytes, um ndarray BGR ou um Quadro e devolve um Quadro.
+
+    Returns:
+        Quadro: O quadro correspondente, ou None se a imagem não puder ser lida.
+    """
+    if isinstance(fonte, Quadro):
+        return fonte
+    if isinstance(fonte, np.ndarray):
+        return Quadro(fonte)
+    if isinstance(fonte, (bytes, bytearray, memoryview)):
+        return Quadro.de_bytes(fonte)
+    return Quadro.de_arquivo(fonte)
@@ -0,0 +1,156 @@
+
+import itertools
+
+import numpy as np
+
+from geometria import matriz_iou, associar_gulosamente
+
+def movimento_relativo(bbox_anterior, bbox_atual):
+    """
+    Mede quanto uma bbox mudou: o maior entre o deslocamento do centro (relativo
+    à diagonal da bbox anterior) e a variação relativa da largura ou da altura.
+
+    Returns:
+        float: 0 para bboxes idênticas; ~0.05 indica uma mudança de 5%.
+    """
+    a = np.asarray(bbox_anterior, dtype=np.float64)
+    b = np.asarray(bbox_atual, dtype=np.float64)
+    largura_a, altura_a = max(a[2] - a[0], 1.0), max(a[3] - a[1], 1.0)
+    diagonal = np.hypot(largura_a, altura_a)
+    deslocamento = np.hypot((b[0] + b[2] - a[0] - a[2]) / 2, (b[1] + b[3] - a[1] - a[3]) / 2) / diagonal
+    variacao_largura = abs((b[2] - b[0]) - largura_a) / largura_a
+    variacao_altura = abs((b[3] - b[1]) - altura_a) / altura_a
+    return max(deslocamento, variacao_largura, variacao_altura)
+
+class Trilha:
+    """
+    Uma pessoa acompanhada ao longo dos quadros.
+
+    A posição é prevista com velocidade constante (suavizada, em pixels por
+    quadro) para associar a trilha às detecções dos quadros seguintes e para
+    interpolar sua posição nos quadros em que o YOLO não é executado.
+    """
+
+    def __init__(self, id_trilha, bbox, suavizacao=0.5):
+        self.id = id_trilha
+        self.bbox = np.asarray(bbox, dtype=np.float64)
+        self.velocidade = np.zeros(4)
+        self.suavizacao = suavizacao
+        self.idade = 1
+        # Quadros desde a última detecção associada a esta trilha
+        self.quadros_sem_deteccao = 0
+
+    def prever(self, passos=1):
+        """bbox prevista `passos` quadros depois do quadro atual."""
+        return self.bbox + self.velocidade * (self.quadros_sem_deteccao + passos)
+
+    def atualizar(self, bbox, passos=1):
+        bbox = np.asarray(bbox, dtype=np.float64)
+        velocidade_observada = (bbox - self.bbox) / (self.quadros_sem_deteccao + passos)
+        self.velocidade = self.suavizacao * velocidade_observada + (1 - self.suavizacao) * self.velocidade
+        self.bbox = bbox
+        self.idade += 1
+        self.quadros_sem_deteccao = 0
+
+class RastreadorPessoas:
+    """
+    Atribui IDs persistentes às pessoas detectadas em quadros consecutivos.
+
+    A associação segue a ideia do ByteTrack: primeiro as detecções de alta
+    confiança são associadas às posições previstas das trilhas por IoU; depois,
+    as de baixa confiança tentam recuperar as trilhas que ficaram sem par.
+    Detecções de baixa confiança sem trilha são descartadas (provavelmente
+    falsos positivos) e trilhas sem detecção por `max_quadros_perdida` quadros
+    são encerradas.
+    """
+
+    def __init__(self, limiar_iou=0.3, limiar_confianca_alta=0.5, max_quadros_perdida=30):
+        self.limiar_iou = limiar_iou
+        self.limiar_confianca_alta = limiar_confianca_alta
+        self.max_quadros_perdida = max_quadros_perdida
+        self.trilhas = {}
+        self._proximo_id = itertools.count()
+
+    def obter_trilha(self, id_trilha):
+        """Retorna a trilha com o ID dado, ou None se ela já foi encerrada."""
+        return self.trilhas.get(id_trilha)
+
+    def atualizar(self, deteccoes, passos=1):
+        """
+        Associa as detecções do quadro atual às trilhas.
+
+        Args:
+            deteccoes (list): Pessoas detectadas no quadro (com 'bbox' e, opcionalmente, 'conf').
+            passos (int): Quadros desde a atualização anterior (maior que 1 quando o
+                detector não roda em todos os quadros ou quando quadros são descartados).
+
+        Returns:
+            list: As pessoas mantidas, com 'id' substituído pelo ID persistente da trilha
+                  e o índice original da detecção em 'indice_deteccao'.
+        """
+        trilhas = list(self.trilhas.values())
+        confiancas = np.array([p.get('conf', 1.0) for p in deteccoes], dtype=np.float64)
+        altas = np.flatnonzero(confiancas >= self.limiar_confianca_alta)
+        baixas = np.flatnonzero(confiancas < self.limiar_confianca_alta)
+
+        associacoes = {}
+        trilhas_livres = list(range(len(trilhas)))
+        for grupo in (altas, baixas):
+            if len(grupo) == 0 or not trilhas_livres:
+                continue
+            previstas = [trilhas[t].prever(passos) for t in trilhas_livres]
+            iou = matriz_iou([deteccoes[i]['bbox'] for i in grupo], previstas)
+            usadas = set()
+            for linha, coluna in associar_gulosamente(iou, self.limiar_iou):
+                associacoes[int(grupo[linha])] = trilhas[trilhas_livres[coluna]]
+                usadas.add(trilhas_livres[coluna])
+            trilhas_livres = [t for t in trilhas_livres if t not in usadas]
+
+        # Trilhas sem detecção neste quadro envelhecem e, eventualmente, são encerradas
+        for t in trilhas_livres:
+            trilha = trilhas[t]
+            trilha.quadros_sem_deteccao += passos
+            if trilha.quadros_sem_deteccao > self.max_quadros_perdida:
+                del self.trilhas[trilha.id]
+
+        pessoas = []
+        for indice, pessoa in enumerate(deteccoes):
+            trilha = associacoes.get(indice)
+            if trilha is not None:
+                trilha.atualizar(pessoa['bbox'], passos)
+            elif confiancas[indice] >= self.limiar_confianca_alta:
+                trilha = Trilha(next(self._proximo_id), pessoa['bbox'])
+                self.trilhas[trilha.id] = trilha
+            else:
+                continue
+            pessoa['indice_deteccao'] = pessoa.get('id', indice)
+            pessoa['id'] = trilha.id
+            pessoas.append(pessoa)
+
+        return pessoas
+
+    def interpolar(self, deteccoes, passos):
+        """
+        Estima as pessoas `passos` quadros depois de `deteccoes` (as detecções do último
+        quadro em que o YOLO rodou), deslocando a bbox e os keypoints de cada uma pela
+        velocidade de sua trilha.
+
+        Returns:
+            list: Cópias das detecções, com 'interpolada' = True.
+        """
+        pessoas = []
+        for pessoa in deteccoes:
+            pessoa = dict(pessoa)
+            trilha = self.trilhas.get(pessoa['id'])
+            if trilha is not None:
+                deslocamento = trilha.velocidade * passos
+                pessoa['bbox'] = [int(round(v)) for v in np.asarray(pessoa['bbox']) + deslocamento]
+                keypoints = pessoa.get('keypoints')
+                if isinstance(keypoints, np.ndarray):
+                    # Os keypoints acompanham o centro da bbox; os ausentes (0, 0) continuam ausentes
+                    centro = np.rint([(deslocamento[0] + deslocamento[2]) / 2,
+                                      (deslocamento[1] + deslocamento[3]) / 2]).astype(keypoints.dtype)
+                    pessoa['keypoints'] = np.where(keypoints.any(axis=1, keepdims=True), keypoints + centro, keypoints)
+            pessoa['interpolada'] = True
+            pessoas.append(pessoa)
+        return pessoas
@@ -0,0 +1,323 @@
+
+import json
+import os
+
+import numpy as np
+
+from deteccao import NUM_KEYPOINTS, tem_keypoints, keypoints_como_array
+from serializacao import converter_para_json, preparar_para_json
+
+# Destinos de resultados ("sinks"). Todos têm a mesma interface:
+#   saida.escrever(deteccoes, **metadados)  # um quadro/imagem por chamada, em fluxo
+#   saida.fechar()                         # ou use `with criar_saida(...) as saida:`
+# `deteccoes` pode ser None (ex.: imagem com erro); os metadados (arquivo, índice do
+# quadro, timestamp, erro...) são guardados junto de cada quadro.
+
+class _Saida:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
+
+    def flush(self):
+        pass
+
+class SaidaJSON(_Saida):
+    """
+    JSON indentado, como os `salvar_resultado_json` de cada etapa. Cada quadro é
+    acrescentado ao array assim que chega, então lotes e vídeos longos não ficam
+    na memória. Com um único quadro sem metadados, grava a lista de pessoas, no
+    formato original.
+    """
+
+    def __init__(self, caminho, indent=4):
+        self.indent = indent
+        self._arquivo = open(caminho, 'w', encoding='utf-8')
+        self._primeiro = None # Retido até o segundo quadro: pode ser o caso de quadro único
+        self._quadros = 0
+
+    def escrever(self, deteccoes, **metadados):
+        registro = dict(metadados)
+        if deteccoes is not None:
+            registro["pessoas"] = preparar_para_json(deteccoes)
+        self._quadros += 1
+        if self._quadros == 1:
+            self._primeiro = registro
+            return
+        if self._quadros == 2:
+            self._arquivo.write('[')
+            self._escrever_elemento(self._primeiro)
+            self._primeiro = None
+        self._arquivo.write(',')
+        self._escrever_elemento(registro)
+
+    def _escrever_elemento(self, registro):
+        # Mesmo texto que json.dump(lista, indent=...) produziria para o elemento
+        prefixo = ' ' * self.indent
+        texto = json.dumps(registro, indent=self.indent, default=converter_para_json)
+        self._arquivo.write('\n' + prefixo + texto.replace('\n', '\n' + prefixo))
+
+    def flush(self):
+        self._arquivo.flush()
+
+    def fechar(self):
+        if self._quadros <= 1:
+            dados = [self._primeiro] if self._quadros else []
+            if self._quadros and set(self._primeiro) == {"pessoas"}:
+                dados = self._primeiro["pessoas"]
+            json.dump(dados, self._arquivo, indent=self.indent, default=converter_para_json)
+        else:
+            self._arquivo.write('\n]')
+        self._arquivo.close()
+
+class SaidaJSONL(_Saida):
+    """
+    JSON Lines: um objeto compacto por quadro, gravado assim que chega.
+
+    Com `compacto=True`, os keypoints são gravados como arrays empacotados
+    ("keypoints": [[x, y], ...], "keypoints_conf": [c, ...], null = ausente)
+    em vez de 17 dicionários por pessoa.
+    """
+
+    def __init__(self, caminho, compacto=False):
+        self.compacto = compacto
+        self._arquivo = open(caminho, 'w', encoding='utf-8')
+
+    def escrever(self, deteccoes, **metadados):
+        registro = dict(metadados)
+        if deteccoes is not None:
+            registro["pessoas"] = ([_pessoa_compacta(p) for p in deteccoes] if self.compacto
+                                   else preparar_para_json(deteccoes))
+        separadores = (',', ':') if self.compacto else None
+        self._arquivo.write(json.dumps(registro, default=converter_para_json, separators=separadores) + '\n')
+
+    def flush(self):
+        self._arquivo.flush()
+
+    def fechar(self):
+        self._arquivo.close()
+
+def _pessoa_compacta(pessoa):
+    pessoa = dict(pessoa)
+    if tem_keypoints(pessoa):
+        keypoints, confiancas = keypoints_como_array(pessoa)
+        pessoa['keypoints'] = np.asarray(keypoints).tolist()
+        pessoa['keypoints_conf'] = [None if np.isnan(c) else round(float(c), 4) for c in confiancas]
+    return pessoa
+
+# Colunas do formato colunar: (nome, dtype, forma por pessoa). Valores ausentes: -1 nos
+# inteiros, NaN nos floats e 0 em papel_social.
+COLUNAS = (
+    ("quadro", "<i8", ()),
+    ("id", "<i4", ()),
+    ("bbox", "<i4", (4,)),
+    ("conf", "<f4", ()),
+    ("keypoints", "<i4", (NUM_KEYPOINTS, 2)),
+    ("keypoints_conf", "<f4", (NUM_KEYPOINTS,)),
+    ("face_bbox", "<i4", (4,)),
+    ("boca_aberta", "|b1", ()),
+    ("razao_boca", "<f4", ()),
+    ("gesticulando", "|b1", ()),
+    ("olhando_para_id", "<i4", ()),
+    ("probabilidade_fala", "<f4", ()),
+    ("papel_social", "|u1", ()),
+)
+COLUNA_ENCODING = ("face_encoding", "<f4", (128,))
+PAPEIS_SOCIAIS = ("", "Falando", "Ouvindo", "Indeterminado")
+
+def colunas_do_quadro(deteccoes, indice_quadro, incluir_encoding=False):
+    """
+    Converte as pessoas de um quadro em colunas: {nome: array (n, *forma)}.
+    Aceita os keypoints em arrays ou no formato antigo (lista de dicionários).
+    """
+    n = len(deteccoes)
+    especificacao = COLUNAS + ((COLUNA_ENCODING,) if incluir_encoding else ())
+    colunas = {}
+    for nome, dtype, forma in especificacao:
+        vazio = np.nan if np.dtype(dtype).kind == 'f' else (0 if nome in ("papel_social", "boca_aberta", "gesticulando") else -1)
+        colunas[nome] = np.full((n,) + forma, vazio, dtype=dtype)
+    colunas["quadro"][:] = indice_quadro
+
+    for i, pessoa in enumerate(deteccoes):
+        colunas["id"][i] = pessoa['id']
+        colunas["bbox"][i] = pessoa.get('bbox', (-1, -1, -1, -1))
+        colunas["conf"][i] = pessoa.get('conf', np.nan)
+        if tem_keypoints(pessoa):
+            colunas["keypoints"][i], colunas["keypoints_conf"][i] = keypoints_como_array(pessoa)
+        face_info = pessoa.get('face_info')
+        if face_info:
+            colunas["face_bbox"][i] = face_info['face_bbox']
+            if incluir_encoding and face_info.get('face_encoding') is not None:
+                colunas["face_encoding"][i] = face_info['face_encoding']
+        expressoes = pessoa.get('expressoes') or {}
+        colunas["boca_aberta"][i] = bool(expressoes.get('boca_aberta', False))
+        if expressoes.get('razao_boca') is not None:
+            colunas["razao_boca"][i] = expressoes['razao_boca']
+        colunas["gesticulando"][i] = bool(pessoa.get('gesticulando', False))
+        if pessoa.get('olhando_para_id') is not None:
+            colunas["olhando_para_id"][i] = pessoa['olhando_para_id']
+        if pessoa.get('probabilidade_fala') is not None:
+            colunas["probabilidade_fala"][i] = pessoa['probabilidade_fala']
+        papel = pessoa.get('papel_social')
+        colunas["papel_social"][i] = PAPEIS_SOCIAIS.index(papel) if papel in PAPEIS_SOCIAIS else 0
+    return colunas
+
+class SaidaColunar(_Saida):
+    """
+    Formato binário colunar em um diretório: um arquivo `<coluna>.bin` por coluna
+    (uma linha por pessoa, valores brutos little-endian), `esquema.json` com o
+    dtype e a forma de cada coluna, e `quadros.jsonl` com os metadados de cada
+    quadro. Cada `escrever` acrescenta as linhas do quadro ao fim dos arquivos, e
+    `abrir_colunar` lê as colunas como memmaps, sem carregar tudo na memória.
+    """
+
+    def __init__(self, diretorio, incluir_encoding=False):
+        os.makedirs(diretorio, exist_ok=True)
+        self.diretorio = diretorio
+        self.incluir_encoding = incluir_encoding
+        self._especificacao = COLUNAS + ((COLUNA_ENCODING,) if incluir_encoding else ())
+        self._arquivos = {nome: open(os.path.join(diretorio, nome + '.bin'), 'wb')
+                          for nome, _, _ in self._especificacao}
+        self._quadros = open(os.path.join(diretorio, 'quadros.jsonl'), 'w', encoding='utf-8')
+        self._linhas = 0
+        self._num_quadros = 0
+        self._gravar_esquema()
+
+    def escrever(self, deteccoes, **metadados):
+        indice_quadro = metadados.get('indice', self._num_quadros)
+        n = len(deteccoes or [])
+        registro = dict(metadados, indice=indice_quadro, primeira_linha=self._linhas, pessoas=n)
+        self._quadros.write(json.dumps(registro, default=converter_para_json) + '\n')
+        if n:
+            for nome, valores in colunas_do_quadro(deteccoes, indice_quadro, self.incluir_encoding).items():
+                self._arquivos[nome].write(np.ascontiguousarray(valores).tobytes())
+        self._linhas += n
+        self._num_quadros += 1
+
+    def flush(self):
+        for arquivo in self._arquivos.values():
+            arquivo.flush()
+        self._quadros.flush()
+
+    def fechar(self):
+        for arquivo in self._arquivos.values():
+            arquivo.close()
+        self._quadros.close()
+        self._gravar_esquema()
+
+    def _gravar_esquema(self):
+        esquema = {
+            "versao": 1,
+            "linhas": self._linhas,
+            "quadros": self._num_quadros,
+            "colunas": [{"nome": nome, "dtype": dtype, "forma": list(forma)} for nome, dtype, forma in self._especificacao],
+            "papeis_sociais": list(PAPEIS_SOCIAIS),
+        }
+        with open(os.path.join(self.diretorio, 'esquema.json'), 'w') as f:
+            json.dump(esquema, f, indent=2)
+
+def abrir_colunar(diretorio):
+    """
+    Abre um resultado gravado por SaidaColunar sem lê-lo inteiro.
+
+    O número de linhas é deduzido do tamanho dos arquivos, então um resultado
+    ainda em gravação (ou interrompido) também pode ser lido.
+
+    Returns:
+        tuple: ({coluna: np.memmap (linhas, *forma)}, [metadados de cada quadro]).
+    """
+    with open(os.path.join(diretorio, 'esquema.json')) as f:
+        esquema = json.load(f)
+    colunas = {}
+    for coluna in esquema["colunas"]:
+        dtype, forma = np.dtype(coluna["dtype"]), tuple(coluna["forma"])
+        caminho = os.path.join(diretorio, coluna["nome"] + '.bin')
+        linhas = os.path.getsize(caminho) // (dtype.itemsize * int(np.prod(forma, dtype=np.int64)))
+        if linhas == 0:
+            colunas[coluna["nome"]] = np.empty((0,) + forma, dtype=dtype)
+        else:
+            colunas[coluna["nome"]] = np.memmap(caminho, dtype=dtype, mode='r', shape=(linhas,) + forma)
+    linhas = min((len(c) for c in colunas.values()), default=0)
+    colunas = {nome: c[:linhas] for nome, c in colunas.items()}
+
+    quadros = []
+    with open(os.path.join(diretorio, 'quadros.jsonl'), encoding='utf-8') as f:
+        for linha in f:
+            if linha.strip():
+                quadros.append(json.loads(linha))
+    return colunas, quadros
+
+class SaidaParquet(_Saida):
+    """
+    Apache Parquet (requer `pyarrow`), com as mesmas colunas do formato colunar;
+    cada `escrever` vira um row group. Os metadados dos quadros vão para
+    `<caminho>.quadros.jsonl`.
+    """
+
+    def __init__(self, caminho, incluir_encoding=False):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("O formato Parquet requer o pacote 'pyarrow' (pip install pyarrow).") from e
+        self._pa = pa
+        self.incluir_encoding = incluir_encoding
+        especificacao = COLUNAS + ((COLUNA_ENCODING,) if incluir_encoding else ())
+        campos = []
+        for nome, dtype, forma in especificacao:
+            tipo = pa.from_numpy_dtype(np.dtype(dtype))
+            if forma:
+                tipo = pa.list_(tipo, int(np.prod(forma)))
+            campos.append(pa.field(nome, tipo))
+        self._esquema = pa.schema(campos)
+        self._escritor = pq.ParquetWriter(caminho, self._esquema)
+        self._quadros = open(caminho + '.quadros.jsonl', 'w', encoding='utf-8')
+        self._num_quadros = 0
+
+    def escrever(self, deteccoes, **metadados):
+        pa = self._pa
+        indice_quadro = metadados.get('indice', self._num_quadros)
+        self._quadros.write(json.dumps(dict(metadados, indice=indice_quadro, pessoas=len(deteccoes or [])),
+                                       default=converter_para_json) + '\n')
+        self._num_quadros += 1
+        if not deteccoes:
+            return
+        arrays = []
+        for campo, (nome, valores) in zip(self._esquema, colunas_do_quadro(deteccoes, indice_quadro,
+                                                                           self.incluir_encoding).items()):
+            if valores.ndim > 1:
+                planos = pa.array(valores.reshape(-1), type=campo.type.value_type)
+                arrays.append(pa.FixedSizeListArray.from_arrays(planos, campo.type.list_size))
+            else:
+                arrays.append(pa.array(valores, type=campo.type))
+        self._escritor.write_table(pa.Table.from_arrays(arrays, schema=self._esquema))
+
+    def fechar(self):
+        self._escritor.close()
+        self._quadros.close()
+
+FORMATOS = ("json", "jsonl", "jsonl-compacto", "colunar", "parquet")
+
+def criar_saida(caminho, formato=None, incluir_encoding=False):
+    """
+    Cria o destino de resultados adequado.
+
+    Args:
+        caminho (str): Arquivo (json, jsonl, parquet) ou diretório (colunar).
+        formato (str, opcional): Um de FORMATOS. Se omitido, deduzido da extensão
+            (.json, .jsonl, .parquet; sem extensão = colunar).
+        incluir_encoding (bool): Grava a coluna face_encoding (formatos colunar e parquet).
+    """
+    if formato is None:
+        extensao = os.path.splitext(caminho)[1].lower()
+        formato = {".json": "json", ".jsonl": "jsonl", ".parquet": "parquet"}.get(extensao, "colunar")
+    if formato == "json":
+        return SaidaJSON(caminho)
+    if formato in ("jsonl", "jsonl-compacto"):
+        return SaidaJSONL(caminho, compacto=formato == "jsonl-compacto")
+    if formato == "colunar":
+        return SaidaColunar(caminho, incluir_encoding)
+    if formato == "parquet":
+        return SaidaParquet(caminho, incluir_encoding)
+    raise ValueError(f"Formato de saída desconhecido: {formato} (opções: {', '.join(FORMATOS)})")
@@ -0,0 +1,22 @@
+
+import numpy as np
+
+from deteccao import pessoa_para_json
+
+def converter_para_json(obj):
+    """
+    Função `default` para `json.dump`: converte arrays e escalares do NumPy
+    (ex.: embeddings float32, centros das pessoas) em tipos nativos do Python.
+    """
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Objeto do tipo {type(obj).__name__} não é serializável em JSON")
+
+def preparar_para_json(deteccoes):
+    """
+    Prepara uma lista de pessoas para serialização: os keypoints em arrays
+    voltam ao formato de lista de {"point_id", "x", "y", "conf"}.
+    """
+    return [pessoa_para_json(p) if isinstance(p, dict) else p for p in deteccoes]
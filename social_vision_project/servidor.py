@@ -0,0 +1,333 @@
+
+import argparse
+import collections
+import json
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from quadro import Quadro
+from configuracao import PRESETS_IMAGEM, configuracao_preset
+from inferencia_pose import BACKENDS_POSE
+from modelos import aquecer
+from detector_pessoas_pose import detectar_pessoas_e_poses_lote, parametros_modelo_pose
+from pipeline import completar_analise
+from serializacao import converter_para_json, preparar_para_json
+from instrumentacao import METRICAS, configurar_logging
+
+class ServicoSobrecarregado(Exception):
+    """O serviço atingiu o limite de pedidos em andamento."""
+
+class _Pedido:
+    """Uma imagem aguardando análise, com o prazo após o qual o cliente desiste."""
+
+    __slots__ = ('quadro', 'prazo', 'chegada', 'concluido', 'resultado', 'erro')
+
+    def __init__(self, quadro, prazo):
+        self.quadro = quadro
+        self.prazo = prazo
+        self.chegada = time.perf_counter()
+        self.concluido = threading.Event()
+        self.resultado = None
+        self.erro = None
+
+class ServicoInferencia:
+    """
+    Executa o pipeline para muitos clientes simultâneos.
+
+    Os pedidos entram em uma fila única. Uma thread de agrupamento retira o
+    primeiro pedido e espera até `espera_lote` segundos (ou até juntar
+    `tamanho_lote` pedidos) para enviar as imagens ao YOLO em uma única
+    chamada (micro-batching dinâmico). As etapas seguintes (faces, Face Mesh,
+    gestos, olhar e classificação) de cada imagem rodam em um pool limitado
+    de `num_workers` threads, cada uma com seus modelos já aquecidos.
+
+    O total de pedidos em andamento é limitado a `limite_pedidos`: acima dele,
+    novos pedidos são recusados na hora (ServicoSobrecarregado) em vez de
+    esperar em uma fila sem fim, o que mantém a latência previsível. Pedidos
+    cujo prazo expirou antes de serem processados são descartados.
+    """
+
+    def __init__(self, num_workers=4, tamanho_lote=8, espera_lote=0.01, limite_pedidos=64, config=None):
+        self.tamanho_lote = tamanho_lote
+        self.espera_lote = espera_lote
+        self.config = config
+        self._fila = queue.Queue()
+        self._vagas = threading.BoundedSemaphore(limite_pedidos)
+        self._parar = threading.Event()
+        self._pool = ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix="pipeline",
+                                        initializer=aquecer, initargs=('face_mesh', 'face_recognition'))
+        self._lock = threading.Lock()
+        self.contadores = collections.Counter()
+        self._latencias = collections.deque(maxlen=1000)
+        # Exceção que derrubou a thread de agrupamento (ex.: o YOLO não carregou)
+        self._erro_agrupador = None
+        self._agrupador = threading.Thread(target=self._agrupar, name="agrupador-yolo", daemon=True)
+        self._agrupador.start()
+
+    def analisar(self, quadro, timeout=30.0):
+        """
+        Analisa um quadro e bloqueia até o resultado ficar pronto.
+
+        Raises:
+            ServicoSobrecarregado: Se o limite de pedidos em andamento foi atingido.
+            TimeoutError: Se o resultado não ficou pronto em `timeout` segundos.
+        """
+        if not self._vagas.acquire(blocking=False):
+            self._contar('recusados')
+            raise ServicoSobrecarregado()
+        self._contar('aceitos')
+        pedido = _Pedido(quadro, time.perf_counter() + timeout)
+        self._fila.put(pedido)
+        if not pedido.concluido.wait(timeout):
+            self._contar('expirados')
+            raise TimeoutError("A análise não terminou dentro do prazo.")
+        if pedido.erro is not None:
+            raise pedido.erro
+        return pedido.resultado
+
+    def saude(self):
+        """Estado do serviço: "ok", ou "erro" com o motivo se a thread do YOLO falhou ou parou."""
+        if self._erro_agrupador is not None:
+            return {"status": "erro", "agrupador": f"{type(self._erro_agrupador).__name__}: {self._erro_agrupador}"}
+        if not self._agrupador.is_alive():
+            return {"status": "erro", "agrupador": "parado"}
+        return {"status": "ok"}
+
+    def metricas(self):
+        """
+        Contadores, tamanho médio dos lotes e percentis da latência (ms) dos últimos
+        pedidos, mais o tempo de cada etapa do pipeline ("pipeline", ver instrumentacao.py).
+        """
+        with self._lock:
+            metricas = dict(self.contadores)
+            latencias = np.array(self._latencias)
+        metricas['fila'] = self._fila.qsize()
+        if metricas.get('lotes'):
+            metricas['tamanho_medio_lote'] = metricas['imagens_em_lote'] / metricas['lotes']
+        if len(latencias):
+            for p in (50, 95, 99):
+                metricas[f'latencia_p{p}_ms'] = float(np.percentile(latencias, p) * 1000)
+        metricas['pipeline'] = METRICAS.resumo()
+        return metricas
+
+    def encerrar(self):
+        self._parar.set()
+        self._agrupador.join(timeout=1.0)
+        self._pool.shutdown(wait=True)
+
+    def _contar(self, nome, quantidade=1):
+        with self._lock:
+            self.contadores[nome] += quantidade
+
+    def _agrupar(self):
+        """
+        Thread de agrupamento: junta pedidos em lotes e executa o YOLO uma vez por lote.
+        Se o YOLO não carregar (ou a thread falhar), os pedidos seguintes falham na hora
+        com o mesmo erro, em vez de esperarem o prazo.
+        """
+        try:
+            aquecer('yolo_pose', parametros={'yolo_pose': parametros_modelo_pose(self.config)}) # Instância do YOLO desta thread
+            self._agrupar_lotes()
+        except Exception as e:
+            self._erro_agrupador = e
+            while not self._parar.is_set():
+                try:
+                    pedido = self._fila.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                pedido.erro = e
+                self._finalizar(pedido)
+
+    def _agrupar_lotes(self):
+        while not self._parar.is_set():
+            try:
+                lote = [self._fila.get(timeout=0.1)]
+            except queue.Empty:
+                continue
+            limite = time.perf_counter() + self.espera_lote
+            while len(lote) < self.tamanho_lote:
+                restante = limite - time.perf_counter()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(self._fila.get(timeout=restante))
+                except queue.Empty:
+                    break
+
+            # O cliente de um pedido expirado já recebeu erro: não gasta inferência com ele
+            agora = time.perf_counter()
+            for pedido in [p for p in lote if p.prazo <= agora]:
+                self._finalizar(pedido, 'descartados')
+            lote = [p for p in lote if p.prazo > agora]
+            if not lote:
+                continue
+
+            self._contar('lotes')
+            self._contar('imagens_em_lote', len(lote))
+            try:
+                with METRICAS.cronometrar("pose_lote"):
+                    deteccoes = detectar_pessoas_e_poses_lote([p.quadro for p in lote], self.tamanho_lote, self.config)
+            except Exception as e:
+                for pedido in lote:
+                    pedido.erro = e
+                    self._finalizar(pedido)
+                continue
+            enviados = 0
+            try:
+                for pedido, deteccoes_pose in zip(lote, deteccoes):
+                    futuro = self._pool.submit(self._completar, pedido, deteccoes_pose)
+                    futuro.add_done_callback(lambda futuro, pedido=pedido: self._verificar_execucao(futuro, pedido))
+                    enviados += 1
+            except Exception as e:
+                # Pool quebrado (ex.: o aquecimento do Face Mesh ou do dlib falhou): os pedidos
+                # restantes falham agora e o erro é repassado a _agrupar, que falha os seguintes
+                for pedido in lote[enviados:]:
+                    pedido.erro = e
+                    self._finalizar(pedido)
+                raise
+
+    def _completar(self, pedido, deteccoes_pose):
+        """Executado no pool: etapas 2 a 6 de uma imagem."""
+        try:
+            pedido.resultado = completar_analise(pedido.quadro, deteccoes_pose, self.config)
+        except Exception as e:
+            pedido.erro = e
+        self._finalizar(pedido)
+
+    def _verificar_execucao(self, futuro, pedido):
+        """
+        _completar trata os próprios erros: se o futuro terminou com exceção, o pedido nem
+        chegou a rodar (o pool quebrou depois do envio) e precisa ser finalizado aqui.
+        """
+        erro = futuro.exception() if not futuro.cancelled() else RuntimeError("Pedido cancelado.")
+        if erro is not None:
+            pedido.erro = erro
+            self._finalizar(pedido)
+
+    def _finalizar(self, pedido, contador=None):
+        with self._lock:
+            self.contadores[contador or ('erros' if pedido.erro is not None else 'concluidos')] += 1
+            self._latencias.append(time.perf_counter() - pedido.chegada)
+        self._vagas.release()
+        pedido.concluido.set()
+
+class ServidorHTTP(ThreadingHTTPServer):
+    """Uma thread por conexão; a fila de conexões do socket comporta rajadas de clientes."""
+    daemon_threads = True
+    request_queue_size = 128
+
+def criar_manipulador(servico, tamanho_maximo=20 * 1024 * 1024, timeout=30.0):
+    """Cria a classe que trata as requisições HTTP, ligada ao serviço."""
+
+    class Manipulador(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            if self.path == "/saude":
+                saude = servico.saude()
+                self._responder(200 if saude["status"] == "ok" else 503, saude)
+            elif self.path == "/metricas":
+                self._responder(200, servico.metricas())
+            elif self.path == "/metricas/prometheus":
+                metricas = servico.metricas()
+                metricas.pop('pipeline')
+                texto = METRICAS.para_prometheus(extras=metricas).encode('utf-8')
+                self._responder_bytes(200, texto, "text/plain; version=0.0.4; charset=utf-8")
+            else:
+                self._responder(404, {"erro": "Rota não encontrada."})
+
+        def do_POST(self):
+            # Nas respostas antes de ler o corpo, a conexão é fechada: com keep-alive, o
+            # corpo não lido seria interpretado como a próxima requisição
+            if self.path != "/analisar":
+                self.close_connection = True
+                self._responder(404, {"erro": "Rota não encontrada."})
+                return
+            try:
+                tamanho = int(self.headers.get("Content-Length", 0))
+            except ValueError:
+                self.close_connection = True
+                self._responder(400, {"erro": "Content-Length inválido."})
+                return
+            if tamanho > tamanho_maximo:
+                self.close_connection = True
+                self._responder(413, {"erro": f"Imagem maior que o limite de {tamanho_maximo} bytes."})
+                return
+            if tamanho <= 0:
+                self.close_connection = True
+                self._responder(400, {"erro": "Envie os bytes da imagem no corpo da requisição."})
+                return
+            # A decodificação acontece na thread da conexão, em paralelo com as demais
+            quadro = Quadro.de_bytes(self.rfile.read(tamanho))
+            if quadro is None:
+                self._responder(400, {"erro": "Não foi possível decodificar a imagem."})
+                return
+            try:
+                resultado = servico.analisar(quadro, timeout)
+            except ServicoSobrecarregado:
+                self._responder(503, {"erro": "Serviço sobrecarregado, tente novamente."}, {"Retry-After": "1"})
+                return
+            except TimeoutError as e:
+                self._responder(504, {"erro": str(e)})
+                return
+            except Exception as e:
+                self._responder(500, {"erro": f"{type(e).__name__}: {e}"})
+                return
+            self._responder(200, {"pessoas": preparar_para_json(resultado or [])})
+
+        def _responder(self, status, corpo, cabecalhos=None):
+            dados = json.dumps(corpo, default=converter_para_json).encode('utf-8')
+            self._responder_bytes(status, dados, "application/json; charset=utf-8", cabecalhos)
+
+        def _responder_bytes(self, status, dados, tipo, cabecalhos=None):
+            self.send_response(status)
+            self.send_header("Content-Type", tipo)
+            self.send_header("Content-Length", str(len(dados)))
+            for nome, valor in (cabecalhos or {}).items():
+                self.send_header(nome, valor)
+            self.end_headers()
+            self.wfile.write(dados)
+
+        def log_message(self, formato, *args):
+            pass # Uma linha por requisição atrapalha sob carga; use /metricas
+
+    return Manipulador
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serviço HTTP de análise de papéis sociais.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=4, help="Threads das etapas 2 a 6 (cada uma com seus modelos).")
+    parser.add_argument("--tamanho-lote", type=int, default=8, help="Máximo de imagens por chamada ao YOLO.")
+    parser.add_argument("--espera-lote-ms", type=float, default=10.0,
+                        help="Quanto esperar por mais pedidos antes de executar um lote.")
+    parser.add_argument("--limite-pedidos", type=int, default=64,
+                        help="Pedidos em andamento acima deste limite recebem 503.")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Prazo de cada pedido, em segundos.")
+    parser.add_argument("--preset", choices=PRESETS_IMAGEM, default=None,
+                        help="Ponto de operação (configuracao.PRESETS_IMAGEM); as demais opções o alteram.")
+    parser.add_argument("--backend-pose", choices=BACKENDS_POSE, default=None,
+                        help="Runtime do YOLO: pytorch, onnx (ONNX Runtime) ou openvino.")
+    parser.add_argument("--modelo-pose", default=None, help="Modelo do YOLO (padrão: o do backend).")
+    parser.add_argument("--threads-pose", type=int, default=None, help="Threads de inferência do YOLO (0 = padrão do runtime).")
+    args = parser.parse_args()
+
+    configurar_logging()
+    servico = ServicoInferencia(num_workers=args.workers, tamanho_lote=args.tamanho_lote,
+                                espera_lote=args.espera_lote_ms / 1000, limite_pedidos=args.limite_pedidos,
+                                config=configuracao_preset(args.preset, backend_pose=args.backend_pose,
+                                                           modelo_pose=args.modelo_pose, threads_pose=args.threads_pose))
+    servidor = ServidorHTTP((args.host, args.porta), criar_manipulador(servico, timeout=args.timeout))
+    print(f"Servindo em http://{args.host}:{args.porta} (POST /analisar, GET /saude, GET /metricas, GET /metricas/prometheus)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        servico.encerrar()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os módulos do pipeline se importam pelo nome (ex.: `from deteccao import ...`)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "social_vision_project"))
@@ -0,0 +1,46 @@
+import numpy as np
+
+from analise_pose_gestos import analisar_gesticulacao, calcular_mascara_gesticulacao
+
+def _gesticulando_original(keypoints):
+    """A heurística por pessoa de antes da vetorização, como referência."""
+    y = {kp['point_id']: kp['y'] for kp in keypoints}
+    linha_media_ombros = (y[5] + y[6]) / 2
+    linha_media_quadris = (y[11] + y[12]) / 2
+    return bool(y[9] < linha_media_ombros or y[10] < linha_media_ombros or
+                y[9] < (linha_media_quadris - (linha_media_quadris - linha_media_ombros) * 0.2))
+
+def _pessoas(keypoints):
+    return [{'id': i, 'bbox': [0, 0, 100, 100],
+             'keypoints': [{'point_id': k, 'x': int(x), 'y': int(y)} for k, (x, y) in enumerate(pontos)]}
+            for i, pontos in enumerate(keypoints)]
+
+def test_todos_confiaveis_igual_ao_original():
+    rng = np.random.default_rng(0)
+    # Coordenadas pequenas para que haja muitas igualdades nas comparações
+    keypoints = rng.integers(0, 40, size=(5000, 17, 2))
+    pessoas = analisar_gesticulacao(_pessoas(keypoints))
+    esperado = [_gesticulando_original(p['keypoints']) for p in _pessoas(keypoints)]
+    assert [p['gesticulando'] for p in pessoas] == esperado
+
+def test_quadros_e_pessoas_de_uma_vez():
+    rng = np.random.default_rng(1)
+    keypoints = rng.integers(0, 40, size=(30, 8, 17, 2))
+    mascara = calcular_mascara_gesticulacao(keypoints, np.ones(keypoints.shape[:3]))
+    assert mascara.shape == (30, 8)
+    for quadro in range(30):
+        np.testing.assert_array_equal(mascara[quadro], calcular_mascara_gesticulacao(keypoints[quadro]))
+
+def test_keypoints_pouco_confiaveis_sao_ignorados():
+    keypoints = np.zeros((1, 17, 2))
+    keypoints[0, [5, 6, 11, 12], 1] = [50, 50, 100, 100]
+    keypoints[0, [9, 10], 1] = [10, 90] # Pulso esquerdo acima dos ombros
+    confiancas = np.ones((1, 17))
+    assert calcular_mascara_gesticulacao(keypoints, confiancas).tolist() == [True]
+    confiancas[0, 9] = 0.1
+    assert calcular_mascara_gesticulacao(keypoints, confiancas).tolist() == [False]
+    confiancas[0, 9] = np.nan
+    assert calcular_mascara_gesticulacao(keypoints, confiancas).tolist() == [False]
+
+def test_sem_pessoas():
+    assert analisar_gesticulacao([]) == []
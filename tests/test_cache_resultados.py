@@ -0,0 +1,105 @@
+from dataclasses import replace
+
+import numpy as np
+
+import pipeline
+from cache_resultados import CacheResultados, derivar_chave
+from configuracao import CONFIGURACAO_PADRAO
+from quadro import Quadro
+
+def test_acerto_e_falha_em_memoria():
+    cache = CacheResultados(capacidade=2)
+    assert cache.obter("a") is None
+    cache.guardar("a", [{'id': 1}])
+    assert cache.obter("a", etapa="pose") == [{'id': 1}]
+    estatisticas = cache.estatisticas()
+    assert (estatisticas["acertos_memoria"], estatisticas["falhas"]) == (1, 1)
+    assert estatisticas["acertos_por_etapa"] == {"pose": 1}
+    assert estatisticas["taxa_acerto"] == 0.5
+
+def test_valores_sao_copiados():
+    cache = CacheResultados()
+    valor = [{'id': 1}]
+    cache.guardar("a", valor)
+    valor[0]['id'] = 2
+    cache.obter("a")[0]['id'] = 3
+    assert cache.obter("a") == [{'id': 1}]
+
+def test_lru_descarta_o_menos_usado():
+    cache = CacheResultados(capacidade=2)
+    cache.guardar("a", 1)
+    cache.guardar("b", 2)
+    cache.obter("a")
+    cache.guardar("c", 3)
+    assert cache.obter("b") is None
+    assert (cache.obter("a"), cache.obter("c")) == (1, 3)
+
+def test_nivel_em_disco(tmp_path):
+    CacheResultados(diretorio=str(tmp_path)).guardar("ab12", {'x': 1})
+    cache = CacheResultados(diretorio=str(tmp_path))
+    assert cache.obter("ab12") == {'x': 1}
+    assert cache.obter("ab12") == {'x': 1}
+    estatisticas = cache.estatisticas()
+    assert (estatisticas["acertos_disco"], estatisticas["acertos_memoria"]) == (1, 1)
+
+def test_procurar_conta_uma_falha_por_procura():
+    cache = CacheResultados()
+    cache.guardar("b", 2)
+    assert cache.procurar([("x", "a"), ("y", "b")]) == ("y", 2)
+    assert cache.procurar([("x", "a"), ("y", "c")]) == (None, None)
+    assert cache.estatisticas()["falhas"] == 1
+
+def test_derivar_chave():
+    assert derivar_chave("a", 1) == derivar_chave("a", 1)
+    assert derivar_chave("a", 1) != derivar_chave("a1")
+    assert derivar_chave("a", 1) != derivar_chave("a", "1")
+
+def _quadro(valor=0):
+    return Quadro(np.full((8, 8, 3), valor, dtype=np.uint8))
+
+def test_mudanca_de_configuracao_invalida_a_etapa_e_as_seguintes():
+    chaves = pipeline.chaves_etapas(_quadro())
+    assert chaves == pipeline.chaves_etapas(_quadro())
+    assert pipeline.chaves_etapas(_quadro(1))["pose"] != chaves["pose"]
+
+    alteradas = pipeline.chaves_etapas(_quadro(), replace(CONFIGURACAO_PADRAO, max_faces_mesh=7))
+    nomes = list(chaves)
+    inicio = nomes.index("expressoes")
+    assert all(alteradas[nome] == chaves[nome] for nome in nomes[:inicio])
+    assert all(alteradas[nome] != chaves[nome] for nome in nomes[inicio:])
+
+def test_mudanca_de_versao_invalida_a_etapa(monkeypatch):
+    chaves = pipeline.chaves_etapas(_quadro())
+    monkeypatch.setitem(pipeline.VERSOES_ETAPAS, "classificacao", "2")
+    alteradas = pipeline.chaves_etapas(_quadro())
+    assert alteradas["olhar"] == chaves["olhar"]
+    assert alteradas["classificacao"] != chaves["classificacao"]
+
+def test_analisar_quadro_retoma_da_ultima_etapa_guardada(monkeypatch):
+    chamadas = []
+
+    def etapa(nome):
+        def executar(*args):
+            chamadas.append(nome)
+            # As etapas recebem as detecções da anterior como a única lista dos argumentos
+            deteccoes = next((a for a in args if isinstance(a, list)), [{'id': 0}])
+            return [dict(p, **{nome: True}) for p in deteccoes]
+        return executar
+
+    monkeypatch.setattr(pipeline, "detectar_pessoas_e_poses_quadro", etapa("pose"))
+    monkeypatch.setattr(pipeline, "detectar_faces_quadro", etapa("faces"))
+    monkeypatch.setattr(pipeline, "analisar_expressoes_faciais_quadro", etapa("expressoes"))
+    monkeypatch.setattr(pipeline, "analisar_gesticulacao", etapa("gestos"))
+    monkeypatch.setattr(pipeline, "analisar_direcao_olhar", etapa("olhar"))
+    monkeypatch.setattr(pipeline, "classificar_papeis_sociais", etapa("classificacao"))
+
+    cache = CacheResultados()
+    primeiro = pipeline.analisar_quadro(_quadro(), cache=cache)
+    assert len(chamadas) == 6
+    assert pipeline.analisar_quadro(_quadro(), cache=cache) == primeiro
+    assert len(chamadas) == 6 # Acerto: nenhuma etapa é executada de novo
+
+    chamadas.clear()
+    config = replace(CONFIGURACAO_PADRAO, max_faces_mesh=7)
+    assert pipeline.analisar_quadro(_quadro(), config, cache) == primeiro
+    assert chamadas == ["expressoes", "gestos", "olhar", "classificacao"]
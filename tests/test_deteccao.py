@@ -0,0 +1,22 @@
+import numpy as np
+
+from deteccao import DeteccoesPose
+
+def test_vazio():
+    deteccoes = DeteccoesPose.vazio()
+    assert len(deteccoes) == 0
+    assert deteccoes.keypoints.shape == (0, 17, 2)
+    assert deteccoes.confiancas_keypoints.shape == (0, 17)
+    assert deteccoes.pessoas() == [] and deteccoes.para_dicts() == []
+
+def test_de_pessoas_reaproveita_os_arrays():
+    rng = np.random.default_rng(0)
+    deteccoes = DeteccoesPose(np.arange(3), rng.integers(0, 100, (3, 4)), rng.integers(0, 100, (3, 17, 2)),
+                              rng.random((3, 17)))
+    novas = DeteccoesPose.de_pessoas(deteccoes.pessoas())
+    np.testing.assert_array_equal(novas.keypoints, deteccoes.keypoints)
+    assert np.shares_memory(novas.keypoints, deteccoes.keypoints)
+    # No formato antigo (dicionários por keypoint), o resultado é o mesmo
+    antigas = DeteccoesPose.de_pessoas(deteccoes.para_dicts())
+    np.testing.assert_array_equal(antigas.keypoints, deteccoes.keypoints)
+    np.testing.assert_array_equal(antigas.bboxes, deteccoes.bboxes)
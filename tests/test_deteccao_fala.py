@@ -0,0 +1,68 @@
+import numpy as np
+
+from deteccao_fala import DetectorFala, EstadoFala
+
+def _falando(quadro):
+    # Boca abrindo e fechando a cada 3 quadros, como na fala
+    return 0.45 if (quadro // 3) % 2 else 0.05
+
+def _pessoa(id_trilha, razao_boca, **extras):
+    return dict({'id': id_trilha, 'expressoes': {'razao_boca': razao_boca}}, **extras)
+
+def test_boca_parada_nao_e_fala():
+    for razao in (0.05, 0.5):
+        estado = EstadoFala()
+        for _ in range(60):
+            estado.atualizar(razao)
+        assert not estado.falando
+        assert estado.probabilidade == 0.0
+
+def test_fala_acompanha_o_historico_da_boca():
+    estado = EstadoFala()
+    historico = []
+    for quadro in range(60):
+        estado.atualizar(_falando(quadro))
+        historico.append(estado.falando)
+    assert historico[-1] and not historico[0]
+    assert all(historico[historico.index(True):]) # A histerese não alterna a cada quadro
+
+    # Quando a boca para, a fala termina depois que a janela deixa de ter transições
+    for _ in range(60):
+        estado.atualizar(0.05)
+    assert not estado.falando
+
+def test_sem_medicao_a_probabilidade_decai():
+    estado = EstadoFala()
+    for quadro in range(30):
+        estado.atualizar(_falando(quadro))
+    anterior = estado.probabilidade
+    estado.atualizar(None)
+    assert estado.probabilidade < anterior
+
+def test_janela_incremental_igual_ao_recalculo():
+    rng = np.random.default_rng(0)
+    razoes = rng.random(200) * 0.6
+    estado = EstadoFala(tamanho_janela=15)
+    for quadro, razao in enumerate(razoes):
+        estado.atualizar(razao)
+        janela = razoes[max(0, quadro - 14):quadro + 1]
+        assert np.isclose(estado._soma, janela.sum())
+        assert np.isclose(estado._soma_quadrados, (janela * janela).sum())
+
+def test_detector_por_trilha():
+    detector = DetectorFala(max_quadros_ausente=5)
+    for quadro in range(60):
+        pessoas = detector.atualizar([_pessoa(1, _falando(quadro)), _pessoa(2, 0.05)])
+    assert [p['falando'] for p in pessoas] == [True, False]
+    assert pessoas[0]['probabilidade_fala'] > pessoas[1]['probabilidade_fala']
+
+    # Expressões reaproveitadas não acrescentam amostras
+    anterior = pessoas[0]['probabilidade_fala']
+    pessoa, = detector.atualizar([_pessoa(1, 0.05, expressoes_reaproveitadas=True)])
+    assert pessoa['probabilidade_fala'] == anterior
+
+    # Trilhas ausentes por mais de max_quadros_ausente quadros perdem o estado
+    for _ in range(6):
+        detector.atualizar([])
+    pessoa, = detector.atualizar([_pessoa(1, 0.05)])
+    assert pessoa['probabilidade_fala'] == 0.0 and not pessoa['falando']
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+import detector_pessoas_pose
+from configuracao import ConfiguracaoPipeline, configuracao_preset
+from quadro import Quadro
+
+class _DetectorFalso:
+    """Guarda as imagens recebidas e devolve uma pessoa no centro, em coordenadas normalizadas."""
+
+    def __init__(self):
+        self.imagens = []
+
+    def detectar(self, imagens, tamanho_entrada=640):
+        self.imagens.extend(imagens)
+        keypoints = np.full((1, 17, 2), 0.5, dtype=np.float32)
+        return [(np.array([[0.25, 0.25, 0.75, 0.75]], np.float32), np.array([0.9], np.float32),
+                 keypoints, np.ones((1, 17), np.float32)) for _ in imagens]
+
+@pytest.fixture
+def detector(monkeypatch):
+    falso = _DetectorFalso()
+    monkeypatch.setattr(detector_pessoas_pose, "obter_detector_pose", lambda config: falso)
+    return falso
+
+def _quadro(largura=4000, altura=3000):
+    return Quadro(np.random.default_rng(0).integers(0, 256, (altura, largura, 3), dtype=np.uint8))
+
+def test_padrao_envia_o_quadro_original(detector):
+    quadro = _quadro()
+    detector_pessoas_pose.detectar_pessoas_e_poses_quadro(quadro, ConfiguracaoPipeline())
+    assert detector.imagens[0] is quadro.bgr
+
+def test_reducao_mantem_as_coordenadas_do_original(detector):
+    quadro = _quadro()
+    pessoas = detector_pessoas_pose.detectar_pessoas_e_poses_quadro(quadro, configuracao_preset("equilibrado"))
+    assert max(detector.imagens[0].shape[:2]) == 1280
+    assert pessoas[0]['bbox'] == [1000, 750, 3000, 2250]
+    np.testing.assert_array_equal(pessoas[0]['keypoints'][0], [2000, 1500])
@@ -0,0 +1,75 @@
+import copy
+import random
+
+import numpy as np
+
+from direcao_olhar import analisar_direcao_olhar
+
+def _vetor_olhar_original(keypoints):
+    try:
+        nariz = np.array([keypoints[0]['x'], keypoints[0]['y']])
+        centro_olhos = (np.array([keypoints[1]['x'], keypoints[1]['y']]) +
+                        np.array([keypoints[2]['x'], keypoints[2]['y']])) / 2
+        vetor = nariz - centro_olhos
+        norma = np.linalg.norm(vetor)
+        return None if norma == 0 else vetor / norma
+    except (KeyError, IndexError):
+        return None
+
+def _alvos_original(deteccoes):
+    """O laço par a par de antes da vetorização, como referência."""
+    centros = [np.array([(p['bbox'][0] + p['bbox'][2]) / 2, (p['bbox'][1] + p['bbox'][3]) / 2])
+               if 'bbox' in p else None for p in deteccoes]
+    alvos = []
+    for i, pessoa in enumerate(deteccoes):
+        alvos.append(None)
+        if not pessoa.get('keypoints') or centros[i] is None:
+            continue
+        vetor_olhar = _vetor_olhar_original({kp['point_id']: kp for kp in pessoa['keypoints']})
+        if vetor_olhar is None:
+            continue
+        menor_angulo = np.pi
+        for j, alvo in enumerate(deteccoes):
+            if i == j or centros[j] is None:
+                continue
+            vetor_para_alvo = centros[j] - centros[i]
+            norma = np.linalg.norm(vetor_para_alvo)
+            if norma == 0:
+                continue
+            angulo = np.arccos(np.clip(np.dot(vetor_olhar, vetor_para_alvo / norma), -1.0, 1.0))
+            if angulo < np.pi / 6 and angulo < menor_angulo:
+                menor_angulo = angulo
+                alvos[i] = alvo['id']
+    return alvos
+
+def _cena(rng):
+    """Cena pequena, em coordenadas inteiras, com muitos empates, centros repetidos e keypoints faltando."""
+    pessoas = []
+    for i in range(rng.randint(0, 12)):
+        pessoa = {'id': i * 3 + 1}
+        if rng.random() < 0.95:
+            x, y = rng.randint(0, 50), rng.randint(0, 50)
+            pessoa['bbox'] = [x, y, x + rng.randint(0, 20) * 2, y + rng.randint(0, 20) * 2]
+        if rng.random() < 0.9:
+            keypoints = [{'point_id': k, 'x': rng.randint(0, 60), 'y': rng.randint(0, 60)} for k in range(17)]
+            if rng.random() < 0.1:
+                keypoints = keypoints[3:] # Sem nariz e olhos
+            elif rng.random() < 0.1:
+                keypoints = []
+            pessoa['keypoints'] = keypoints
+        pessoas.append(pessoa)
+    return pessoas
+
+def test_vetorizado_igual_ao_laco_original():
+    rng = random.Random(0)
+    for _ in range(3000):
+        deteccoes = _cena(rng)
+        esperado = _alvos_original(copy.deepcopy(deteccoes))
+        resultado = analisar_direcao_olhar(copy.deepcopy(deteccoes))
+        assert [p['olhando_para_id'] for p in resultado] == esperado
+
+def test_centros():
+    resultado = analisar_direcao_olhar([{'id': 0, 'bbox': [0, 0, 10, 20]}, {'id': 1}])
+    np.testing.assert_array_equal(resultado[0]['centro'], [5.0, 10.0])
+    assert resultado[1]['centro'] is None
+    assert [p['olhando_para_id'] for p in resultado] == [None, None]
@@ -0,0 +1,52 @@
+from escalonador import EscalonadorEtapas
+
+def test_cadencia_pula_quadros():
+    escalonador = EscalonadorEtapas({"pose": 3})
+    executados = [q for q in range(10) if escalonador.deve_executar("pose", q)]
+    assert executados == [0, 3, 6, 9]
+
+def test_etapas_sem_cadencia_rodam_sempre():
+    escalonador = EscalonadorEtapas({"pose": 3})
+    assert all(escalonador.deve_executar("gestos", q) for q in range(5))
+
+def test_cadencia_por_trilha():
+    escalonador = EscalonadorEtapas({"faces": 4})
+    execucoes = {1: [], 2: []}
+    for quadro in range(8):
+        for chave in ([1] if quadro < 2 else [1, 2]): # A trilha 2 aparece no quadro 2
+            if escalonador.deve_executar("faces", quadro, chave):
+                execucoes[chave].append(quadro)
+    assert execucoes == {1: [0, 4], 2: [2, 6]}
+
+def test_movimento_antecipa_a_execucao():
+    escalonador = EscalonadorEtapas({"faces": 10}, limiar_movimento=0.1)
+    bbox = [0, 0, 100, 200]
+    assert escalonador.deve_executar("faces", 0, 1, bbox)
+    assert not escalonador.deve_executar("faces", 1, 1, [2, 0, 102, 200]) # Movimento pequeno
+    assert escalonador.deve_executar("faces", 2, 1, [40, 0, 140, 200])
+    # A referência passa a ser a bbox da última execução
+    assert not escalonador.deve_executar("faces", 3, 1, [42, 0, 142, 200])
+
+def test_sem_limiar_o_movimento_e_ignorado():
+    escalonador = EscalonadorEtapas({"faces": 10})
+    escalonador.deve_executar("faces", 0, 1, [0, 0, 100, 200])
+    assert not escalonador.deve_executar("faces", 1, 1, [500, 0, 600, 200])
+    assert escalonador.deve_executar("faces", 1, 1, [500, 0, 600, 200], forcar=True)
+
+def test_guardar_obter_e_descartar():
+    escalonador = EscalonadorEtapas({"faces": 5})
+    assert escalonador.obter("faces", 1) == (None, None)
+    escalonador.deve_executar("faces", 0, 1, [0, 0, 10, 10])
+    escalonador.guardar("faces", 1, "rosto")
+    escalonador.deve_executar("faces", 2, 1, [0, 0, 10, 10])
+    assert escalonador.obter("faces", 1) == ([0, 0, 10, 10], "rosto")
+    escalonador.descartar_antigos("faces", 10, idade_maxima=5)
+    assert escalonador.obter("faces", 1) == (None, None)
+
+def test_relatorio():
+    escalonador = EscalonadorEtapas({"pose": 2})
+    for quadro in range(10):
+        escalonador.deve_executar("pose", quadro)
+    relatorio = escalonador.relatorio()["pose"]
+    assert relatorio["execucoes"] == 5 and relatorio["oportunidades"] == 10
+    assert relatorio["fracao"] == 0.5
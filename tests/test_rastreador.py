@@ -0,0 +1,64 @@
+import numpy as np
+
+from rastreador import RastreadorPessoas, movimento_relativo
+
+def _pessoa(bbox, conf=0.9, id_deteccao=0):
+    return {'id': id_deteccao, 'bbox': list(bbox), 'conf': conf}
+
+def test_ids_estaveis_com_movimento():
+    rastreador = RastreadorPessoas()
+    ids = []
+    for passo in range(10):
+        # Duas pessoas andando em sentidos opostos, detectadas em ordens diferentes
+        a = _pessoa((100 + 5 * passo, 100, 150 + 5 * passo, 200), id_deteccao=0)
+        b = _pessoa((400 - 5 * passo, 100, 450 - 5 * passo, 200), id_deteccao=1)
+        pessoas = rastreador.atualizar([a, b] if passo % 2 == 0 else [b, a])
+        ids.append({p['indice_deteccao']: p['id'] for p in pessoas})
+    assert all(quadro == ids[0] for quadro in ids)
+    assert len(set(ids[0].values())) == 2
+
+def test_trilha_sobrevive_a_quadros_sem_deteccao():
+    rastreador = RastreadorPessoas(max_quadros_perdida=5)
+    id_trilha, = [p['id'] for p in rastreador.atualizar([_pessoa((0, 0, 50, 100))])]
+    for _ in range(5):
+        assert rastreador.atualizar([]) == []
+    assert rastreador.obter_trilha(id_trilha) is not None
+    assert [p['id'] for p in rastreador.atualizar([_pessoa((0, 0, 50, 100))])] == [id_trilha]
+
+def test_trilha_expira_apos_max_quadros_perdida():
+    rastreador = RastreadorPessoas(max_quadros_perdida=5)
+    id_trilha, = [p['id'] for p in rastreador.atualizar([_pessoa((0, 0, 50, 100))])]
+    for _ in range(6):
+        rastreador.atualizar([])
+    assert rastreador.obter_trilha(id_trilha) is None
+    novo_id, = [p['id'] for p in rastreador.atualizar([_pessoa((0, 0, 50, 100))])]
+    assert novo_id != id_trilha
+
+def test_passos_contam_para_a_expiracao():
+    rastreador = RastreadorPessoas(max_quadros_perdida=5)
+    id_trilha, = [p['id'] for p in rastreador.atualizar([_pessoa((0, 0, 50, 100))])]
+    rastreador.atualizar([], passos=6)
+    assert rastreador.obter_trilha(id_trilha) is None
+
+def test_baixa_confianca_so_recupera_trilhas():
+    rastreador = RastreadorPessoas()
+    assert rastreador.atualizar([_pessoa((0, 0, 50, 100), conf=0.2)]) == []
+    id_trilha, = [p['id'] for p in rastreador.atualizar([_pessoa((0, 0, 50, 100))])]
+    assert [p['id'] for p in rastreador.atualizar([_pessoa((2, 0, 52, 100), conf=0.2)])] == [id_trilha]
+
+def test_interpolar_segue_a_velocidade():
+    rastreador = RastreadorPessoas()
+    rastreador.atualizar([_pessoa((0, 0, 50, 100))])
+    pessoas = rastreador.atualizar([_pessoa((10, 0, 60, 100))])
+    keypoints = np.array([[20, 30], [0, 0]], dtype=np.int32)
+    pessoas[0]['keypoints'] = keypoints
+    interpolada, = rastreador.interpolar(pessoas, passos=2)
+    assert interpolada['interpolada']
+    assert interpolada['bbox'][0] > 10 and interpolada['bbox'][1] == 0
+    np.testing.assert_array_equal(interpolada['keypoints'][1], [0, 0]) # Ausente continua ausente
+    assert interpolada['keypoints'][0, 0] > 20
+    assert pessoas[0]['bbox'] == [10, 0, 60, 100] # A detecção original não é alterada
+
+def test_movimento_relativo():
+    assert movimento_relativo((0, 0, 100, 100), (0, 0, 100, 100)) == 0
+    assert np.isclose(movimento_relativo((0, 0, 100, 100), (0, 0, 110, 100)), 0.1)
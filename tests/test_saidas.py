@@ -0,0 +1,103 @@
+import json
+
+import numpy as np
+
+from deteccao import DeteccoesPose
+from saidas import PAPEIS_SOCIAIS, SaidaColunar, SaidaJSON, abrir_colunar
+
+def _quadro(n, rng, inicio_id=0):
+    pessoas = DeteccoesPose(np.arange(inicio_id, inicio_id + n), rng.integers(0, 500, size=(n, 4)),
+                            rng.integers(0, 500, size=(n, 17, 2)), rng.random((n, 17)).astype(np.float32),
+                            rng.random(n).astype(np.float32)).pessoas()
+    for i, pessoa in enumerate(pessoas):
+        pessoa['keypoints_conf'][0] = np.nan # Keypoint ausente
+        pessoa['face_info'] = {'face_bbox': [i, i + 1, i + 2, i + 3],
+                               'face_encoding': rng.random(128).astype(np.float32)} if i % 2 == 0 else None
+        pessoa['expressoes'] = {'boca_aberta': i % 3 == 0, 'razao_boca': 0.25 * i} if i % 2 == 0 else None
+        pessoa['gesticulando'] = i % 2 == 1
+        pessoa['olhando_para_id'] = inicio_id if i > 0 else None
+        pessoa['papel_social'] = PAPEIS_SOCIAIS[1 + i % 3]
+    return pessoas
+
+def test_colunar_ida_e_volta(tmp_path):
+    rng = np.random.default_rng(0)
+    quadros = [_quadro(3, rng), None, _quadro(0, rng), _quadro(4, rng, inicio_id=10)]
+    with SaidaColunar(str(tmp_path), incluir_encoding=True) as saida:
+        for indice, pessoas in enumerate(quadros):
+            saida.escrever(pessoas, indice=indice, arquivo=f"q{indice}.jpg")
+
+    colunas, metadados = abrir_colunar(str(tmp_path))
+    assert [m['arquivo'] for m in metadados] == ["q0.jpg", "q1.jpg", "q2.jpg", "q3.jpg"]
+    assert [m['pessoas'] for m in metadados] == [3, 0, 0, 4]
+    assert [m['primeira_linha'] for m in metadados] == [0, 3, 3, 3]
+
+    pessoas = [p for q in quadros for p in (q or [])]
+    assert len(colunas['id']) == len(pessoas) == 7
+    np.testing.assert_array_equal(colunas['quadro'], [0, 0, 0, 3, 3, 3, 3])
+    for linha, pessoa in enumerate(pessoas):
+        assert colunas['id'][linha] == pessoa['id']
+        np.testing.assert_array_equal(colunas['bbox'][linha], pessoa['bbox'])
+        assert colunas['conf'][linha] == np.float32(pessoa['conf'])
+        np.testing.assert_array_equal(colunas['keypoints'][linha], pessoa['keypoints'])
+        np.testing.assert_array_equal(colunas['keypoints_conf'][linha], pessoa['keypoints_conf']) # NaN == NaN
+        face_info = pessoa['face_info']
+        if face_info:
+            np.testing.assert_array_equal(colunas['face_bbox'][linha], face_info['face_bbox'])
+            np.testing.assert_array_equal(colunas['face_encoding'][linha], face_info['face_encoding'])
+        else:
+            assert (colunas['face_bbox'][linha] == -1).all()
+            assert np.isnan(colunas['face_encoding'][linha]).all()
+        expressoes = pessoa['expressoes'] or {}
+        assert colunas['boca_aberta'][linha] == expressoes.get('boca_aberta', False)
+        if expressoes:
+            assert colunas['razao_boca'][linha] == np.float32(expressoes['razao_boca'])
+        else:
+            assert np.isnan(colunas['razao_boca'][linha])
+        assert colunas['gesticulando'][linha] == pessoa['gesticulando']
+        alvo = pessoa['olhando_para_id']
+        assert colunas['olhando_para_id'][linha] == (-1 if alvo is None else alvo)
+        assert np.isnan(colunas['probabilidade_fala'][linha])
+        assert PAPEIS_SOCIAIS[colunas['papel_social'][linha]] == pessoa['papel_social']
+
+def test_colunar_leitura_durante_a_gravacao(tmp_path):
+    rng = np.random.default_rng(1)
+    saida = SaidaColunar(str(tmp_path))
+    saida.escrever(_quadro(2, rng), indice=0)
+    saida.flush()
+    colunas, metadados = abrir_colunar(str(tmp_path))
+    assert len(colunas['id']) == 2 and len(metadados) == 1
+    assert 'face_encoding' not in colunas
+    saida.fechar()
+
+def test_colunar_vazio(tmp_path):
+    SaidaColunar(str(tmp_path)).fechar()
+    colunas, metadados = abrir_colunar(str(tmp_path))
+    assert metadados == []
+    assert colunas['keypoints'].shape == (0, 17, 2)
+
+def test_json_incremental_igual_ao_dump(tmp_path):
+    rng = np.random.default_rng(2)
+    quadros = [_quadro(2, rng), None, _quadro(0, rng), _quadro(1, rng)]
+    caminho = tmp_path / "saida.json"
+    with SaidaJSON(str(caminho)) as saida:
+        for indice, pessoas in enumerate(quadros):
+            saida.escrever(pessoas, indice=indice, arquivo=f"q{indice}.jpg")
+
+    dados = json.loads(caminho.read_text())
+    assert [q['arquivo'] for q in dados] == ["q0.jpg", "q1.jpg", "q2.jpg", "q3.jpg"]
+    assert 'pessoas' not in dados[1] and dados[2]['pessoas'] == []
+    assert caminho.read_text() == json.dumps(dados, indent=4)
+
+def test_json_quadro_unico(tmp_path):
+    rng = np.random.default_rng(3)
+    caminho = tmp_path / "saida.json"
+    with SaidaJSON(str(caminho)) as saida:
+        saida.escrever(_quadro(2, rng))
+    assert [p['id'] for p in json.loads(caminho.read_text())] == [0, 1]
+
+    with SaidaJSON(str(caminho)) as saida:
+        saida.escrever(None, arquivo="a.jpg", erro="ilegível")
+    assert json.loads(caminho.read_text()) == [{"arquivo": "a.jpg", "erro": "ilegível"}]
+
+    SaidaJSON(str(caminho)).fechar()
+    assert json.loads(caminho.read_text()) == []